@@ -0,0 +1,10 @@
+from allauth.account.adapter import DefaultAccountAdapter
+
+from outbox.mail import enqueue
+
+
+class AccountAdapter(DefaultAccountAdapter):
+    """Queue allauth emails (password reset, confirmation...) in the outbox."""
+
+    def send_mail(self, template_prefix, email, context):
+        enqueue(self.render_mail(template_prefix, email, context))
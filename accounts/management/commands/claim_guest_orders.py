@@ -0,0 +1,36 @@
+from __future__ import annotations
+import time
+
+from allauth.account.models import EmailAddress
+from django.core.management.base import BaseCommand
+
+from accounts.tasks import claim_guest_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Link guest orders to existing accounts by verified email.\n"
+        "Logins and email confirmations queue this per user; run it once to catch up "
+        "accounts that have not logged in since. Only verified addresses count. Safe to "
+        "re-run: orders that already belong to someone are never touched."
+    )
+
+    def handle(self, *args, **opts):
+        started = time.monotonic()
+        user_ids = (
+            EmailAddress.objects.filter(verified=True)
+            .order_by("user_id")
+            .values_list("user_id", flat=True)
+            .distinct()
+        )
+        users = linked = 0
+        for user_id in user_ids.iterator():
+            users += 1
+            linked += claim_guest_orders(user_id)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {users} accounts, linked {linked} guest orders in {elapsed:.2f}s."
+            )
+        )
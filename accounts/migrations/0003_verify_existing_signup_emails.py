@@ -0,0 +1,61 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations
+
+
+def verify_existing_signup_emails(apps, schema_editor):
+    """
+    Guest orders are claimed through verified EmailAddress rows only. Accounts
+    created before that rule were trusted on their sign-up address (User.email),
+    so grandfather it in as verified; new sign-ups still have to confirm theirs.
+    An address shared by several accounts stays unverified.
+    """
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    EmailAddress = apps.get_model("account", "EmailAddress")
+
+    signup = {
+        user_id: email.strip().lower()
+        for user_id, email in User.objects.exclude(email="").values_list("id", "email")
+    }
+    users_per_email = Counter(signup.values())
+    taken = Counter(e.lower() for e in EmailAddress.objects.values_list("email", flat=True))
+    existing = {
+        (user_id, email.lower()): pk
+        for pk, user_id, email in EmailAddress.objects.values_list("id", "user_id", "email")
+    }
+    with_primary = set(
+        EmailAddress.objects.filter(primary=True).values_list("user_id", flat=True)
+    )
+
+    to_verify, to_create = [], []
+    for user_id, email in signup.items():
+        if users_per_email[email] > 1:
+            continue
+        pk = existing.get((user_id, email))
+        if pk is not None:
+            to_verify.append(pk)
+        elif not taken[email]:
+            to_create.append(
+                EmailAddress(
+                    user_id=user_id,
+                    email=email,
+                    verified=True,
+                    primary=user_id not in with_primary,
+                )
+            )
+    EmailAddress.objects.filter(id__in=to_verify, verified=False).update(verified=True)
+    EmailAddress.objects.bulk_create(to_create, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_useraddress_is_active"),
+        ("account", "0002_email_max_length"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(verify_existing_signup_emails, migrations.RunPython.noop),
+    ]
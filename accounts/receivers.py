@@ -0,0 +1,24 @@
+from allauth.account.signals import email_confirmed
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+
+from checkout.signals import order_paid
+from jobs.queue import enqueue
+
+from .tasks import claim_guest_orders, link_order_to_account
+
+
+@receiver(user_logged_in, dispatch_uid="accounts.claim_guest_orders")
+def queue_guest_order_claim(sender, request, user, **kwargs):
+    enqueue(claim_guest_orders, user_id=user.pk)
+
+
+@receiver(email_confirmed, dispatch_uid="accounts.claim_on_email_confirmed")
+def queue_claim_for_confirmed_email(sender, request, email_address, **kwargs):
+    enqueue(claim_guest_orders, user_id=email_address.user_id)
+
+
+@receiver(order_paid, dispatch_uid="accounts.link_paid_guest_order")
+def queue_order_link(sender, order, **kwargs):
+    if order.user_id is None:
+        enqueue(link_order_to_account, order_id=order.id)
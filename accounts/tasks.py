@@ -0,0 +1,38 @@
+"""
+Background jobs for accounts (run by `manage.py runworker`).
+
+Guest orders are linked to the account with the same email here, off the
+request path, so order history only needs the `user_id` index. Only addresses
+the owner has confirmed (allauth EmailAddress.verified) count: anyone can sign
+up with someone else's address, and must not see that person's orders.
+"""
+
+from allauth.account.models import EmailAddress
+
+from checkout.models import Order
+
+
+def claim_guest_orders(user_id: int) -> int:
+    """Link all guest orders placed with one of the user's verified emails to the user."""
+    emails = EmailAddress.objects.filter(user_id=user_id, verified=True).values_list(
+        "email", flat=True
+    )
+    return sum(
+        Order.objects.for_email(email).filter(user__isnull=True).update(user_id=user_id)
+        for email in emails
+    )
+
+
+def link_order_to_account(order_id: int) -> bool:
+    """Link one guest order to the account that verified its email, if exactly one."""
+    order = Order.objects.filter(id=order_id, user__isnull=True).only("email_normalized").first()
+    if order is None or not order.email_normalized:
+        return False
+    user_ids = list(
+        EmailAddress.objects.filter(email__iexact=order.email_normalized, verified=True)
+        .values_list("user_id", flat=True)
+        .distinct()[:2]
+    )
+    if len(user_ids) != 1:
+        return False
+    return Order.objects.filter(id=order_id, user__isnull=True).update(user_id=user_ids[0]) == 1
@@ -0,0 +1,128 @@
+from datetime import timedelta
+from io import StringIO
+
+from allauth.account.models import EmailAddress
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.views import ORDERS_PER_PAGE
+from checkout.models import Order, OrderItem
+from jobs.models import Job
+from jobs.queue import run_job
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    }
+)
+class OrderHistoryTests(TestCase):
+    """
+    Order history lists only orders linked by user_id (guest orders are claimed
+    by a background job), with item counts and keyset pagination.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "anna", "anna@example.com", "pw-123456!"
+        )
+
+    def _order(self, minutes_ago=0, **kwargs):
+        order = Order.objects.create(email="anna@example.com", total=1590, **kwargs)
+        Order.objects.filter(id=order.id).update(
+            created_at=timezone.now() - timedelta(minutes=minutes_ago)
+        )
+        return order
+
+    def test_login_claims_guest_orders_by_verified_email(self):
+        guest = Order.objects.create(email="Anna@Example.com", total=1590)
+        other = Order.objects.create(email="someone@example.com", total=990)
+        address = EmailAddress.objects.create(user=self.user, email="anna@example.com")
+
+        # Not confirmed yet: the address may belong to someone else
+        self.client.login(username="anna", password="pw-123456!")
+        run_job(Job.objects.get(task="accounts.tasks.claim_guest_orders").id)
+        guest.refresh_from_db()
+        self.assertIsNone(guest.user)
+
+        EmailAddress.objects.filter(id=address.id).update(verified=True)
+        self.client.login(username="anna", password="pw-123456!")
+        run_job(Job.objects.filter(task="accounts.tasks.claim_guest_orders").latest("id").id)
+
+        guest.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(guest.user, self.user)
+        self.assertIsNone(other.user)
+        resp = self.client.get(reverse("orders"))
+        self.assertContains(resp, guest.order_number())
+
+    def test_backfill_command_claims_for_verified_accounts(self):
+        guest = Order.objects.create(email="anna@example.com", total=1590)
+        EmailAddress.objects.create(user=self.user, email="anna@example.com", verified=True)
+
+        out = StringIO()
+        call_command("claim_guest_orders", stdout=out)
+
+        self.assertIn("linked 1 guest orders", out.getvalue())
+        guest.refresh_from_db()
+        self.assertEqual(guest.user, self.user)
+
+    def test_item_count_without_prefetch(self):
+        order = self._order(user=self.user)
+        for name in ("Tee", "Leggings"):
+            OrderItem.objects.create(order=order, product_name=name, unit_price=500)
+        self.client.force_login(self.user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("orders"))
+
+        order_queries = [q["sql"] for q in ctx.captured_queries if "checkout_order" in q["sql"]]
+        self.assertEqual(len(order_queries), 1)  # counts come from a subquery, no prefetch
+
+        self.assertEqual(resp.context["orders"][0].item_count, 2)
+        self.assertContains(resp, "2 Order items")
+
+    def test_keyset_pagination(self):
+        created = [self._order(minutes_ago=i, user=self.user) for i in range(ORDERS_PER_PAGE + 3)]
+        self.client.force_login(self.user)
+
+        first = self.client.get(reverse("orders"))
+        second = self.client.get(reverse("orders"), {"after": first.context["next_cursor"]})
+
+        seen = [o.id for o in first.context["orders"]] + [o.id for o in second.context["orders"]]
+        self.assertEqual(seen, [o.id for o in created])
+        self.assertEqual(second.context["next_cursor"], "")
+
+    def test_bad_cursor_shows_first_page(self):
+        self._order(user=self.user)
+        self.client.force_login(self.user)
+
+        resp = self.client.get(reverse("orders"), {"after": "not-a-cursor"})
+
+        self.assertEqual(len(resp.context["orders"]), 1)
+
+    def test_order_detail_requires_login(self):
+        guest = Order.objects.create(email="", total=1590)
+
+        resp = self.client.get(reverse("order_detail", args=[guest.order_number()]))
+
+        self.assertEqual(resp.status_code, 302)
+        self.assertIn("/accounts/login/", resp["Location"])
+
+    def test_order_detail_needs_a_verified_email(self):
+        guest = Order.objects.create(email="anna@example.com", total=1590)
+        url = reverse("order_detail", args=[guest.order_number()])
+        self.client.force_login(self.user)
+        address = EmailAddress.objects.create(user=self.user, email="anna@example.com")
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        address.verified = True
+        address.save()
+        self.assertEqual(self.client.get(url).status_code, 200)
@@ -0,0 +1,27 @@
+from importlib import import_module
+
+from allauth.account.models import EmailAddress
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+migration = import_module("accounts.migrations.0003_verify_existing_signup_emails")
+
+
+class VerifyExistingSignupEmailsTests(TestCase):
+    """Existing accounts keep claiming guest orders through their sign-up address."""
+
+    def test_signup_addresses_become_verified(self):
+        User = get_user_model()
+        anna = User.objects.create_user("anna", "Anna@Example.com", "pw-123456!")
+        bob = User.objects.create_user("bob", "bob@example.com", "pw-123456!")
+        EmailAddress.objects.create(user=bob, email="bob@example.com", primary=True)
+        # The same address on two accounts proves neither
+        User.objects.create_user("eve1", "shared@example.com", "pw-123456!")
+        User.objects.create_user("eve2", "shared@example.com", "pw-123456!")
+
+        migration.verify_existing_signup_emails(apps, None)
+
+        self.assertTrue(EmailAddress.objects.get(user=anna, email="anna@example.com").verified)
+        self.assertTrue(EmailAddress.objects.get(user=bob).verified)
+        self.assertFalse(EmailAddress.objects.filter(email="shared@example.com").exists())
@@ -1,10 +1,15 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from allauth.account.models import EmailAddress
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Q
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib import messages
 from django.views.decorators.http import require_POST
 
-from checkout.models import Order
+from checkout.models import Order, OrderItem
 from .forms import UserAddressForm
 
 
@@ -13,26 +18,66 @@ def dashboard(request):
     return render(request, "accounts/dashboard.html")
 
 
+ORDERS_PER_PAGE = 20
+
+
+def _encode_cursor(order) -> str:
+    raw = f"{order.created_at.isoformat()}|{order.id}"
+    return urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(token: str):
+    """Return (created_at, id) from a cursor token, or None if it is malformed."""
+    try:
+        created_raw, id_raw = urlsafe_b64decode(token.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_raw), int(id_raw)
+    except (ValueError, UnicodeError):
+        return None
+
+
 @login_required
 def orders(request):
     """
-    List all orders for the logged-in user.
-    Match either by FK user or by email for guest checkouts.
+    List the logged-in user's orders, newest first.
+    Guest orders are linked to the account by email in the background
+    (accounts.tasks), so this is a plain user_id index scan. Keyset-paginated
+    on (created_at, id): ?after=<cursor> continues below the previous page.
     """
-    user = request.user
+    item_count = (
+        OrderItem.objects.filter(order=OuterRef("pk"))
+        .values("order")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
     orders_qs = (
-        Order.objects.filter(Q(user=user) | Q(email=user.email))
-        .order_by("-created_at")
-        .prefetch_related("items")
+        Order.objects.filter(user=request.user)
+        .annotate(item_count=Coalesce(Subquery(item_count), 0))
+        .order_by("-created_at", "-id")
     )
-    return render(request, "accounts/orders.html", {"orders": orders_qs})
+
+    cursor = _decode_cursor(request.GET.get("after", ""))
+    if cursor:
+        created_at, order_id = cursor
+        orders_qs = orders_qs.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=order_id)
+        )
+
+    page = list(orders_qs[: ORDERS_PER_PAGE + 1])
+    next_cursor = _encode_cursor(page[ORDERS_PER_PAGE - 1]) if len(page) > ORDERS_PER_PAGE else ""
+    context = {
+        "orders": page[:ORDERS_PER_PAGE],
+        "next_cursor": next_cursor,
+        "is_first_page": cursor is None,
+    }
+    return render(request, "accounts/orders.html", context)
 
 
 @login_required
 def order_detail(request, order_number):
     """
     Show a specific order (e.g., FP-000123).
-    Permit access if the order belongs to the user or email matches.
+    Permit access if the order belongs to the user or was placed with one of the
+    user's verified email addresses (unverified addresses prove nothing).
     """
     # Be defensive when parsing "FP-000123" -> 123
     order_id = None
@@ -45,7 +90,15 @@ def order_detail(request, order_number):
 
     order = get_object_or_404(Order.objects.prefetch_related("items__product"), id=order_id)
 
-    if not (order.user_id == request.user.id or order.email == request.user.email):
+    is_owner = order.user_id is not None and order.user_id == request.user.id
+    email_matches = (
+        not is_owner
+        and bool(order.email_normalized)
+        and EmailAddress.objects.filter(
+            user=request.user, email__iexact=order.email_normalized, verified=True
+        ).exists()
+    )
+    if not (is_owner or email_matches):
         return render(request, "accounts/order_detail.html", status=404)
 
     return render(request, "accounts/order_detail.html", {"order": order})
@@ -1,5 +1,18 @@
+import json
+import re
+
 from django.contrib import admin
-from .models import Order, OrderItem
+from django.core.paginator import Paginator
+from django.db import connections
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .export import export_filename, stream_export
+from .models import Order, OrderItem, StripeEvent
+
+# "FP-000123", "fp123", "#123" or a bare "123" all mean order id 123
+ORDER_NUMBER_RE = re.compile(r"^(?:FP-?|#)?0*(\d{1,18})$", re.IGNORECASE)
 
 
 # Helper functions
@@ -13,6 +26,54 @@ def format_eur(cents: int) -> str:
         return "€0.00"
 
 
+def parse_order_number(term: str) -> int | None:
+    """Return the order id for an order-number-like search term, else None."""
+    match = ORDER_NUMBER_RE.match(term.strip())
+    return int(match.group(1)) if match else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids a full COUNT(*) on large tables.
+
+    On PostgreSQL the planner's row estimate is used: pg_class.reltuples for an
+    unfiltered list, the EXPLAIN estimate for a filtered/searched one. Small
+    results (estimated under EXACT_BELOW rows) are counted exactly, so short
+    lists show true totals. Other databases always count exactly.
+    """
+
+    EXACT_BELOW = 10_000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if not hasattr(qs, "query"):
+            return super().count
+        connection = connections[qs.db]
+        if connection.vendor == "postgresql":
+            estimate = self._estimate(connection, qs.order_by())
+            if estimate is not None and estimate >= self.EXACT_BELOW:
+                return estimate
+        return qs.order_by().count()
+
+    @staticmethod
+    def _estimate(connection, qs):
+        with connection.cursor() as cursor:
+            if not qs.query.where:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [qs.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+                return row[0] if row and row[0] > 0 else None
+            sql, params = qs.query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
 # Inline for order items
 class OrderItemInline(admin.TabularInline):
     """
@@ -71,18 +132,26 @@ class OrderItemInline(admin.TabularInline):
 class OrderAdmin(admin.ModelAdmin):
     """Admin configuration for the Order model."""
 
-    list_display = ("order_number", "email", "status", "total_eur", "created_at")
+    list_display = ("order_number", "email", "user", "status", "total_eur", "created_at")
     list_filter = ("status", "created_at")
-    search_fields = ("order_number", "email", "full_name", "id")
+    list_select_related = ("user",)
+    # Order numbers and email addresses are handled in get_search_results
+    search_fields = ("email", "full_name")
+    search_help_text = "Order number (FP-000123), exact email address, or part of a name/email."
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
     date_hierarchy = "created_at"
     ordering = ("-created_at",)
 
     inlines = [OrderItemInline]
+    actions = ["export_csv", "export_csv_gzip", "export_jsonl"]
 
     readonly_fields = (
         "id",
         "created_at",
         "payment_intent_id",
+        "payment_intent_amount",
+        "payment_intent_status",
         "stripe_receipt_url",
         "subtotal",
         "shipping_cost",
@@ -113,7 +182,17 @@ class OrderAdmin(admin.ModelAdmin):
             "Shipping & totals",
             {"fields": ("shipping_method", "shipping_cost", "subtotal", "total")},
         ),
-        ("Stripe", {"fields": ("payment_intent_id", "stripe_receipt_url")}),
+        (
+            "Stripe",
+            {
+                "fields": (
+                    "payment_intent_id",
+                    "payment_intent_amount",
+                    "payment_intent_status",
+                    "stripe_receipt_url",
+                )
+            },
+        ),
     )
 
     def total_eur(self, obj):
@@ -122,11 +201,86 @@ class OrderAdmin(admin.ModelAdmin):
 
     total_eur.short_description = "Total (€)"
 
+    def _export(self, queryset, fmt, gzip=False):
+        """Stream the selected orders (one row per order line) as a download."""
+        stamp = timezone.localtime().strftime("%Y%m%d-%H%M%S")
+        content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+        if gzip:
+            content_type = "application/gzip"
+        response = StreamingHttpResponse(
+            stream_export(queryset, fmt, gzip=gzip), content_type=content_type
+        )
+        filename = export_filename(fmt, gzip, stem=f"orders-{stamp}")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    @admin.action(description="Export order lines as CSV")
+    def export_csv(self, request, queryset):
+        return self._export(queryset, "csv")
+
+    @admin.action(description="Export order lines as CSV (gzip)")
+    def export_csv_gzip(self, request, queryset):
+        return self._export(queryset, "csv", gzip=True)
+
+    @admin.action(description="Export order lines as JSON Lines")
+    def export_jsonl(self, request, queryset):
+        return self._export(queryset, "jsonl")
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Exact, indexed lookups for the common cases: an order number becomes an
+        id match and a complete email address with orders goes through the
+        normalized email column. Anything else, including partial addresses
+        ("@gmail.com", "anna@"), falls back to the usual substring search.
+        """
+        term = search_term.strip()
+        order_id = parse_order_number(term)
+        if order_id is not None:
+            return queryset.filter(id=order_id), False
+        if "@" in term and " " not in term:
+            by_email = queryset.for_email(term)
+            if by_email.exists():
+                return by_email, False
+        return super().get_search_results(request, queryset, search_term)
+
 
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     """Admin configuration for the OrderItem model (optional, for overview)."""
 
     list_display = ("order", "product", "quantity")
-    search_fields = ("order__order_number", "product__name")
+    search_fields = ("product_name", "product__name")
+    search_help_text = "Order number (FP-000123) or product name."
     list_select_related = ("order", "product")
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def get_search_results(self, request, queryset, search_term):
+        """Order numbers match the order's id; other terms search product names."""
+        order_id = parse_order_number(search_term)
+        if order_id is not None:
+            return queryset.filter(order_id=order_id), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+@admin.register(StripeEvent)
+class StripeEventAdmin(admin.ModelAdmin):
+    """Read-only view of received Stripe webhook events and their processing state."""
+
+    list_display = ("event_id", "event_type", "status", "attempts", "received_at", "processed_at")
+    list_filter = ("status", "event_type")
+    search_fields = ("event_id",)
+    readonly_fields = (
+        "event_id",
+        "event_type",
+        "payload",
+        "status",
+        "attempts",
+        "last_error",
+        "next_attempt_at",
+        "received_at",
+        "processed_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CheckoutConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "checkout"
+
+    def ready(self):
+        from . import receivers  # noqa: F401  (connects order_paid receivers)
@@ -0,0 +1,47 @@
+"""
+Symmetric encryption for secrets stored on checkout models (e.g. Stripe
+client secrets). Uses Fernet from `cryptography`; the key comes from
+FIELD_ENCRYPTION_KEY or is derived from SECRET_KEY when that is unset.
+"""
+
+import base64
+import hashlib
+from functools import lru_cache
+
+from cryptography.fernet import Fernet, InvalidToken
+from django.conf import settings
+
+
+@lru_cache(maxsize=4)
+def _fernet_for(raw_key: str) -> Fernet:
+    try:
+        return Fernet(raw_key)
+    except (ValueError, TypeError):
+        # Not a Fernet key: derive a stable 32-byte key from the given secret
+        digest = hashlib.sha256(raw_key.encode("utf-8")).digest()
+        return Fernet(base64.urlsafe_b64encode(digest))
+
+
+def _fernet() -> Fernet:
+    raw_key = getattr(settings, "FIELD_ENCRYPTION_KEY", "") or settings.SECRET_KEY
+    return _fernet_for(raw_key)
+
+
+def encrypt_str(value: str) -> str:
+    """Encrypt a string; empty input stays empty."""
+    if not value:
+        return ""
+    return _fernet().encrypt(value.encode("utf-8")).decode("ascii")
+
+
+def decrypt_str(token: str) -> str:
+    """
+    Decrypt a value from encrypt_str(); returns "" if missing or unreadable
+    (e.g. the key was rotated).
+    """
+    if not token:
+        return ""
+    try:
+        return _fernet().decrypt(token.encode("ascii")).decode("utf-8")
+    except (InvalidToken, ValueError):
+        return ""
@@ -0,0 +1,30 @@
+"""
+Order confirmation email.
+
+Queued from the `order_paid` signal (see receivers.py) with just the order id;
+the outbox worker calls render_order_confirmation() when it sends the mail.
+"""
+
+from django.template.loader import render_to_string
+
+from outbox.mail import enqueue_rendered
+
+from .models import Order
+
+ORDER_CONFIRMATION_RENDERER = "checkout.emails.render_order_confirmation"
+
+
+def queue_order_confirmation(order: Order):
+    """Queue the confirmation for `order`. Returns the OutboxMessage, or None without email."""
+    if not order.email:
+        return None
+    return enqueue_rendered(ORDER_CONFIRMATION_RENDERER, {"order_id": order.id}, [order.email])
+
+
+def render_order_confirmation(order_id: int) -> tuple[str, str, str]:
+    order = Order.objects.prefetch_related("items").get(id=order_id)
+    ctx = {"order": order, "items": list(order.items.all()), "site_name": "Fempowered"}
+    subject = render_to_string("checkout/email/order_confirmation_subject.txt", ctx)
+    text = render_to_string("checkout/email/order_confirmation.txt", ctx)
+    html = render_to_string("checkout/email/order_confirmation.html", ctx)
+    return subject, text, html
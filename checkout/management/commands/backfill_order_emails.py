@@ -0,0 +1,70 @@
+from __future__ import annotations
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from checkout.models import Order, normalize_email
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill Order.email_normalized for orders created before the column existed.\n"
+        "Walks the table by id in small batches, each in its own short transaction, so it "
+        "can run on a live database. Safe to re-run; only rows that differ are written."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Orders per batch (default: 1000)."
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.0,
+            help="Seconds to pause between batches to spread load (default: 0).",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only count rows that need updating."
+        )
+
+    def handle(self, *args, **opts):
+        batch_size = opts["batch_size"]
+        if batch_size <= 0:
+            raise CommandError("--batch-size must be positive.")
+
+        started = time.monotonic()
+        last_id = 0
+        scanned = changed = 0
+        while True:
+            rows = list(
+                Order.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "email", "email_normalized")[:batch_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            scanned += len(rows)
+
+            stale = [
+                Order(id=pk, email_normalized=normalize_email(email))
+                for pk, email, current in rows
+                if normalize_email(email) != current
+            ]
+            if stale and not opts["dry_run"]:
+                with transaction.atomic():
+                    Order.objects.bulk_update(stale, ["email_normalized"])
+            changed += len(stale)
+
+            if opts["sleep"]:
+                time.sleep(opts["sleep"])
+
+        elapsed = time.monotonic() - started
+        verb = "would update" if opts["dry_run"] else "updated"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Scanned {scanned} orders, {verb} {changed} in {elapsed:.2f}s "
+                f"({scanned / elapsed if elapsed else 0:.0f} orders/s)."
+            )
+        )
@@ -0,0 +1,148 @@
+from __future__ import annotations
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from checkout.models import Order
+from checkout.stripe_stub import StripeStub, StubStripeServer
+from jobs.models import Job
+from jobs.queue import claim, run_job
+
+ADDRESS = {
+    "full_name": "Bench Customer",
+    "email": "bench@example.com",
+    "phone": "",
+    "address1": "Test Street 1",
+    "postal_code": "12345",
+    "city": "Stockholm",
+    "country": "SE",
+    "shipping_method": "standard",
+    "billing_same_as_shipping": True,
+}
+CART = {"1": {"name": "Bench Tee", "qty": 2, "price_cent": 2500, "size": "M"}}
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark time-to-payment-form against the local fake Stripe server: address POST, "
+        "a simulated redirect round-trip, then the payment page GET. Runs once with the "
+        "PaymentIntent created inline by payment_view and once with it pre-created by the "
+        "prepare_payment_intent job (worker thread running). Writes to the configured "
+        "database; only runs with DEBUG=True or --force."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=50, help="Checkouts per mode.")
+        parser.add_argument(
+            "--stripe-latency-ms",
+            type=float,
+            default=300,
+            help="Latency the fake Stripe server adds to every call (default: 300).",
+        )
+        parser.add_argument(
+            "--redirect-ms",
+            type=float,
+            default=150,
+            help="Simulated browser redirect round-trip between the two pages (default: 150).",
+        )
+        parser.add_argument("--keep", action="store_true", help="Keep the generated orders.")
+        parser.add_argument("--force", action="store_true", help="Allow running with DEBUG=False.")
+
+    def handle(self, *args, **opts):
+        if not settings.DEBUG and not opts["force"]:
+            raise CommandError("Refusing to write benchmark data with DEBUG=False (use --force).")
+        if opts["count"] <= 0:
+            raise CommandError("--count must be positive.")
+
+        server = StubStripeServer(
+            stub_account=StripeStub(), latency=opts["stripe_latency_ms"] / 1000
+        )
+        server.start_in_thread()
+        first_order_id = (Order.objects.order_by("-id").values_list("id", flat=True).first()) or 0
+        try:
+            with override_settings(
+                STRIPE_USE_STUB=False,
+                STRIPE_SECRET_KEY="sk_test_bench",
+                STRIPE_API_BASE=server.url,
+                ALLOWED_HOSTS=["testserver", *settings.ALLOWED_HOSTS],
+            ):
+                results = {
+                    "inline": self._run(opts, precreate=False),
+                    "precreated": self._run(opts, precreate=True),
+                }
+        finally:
+            server.shutdown()
+            server.server_close()
+            if not opts["keep"]:
+                Job.objects.filter(task="checkout.tasks.prepare_payment_intent").delete()
+                Order.objects.filter(id__gt=first_order_id, email=ADDRESS["email"]).delete()
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Time to payment form"))
+        self.stdout.write(
+            f"  Stripe latency {opts['stripe_latency_ms']:.0f} ms, "
+            f"redirect {opts['redirect_ms']:.0f} ms, {opts['count']} checkouts per mode"
+        )
+        for mode, (total, page) in results.items():
+            self.stdout.write(
+                f"  {mode:<11}: avg {statistics.mean(total):.0f} ms, "
+                f"p50 {_percentile(total, 0.5):.0f} ms, p95 {_percentile(total, 0.95):.0f} ms "
+                f"(payment page alone avg {statistics.mean(page):.0f} ms)"
+            )
+        saved = statistics.mean(results["inline"][0]) - statistics.mean(results["precreated"][0])
+        self.stdout.write(self.style.SUCCESS(f"Pre-creating saves {saved:.0f} ms on average."))
+
+    def _run(self, opts, precreate):
+        stop = threading.Event()
+        worker = None
+        if precreate:
+            worker = threading.Thread(target=self._work, args=(stop,), daemon=True)
+            worker.start()
+
+        total_ms, page_ms = [], []
+        try:
+            for _ in range(opts["count"]):
+                client = Client()
+                session = client.session
+                session["cart"] = dict(CART)
+                session.save()
+
+                started = time.perf_counter()
+                resp = client.post(reverse("checkout_address"), ADDRESS)
+                if resp.status_code != 302:
+                    raise CommandError(f"Address step answered {resp.status_code}")
+                if not precreate:
+                    # No worker: the payment page has to create the intent itself
+                    Job.objects.filter(task="checkout.tasks.prepare_payment_intent").delete()
+                time.sleep(opts["redirect_ms"] / 1000)
+
+                page_started = time.perf_counter()
+                resp = client.get(reverse("checkout_payment"))
+                done = time.perf_counter()
+                if resp.status_code != 200 or b'id="id_client_secret" value="pi_' not in resp.content:
+                    raise CommandError(f"Payment page answered {resp.status_code}")
+                total_ms.append((done - started) * 1000)
+                page_ms.append((done - page_started) * 1000)
+        finally:
+            stop.set()
+            if worker:
+                worker.join()
+        return total_ms, page_ms
+
+    def _work(self, stop):
+        # Minimal in-thread stand-in for `manage.py runworker`
+        while not stop.is_set():
+            job_ids = claim(1, "bench")
+            for job_id in job_ids:
+                run_job(job_id)
+            if not job_ids:
+                time.sleep(0.01)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+
+from checkout import stock
+from checkout.stock import OutOfStock
+from shop.models import SKU, Product
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark stock reservations under contention: --threads buyers hammer one SKU "
+        "with --stock units until it sells out. Runs checkout.stock.reserve (conditional "
+        "UPDATE) and, for comparison, a naive read-then-write; reports throughput, latency "
+        "and oversold units. Fails if the conditional reservation ever oversells. Writes to "
+        "the configured database; only runs with DEBUG=True or --force."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16, help="Concurrent buyers.")
+        parser.add_argument("--stock", type=int, default=200, help="Units on hand.")
+        parser.add_argument(
+            "--attempts", type=int, default=25, help="Reservation attempts per buyer."
+        )
+        parser.add_argument("--quantity", type=int, default=1, help="Units per reservation.")
+        parser.add_argument(
+            "--skip-naive", action="store_true", help="Only run the conditional UPDATE."
+        )
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark product.")
+        parser.add_argument("--force", action="store_true", help="Allow running with DEBUG=False.")
+
+    def handle(self, *args, **opts):
+        if not settings.DEBUG and not opts["force"]:
+            raise CommandError("Refusing to write benchmark data with DEBUG=False (use --force).")
+        for name in ("threads", "stock", "attempts", "quantity"):
+            if opts[name] <= 0:
+                raise CommandError(f"--{name} must be positive.")
+
+        product = Product.objects.create(name="Bench Stock Item", description="-", price=10)
+        sku = product.skus.get()
+        modes = {"conditional": self._reserve}
+        if not opts["skip_naive"]:
+            modes["read-modify-write"] = self._reserve_naive
+
+        results = {}
+        try:
+            for mode, reserve in modes.items():
+                SKU.objects.filter(id=sku.id).update(stock=opts["stock"], available=opts["stock"])
+                results[mode] = self._run(sku.id, reserve, opts)
+        finally:
+            if not opts["keep"]:
+                product.delete()
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Stock reservations under contention"))
+        self.stdout.write(
+            f"  {opts['threads']} threads x {opts['attempts']} attempts of "
+            f"{opts['quantity']} unit(s) on one SKU with {opts['stock']} units "
+            f"({connection.vendor})"
+        )
+        for mode, r in results.items():
+            self.stdout.write(
+                f"  {mode:<17}: {r['ok']} reserved, {r['sold_out']} sold out, "
+                f"{r['errors']} errors in {r['elapsed']:.2f}s "
+                f"({r['attempts'] / r['elapsed']:.0f} attempts/s), "
+                f"p50 {_percentile(r['latency'], 0.5):.1f} ms, "
+                f"p99 {_percentile(r['latency'], 0.99):.1f} ms, "
+                f"oversold {r['oversold']}, lost updates {r['drift']}"
+            )
+
+        conditional = results["conditional"]
+        expected = min(opts["threads"] * opts["attempts"], opts["stock"] // opts["quantity"])
+        if (
+            conditional["oversold"]
+            or conditional["drift"]
+            or conditional["ok"] + conditional["errors"] < expected
+        ):
+            raise CommandError(
+                f"Conditional reservation is inconsistent: {conditional['ok']} reserved, "
+                f"expected {expected}, oversold {conditional['oversold']}, "
+                f"lost updates {conditional['drift']}."
+            )
+        self.stdout.write(self.style.SUCCESS("Conditional reservations never oversold."))
+
+    def _run(self, sku_id, reserve, opts):
+        barrier = threading.Barrier(opts["threads"])
+        lock = threading.Lock()
+        totals = {"ok": 0, "sold_out": 0, "errors": 0, "latency": []}
+
+        def buyer():
+            ok = sold_out = errors = 0
+            latency = []
+            try:
+                barrier.wait()
+                for _ in range(opts["attempts"]):
+                    started = time.perf_counter()
+                    try:
+                        reserve(sku_id, opts["quantity"])
+                        ok += 1
+                    except OutOfStock:
+                        sold_out += 1
+                    except DatabaseError:
+                        errors += 1
+                    latency.append((time.perf_counter() - started) * 1000)
+            finally:
+                connection.close()
+                with lock:
+                    totals["ok"] += ok
+                    totals["sold_out"] += sold_out
+                    totals["errors"] += errors
+                    totals["latency"] += latency
+
+        threads = [threading.Thread(target=buyer) for _ in range(opts["threads"])]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        available = SKU.objects.values_list("available", flat=True).get(id=sku_id)
+        reserved = totals["ok"] * opts["quantity"]
+        return {
+            **totals,
+            "attempts": opts["threads"] * opts["attempts"],
+            "elapsed": elapsed,
+            # Units promised beyond what exists, and reservations the counter lost
+            "oversold": max(0, reserved - opts["stock"]),
+            "drift": reserved - (opts["stock"] - available),
+        }
+
+    @staticmethod
+    def _reserve(sku_id, quantity):
+        stock.reserve([(sku_id, quantity)])
+
+    @staticmethod
+    def _reserve_naive(sku_id, quantity):
+        # What stock.reserve avoids: check in Python, then write the computed value
+        available = SKU.objects.values_list("available", flat=True).get(id=sku_id)
+        if available < quantity:
+            raise OutOfStock([sku_id])
+        SKU.objects.filter(id=sku_id).update(available=available - quantity)
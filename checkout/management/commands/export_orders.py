@@ -0,0 +1,80 @@
+from __future__ import annotations
+import sys
+from datetime import date, datetime, time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from checkout.export import CHUNK_SIZE, EXPORT_FORMATS, stream_export
+from checkout.models import Order, OrderStatus
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r} (expected YYYY-MM-DD).")
+
+
+class Command(BaseCommand):
+    help = (
+        "Export order lines (orders joined with their items) placed between --from and --to "
+        "(inclusive, local dates) as CSV or JSON Lines. Amounts are euros with two decimals. "
+        "Streams in chunks, so memory use is constant regardless of the export size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", required=True, help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", required=True, help="YYYY-MM-DD")
+        parser.add_argument(
+            "--status",
+            action="append",
+            choices=OrderStatus.values,
+            help="Only orders with this status; repeat for several (default: paid).",
+        )
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument("--gzip", action="store_true", help="Compress the output.")
+        parser.add_argument(
+            "--output", "-o", default="-", help="File to write (default: stdout)."
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help=f"Rows fetched per database round-trip (default: {CHUNK_SIZE}).",
+        )
+
+    def handle(self, *args, **opts):
+        date_from = _parse_date(opts["date_from"])
+        date_to = _parse_date(opts["date_to"])
+        if date_to < date_from:
+            raise CommandError("--to must not be before --from.")
+        if opts["chunk_size"] <= 0:
+            raise CommandError("--chunk-size must be positive.")
+
+        start = timezone.make_aware(datetime.combine(date_from, dt_time.min))
+        end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), dt_time.min))
+        orders = Order.objects.filter(
+            created_at__gte=start,
+            created_at__lt=end,
+            status__in=opts["status"] or [OrderStatus.PAID],
+        )
+
+        chunks = stream_export(
+            orders, opts["format"], gzip=opts["gzip"], chunk_size=opts["chunk_size"]
+        )
+        written = 0
+        if opts["output"] == "-":
+            out = getattr(self.stdout, "buffer", None) or sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+            out.flush()
+        else:
+            with open(opts["output"], "wb") as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+                    written += len(chunk)
+            self.stderr.write(
+                self.style.SUCCESS(f"Wrote {written} bytes to {opts['output']}.")
+            )
@@ -0,0 +1,76 @@
+from __future__ import annotations
+import signal
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from checkout.webhooks import DEFAULT_MAX_ATTEMPTS, process_pending_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Process stored Stripe webhook events (checkout.StripeEvent).\n"
+        "Runs once until the queue is empty, or forever with --loop. Batches are claimed "
+        "with SELECT ... FOR UPDATE SKIP LOCKED, so several workers can run side by side."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=100, help="Events per batch (default: 100)."
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=DEFAULT_MAX_ATTEMPTS,
+            help=f"Mark an event failed after this many errors (default: {DEFAULT_MAX_ATTEMPTS}).",
+        )
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep polling for new events until stopped."
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when the queue is empty in --loop mode (default: 1).",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["batch_size"] <= 0:
+            raise CommandError("--batch-size must be positive.")
+
+        self._stopping = False
+        if opts["loop"]:
+            signal.signal(signal.SIGTERM, self._stop)
+            signal.signal(signal.SIGINT, self._stop)
+
+        started = time.monotonic()
+        processed = failed = 0
+
+        while not self._stopping:
+            claimed, ok, bad = process_pending_events(
+                batch_size=opts["batch_size"], max_attempts=opts["max_attempts"]
+            )
+            processed += ok
+            failed += bad
+            if claimed:
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"  batch: {ok} processed, {bad} failed, {claimed - ok - bad} to retry "
+                    f"(total {processed}, {processed / elapsed if elapsed else 0:.0f} events/s)"
+                )
+            if claimed < opts["batch_size"]:
+                if not opts["loop"]:
+                    break
+                time.sleep(opts["sleep"])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {processed} events ({failed} failed) in {elapsed:.2f}s "
+                f"({processed / elapsed if elapsed else 0:.0f} events/s)."
+            )
+        )
+
+    def _stop(self, signum, frame):
+        # Finish the current batch, then exit
+        self._stopping = True
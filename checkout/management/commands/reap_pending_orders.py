@@ -0,0 +1,157 @@
+from __future__ import annotations
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from checkout import transitions
+from checkout.models import Order, OrderStatus
+from checkout.payments import get_client
+
+
+class Command(BaseCommand):
+    help = (
+        "Reap abandoned pending (or failed) orders older than --older-than hours and "
+        "release their stock reservations.\n"
+        "Orders are processed in small id-ordered batches, each in its own short transaction, "
+        "so no long-lived locks are held. Default action marks them cancelled; use --delete "
+        "to remove them (and their items) instead. Safe to run as a scheduled job."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=float,
+            default=settings.CHECKOUT_PENDING_ORDER_MAX_AGE_HOURS,
+            help="Minimum age in hours of pending orders to reap "
+            "(default: CHECKOUT_PENDING_ORDER_MAX_AGE_HOURS).",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Orders per batch (default: 500)."
+        )
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Delete reaped orders instead of marking them cancelled.",
+        )
+        parser.add_argument(
+            "--cancel-intents",
+            action="store_true",
+            help="Cancel each order's Stripe PaymentIntent before reaping it.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.0,
+            help="Seconds to pause between batches to spread load (default: 0).",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report what would be reaped."
+        )
+
+    def handle(self, *args, **opts):
+        batch_size = opts["batch_size"]
+        if batch_size <= 0:
+            raise CommandError("--batch-size must be positive.")
+        if opts["older_than"] < 0:
+            raise CommandError("--older-than must not be negative.")
+
+        cutoff = timezone.now() - timedelta(hours=opts["older_than"])
+        action = "delete" if opts["delete"] else "cancel"
+        candidates = Order.objects.filter(
+            status__in=transitions.ALLOWED_SOURCES[OrderStatus.CANCELLED], created_at__lt=cutoff
+        )
+
+        if opts["dry_run"]:
+            count = candidates.count()
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Dry-run: {count} pending orders created before {cutoff:%Y-%m-%d %H:%M} "
+                    f"would be {'deleted' if opts['delete'] else 'cancelled'}."
+                )
+            )
+            return
+
+        payments = get_client() if opts["cancel_intents"] else None
+
+        self.stdout.write(
+            self.style.NOTICE(
+                f"Reaping pending orders created before {cutoff:%Y-%m-%d %H:%M} "
+                f"(action={action}, batch={batch_size})..."
+            )
+        )
+
+        started = time.monotonic()
+        last_id = 0
+        batches = 0
+        reaped = 0
+        skipped = 0
+
+        while True:
+            # Keyset scan on the primary key: each batch is an index range read
+            rows = list(
+                candidates.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "payment_intent_id")[:batch_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            batches += 1
+
+            ids = []
+            for order_id, pi_id in rows:
+                if payments is not None and pi_id and not self._cancel_intent(payments, pi_id):
+                    # Intent could not be cancelled (e.g. it actually succeeded): leave the
+                    # order pending so the webhook/confirm path or a human can resolve it.
+                    skipped += 1
+                    continue
+                ids.append(order_id)
+
+            # Short transaction per batch. The cancellation goes through the state
+            # machine, so a payment that lands between the scan and the write is
+            # never overwritten and only the orders actually reaped release stock.
+            with transaction.atomic():
+                won = transitions.mark_many_cancelled(ids)
+                if opts["delete"]:
+                    Order.objects.filter(id__in=won).delete()
+            count = len(won)
+            reaped += count
+
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"  batch {batches}: {count} orders (total {reaped}, "
+                f"{reaped / elapsed if elapsed else 0:.0f} orders/s)"
+            )
+
+            if opts["sleep"]:
+                time.sleep(opts["sleep"])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.MIGRATE_HEADING("Summary"))
+        self.stdout.write(f"  Orders reaped    : {reaped} ({action})")
+        self.stdout.write(f"  Skipped (Stripe) : {skipped}")
+        self.stdout.write(f"  Batches          : {batches}")
+        self.stdout.write(
+            f"  Elapsed          : {elapsed:.2f}s "
+            f"({reaped / elapsed if elapsed else 0:.0f} orders/s)"
+        )
+
+    def _cancel_intent(self, payments, pi_id: str) -> bool:
+        """Cancel a PaymentIntent; return True if the order may be reaped."""
+        try:
+            payments.cancel_payment_intent(pi_id, idempotency_key=f"reap-{pi_id}")
+            return True
+        except Exception as exc:
+            try:
+                intent = payments.retrieve_payment_intent(pi_id)
+                status = getattr(intent, "status", "")
+            except Exception:
+                status = ""
+            if status == "canceled":
+                return True
+            self.stderr.write(self.style.WARNING(f"  {pi_id}: not cancelled ({exc})"))
+            return False
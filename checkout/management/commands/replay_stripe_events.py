@@ -0,0 +1,128 @@
+from __future__ import annotations
+import hashlib
+import hmac
+import json
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from checkout.models import Order, OrderStatus, StripeEvent, StripeEventStatus
+from checkout.stripe_stub import stub
+from checkout.views import stripe_webhook
+from checkout.webhooks import process_pending_events
+
+
+def sign_payload(payload: bytes, secret: str) -> str:
+    """Build a Stripe-Signature header the way Stripe does (t=..., v1=HMAC-SHA256)."""
+    timestamp = int(time.time())
+    signed = f"{timestamp}.".encode("utf-8") + payload
+    digest = hmac.new(secret.encode("utf-8"), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark webhook handling: create N pending orders paid through the in-memory "
+        "Stripe stub, replay their payment_intent.succeeded events (plus duplicate "
+        "deliveries) through the webhook view, then drain them with the event processor. "
+        "Writes to the configured database; only runs with DEBUG=True or --force."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=10000, help="Events to replay.")
+        parser.add_argument(
+            "--duplicates",
+            type=float,
+            default=0.1,
+            help="Fraction of events delivered a second time (default: 0.1).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Processor batch size.")
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the generated orders and events."
+        )
+        parser.add_argument("--force", action="store_true", help="Allow running with DEBUG=False.")
+
+    def handle(self, *args, **opts):
+        if not settings.DEBUG and not opts["force"]:
+            raise CommandError("Refusing to write benchmark data with DEBUG=False (use --force).")
+        count = opts["count"]
+
+        with override_settings(STRIPE_USE_STUB=True):
+            stub.reset()
+            orders = Order.objects.bulk_create(
+                Order(email=f"replay{i}@example.com", subtotal=1000, total=1590)
+                for i in range(count)
+            )
+            events = []
+            for order in orders:
+                intent = stub.PaymentIntent.create(
+                    amount=order.total, metadata={"order_id": str(order.id)}
+                )
+                intent = stub.succeed(intent.id)
+                events.append(
+                    {
+                        "id": f"evt_replay_{intent.id}",
+                        "object": "event",
+                        "type": "payment_intent.succeeded",
+                        "data": {"object": dict(intent, metadata=dict(intent.metadata))},
+                    }
+                )
+            deliveries = events + random.sample(events, int(len(events) * opts["duplicates"]))
+            random.shuffle(deliveries)
+
+            # 1) Acknowledge: webhook view only verifies + stores
+            factory = RequestFactory()
+            url = reverse("checkout_webhook")
+            secret = settings.STRIPE_WEBHOOK_SECRET
+            started = time.perf_counter()
+            for event in deliveries:
+                body = json.dumps(event).encode("utf-8")
+                headers = {"HTTP_STRIPE_SIGNATURE": sign_payload(body, secret)} if secret else {}
+                response = stripe_webhook(
+                    factory.post(url, body, content_type="application/json", **headers)
+                )
+                if response.status_code != 200:
+                    raise CommandError(f"Webhook answered {response.status_code}")
+            ack_elapsed = time.perf_counter() - started
+
+            # 2) Process: drain the event table in batches
+            started = time.perf_counter()
+            processed = 0
+            while True:
+                claimed, ok, _ = process_pending_events(batch_size=opts["batch_size"])
+                processed += ok
+                if not claimed:
+                    break
+            process_elapsed = time.perf_counter() - started
+
+            event_ids = [e["id"] for e in events]
+            stored = StripeEvent.objects.filter(event_id__in=event_ids).count()
+            paid = Order.objects.filter(
+                id__in=[o.id for o in orders], status=OrderStatus.PAID
+            ).count()
+            leftover = StripeEvent.objects.filter(
+                event_id__in=event_ids, status=StripeEventStatus.PENDING
+            ).count()
+
+            self.stdout.write(self.style.MIGRATE_HEADING("Webhook replay"))
+            self.stdout.write(f"  Deliveries       : {len(deliveries)} ({len(events)} unique)")
+            self.stdout.write(f"  Events stored    : {stored}")
+            self.stdout.write(
+                f"  Acknowledge      : {ack_elapsed:.2f}s "
+                f"({len(deliveries) / ack_elapsed:.0f} deliveries/s, "
+                f"{ack_elapsed / len(deliveries) * 1000:.2f} ms each)"
+            )
+            self.stdout.write(
+                f"  Process          : {process_elapsed:.2f}s "
+                f"({processed / process_elapsed:.0f} events/s)"
+            )
+            self.stdout.write(f"  Orders paid      : {paid}/{count} (pending events: {leftover})")
+
+            if not opts["keep"]:
+                StripeEvent.objects.filter(event_id__in=event_ids).delete()
+                Order.objects.filter(id__in=[o.id for o in orders]).delete()
+                stub.reset()
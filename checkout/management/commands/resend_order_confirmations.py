@@ -0,0 +1,86 @@
+from __future__ import annotations
+from datetime import date, datetime, time as dt_time, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from checkout.emails import ORDER_CONFIRMATION_RENDERER
+from checkout.models import Order, OrderStatus
+from outbox.models import OutboxMessage
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r} (expected YYYY-MM-DD).")
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-queue order confirmation emails for paid orders placed between --from and --to "
+        "(inclusive, local dates). Only queues outbox messages; send_queued_mail delivers "
+        "and renders them. Use after a mail incident."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", required=True, help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", required=True, help="YYYY-MM-DD")
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Messages per INSERT (default: 500)."
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report how many would be queued."
+        )
+
+    def handle(self, *args, **opts):
+        date_from = _parse_date(opts["date_from"])
+        date_to = _parse_date(opts["date_to"])
+        if date_to < date_from:
+            raise CommandError("--to must not be before --from.")
+        if opts["batch_size"] <= 0:
+            raise CommandError("--batch-size must be positive.")
+
+        start = timezone.make_aware(datetime.combine(date_from, dt_time.min))
+        end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), dt_time.min))
+        orders = (
+            Order.objects.filter(status=OrderStatus.PAID, created_at__gte=start, created_at__lt=end)
+            .exclude(email="")
+            .order_by("id")
+            .values_list("id", "email")
+        )
+
+        if opts["dry_run"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Dry-run: {orders.count()} confirmations for {date_from}..{date_to} "
+                    "would be queued."
+                )
+            )
+            return
+
+        queued = 0
+        batch = []
+        for order_id, email in orders.iterator(chunk_size=opts["batch_size"]):
+            batch.append(
+                OutboxMessage(
+                    renderer=ORDER_CONFIRMATION_RENDERER,
+                    context={"order_id": order_id},
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[email],
+                )
+            )
+            if len(batch) >= opts["batch_size"]:
+                OutboxMessage.objects.bulk_create(batch)
+                queued += len(batch)
+                batch = []
+        if batch:
+            OutboxMessage.objects.bulk_create(batch)
+            queued += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Queued {queued} order confirmations for {date_from}..{date_to}."
+            )
+        )
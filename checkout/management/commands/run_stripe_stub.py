@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from checkout.stripe_stub import StubStripeServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local fake Stripe API server for offline development and load tests.\n"
+        "Point the app at it with STRIPE_API_BASE=http://127.0.0.1:<port> and any "
+        "STRIPE_SECRET_KEY (e.g. sk_test_stub). POST /v1/payment_intents/<id>/confirm "
+        "marks an intent as paid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1", help="Bind address.")
+        parser.add_argument("--port", type=int, default=12111, help="Port (default: 12111).")
+        parser.add_argument(
+            "--latency-ms",
+            type=float,
+            default=0.0,
+            help="Artificial delay added to every response, in milliseconds.",
+        )
+        parser.add_argument(
+            "--fail-rate",
+            type=float,
+            default=0.0,
+            help="Fraction (0..1) of requests answered with HTTP 500.",
+        )
+        parser.add_argument("--verbose-log", action="store_true", help="Log every request.")
+
+    def handle(self, *args, **opts):
+        server = StubStripeServer(
+            (opts["host"], opts["port"]),
+            latency=opts["latency_ms"] / 1000,
+            fail_rate=opts["fail_rate"],
+        )
+        server.verbose = opts["verbose_log"]
+        self.stdout.write(self.style.SUCCESS(f"Fake Stripe API listening on {server.url}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write("Fake Stripe API stopped.")
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 07:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checkout', '0003_alter_order_email_alter_order_shipping_method_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='payment_intent_amount',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='payment_intent_client_secret',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='payment_intent_status',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 07:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checkout', '0006_order_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='email_normalized',
+            field=models.EmailField(blank=True, db_index=True, default='', editable=False, max_length=254),
+        ),
+    ]
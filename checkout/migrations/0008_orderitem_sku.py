@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_skus(apps, schema_editor):
+    """Point existing order lines at the SKU of their product and size, where one exists."""
+    OrderItem = apps.get_model("checkout", "OrderItem")
+    SKU = apps.get_model("shop", "SKU")
+
+    skus = {(p, s): i for i, p, s in SKU.objects.values_list("id", "product_id", "size")}
+    batch = []
+    for item in OrderItem.objects.filter(product__isnull=False).only("id", "product_id", "size"):
+        size = "" if item.size.strip().upper() in ("", "NA") else item.size.strip()
+        item.sku_id = skus.get((item.product_id, size))
+        if item.sku_id:
+            batch.append(item)
+    OrderItem.objects.bulk_update(batch, ["sku"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checkout', '0007_order_email_normalized'),
+        ('shop', '0006_product_groups_skus'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='sku',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_items', to='shop.sku'),
+        ),
+        migrations.RunPython(link_skus, migrations.RunPython.noop),
+    ]
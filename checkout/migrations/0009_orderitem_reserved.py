@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:50
+
+from django.db import migrations, models
+
+
+def mark_reserved_lines(apps, schema_editor):
+    """Until now checkout reserved every line whose SKU had tracked stock."""
+    OrderItem = apps.get_model("checkout", "OrderItem")
+    OrderItem.objects.filter(sku__available__isnull=False).update(reserved=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checkout', '0008_orderitem_sku'),
+        ('shop', '0007_sku_stock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='reserved',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_reserved_lines, migrations.RunPython.noop),
+    ]
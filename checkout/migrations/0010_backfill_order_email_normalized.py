@@ -0,0 +1,40 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def backfill_email_normalized(apps, schema_editor):
+    """
+    Fill email_normalized for orders created before 0007 added it, walking the
+    table by id in batches. Same rule as checkout.models.normalize_email; rows
+    written by old code during a deploy can be caught up with
+    `manage.py backfill_order_emails`.
+    """
+    Order = apps.get_model("checkout", "Order")
+    last_id = 0
+    while True:
+        rows = list(
+            Order.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "email", "email_normalized")[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        stale = [
+            Order(id=pk, email_normalized=(email or "").strip().lower())
+            for pk, email, current in rows
+            if (email or "").strip().lower() != current
+        ]
+        Order.objects.bulk_update(stale, ["email_normalized"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("checkout", "0009_orderitem_reserved"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_email_normalized, migrations.RunPython.noop),
+    ]
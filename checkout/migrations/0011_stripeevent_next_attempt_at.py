@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checkout', '0010_backfill_order_email_normalized'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='stripeevent',
+            name='stripeevent_status_id_idx',
+        ),
+        migrations.AddField(
+            model_name='stripeevent',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='stripeevent',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='stripeevent_due_idx'),
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.db import models
 from django.utils import timezone
 from shop.models import Product
 
+from .crypto import decrypt_str, encrypt_str
+
 
 class ShippingMethod(models.TextChoices):
     # Storefront labels can stay Swedish; internal values are stable slugs.
@@ -18,6 +20,30 @@ class OrderStatus(models.TextChoices):
     CANCELLED = "cancelled", "Cancelled"
 
 
+def normalize_email(email) -> str:
+    """Canonical form used for email lookups: trimmed and lowercased."""
+    return (email or "").strip().lower()
+
+
+class OrderQuerySet(models.QuerySet):
+    def for_email(self, email):
+        """
+        Orders placed with `email`, compared case/whitespace-insensitively via the
+        indexed email_normalized column. Use this for every email-based order lookup.
+        """
+        normalized = normalize_email(email)
+        if not normalized:
+            return self.none()
+        return self.filter(email_normalized=normalized)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create skips save(); keep email_normalized in sync here too
+        objs = list(objs)
+        for obj in objs:
+            obj.email_normalized = normalize_email(obj.email)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class Order(models.Model):
     """
     Customer order created at step 1 (address/shipping) and paid at step 2 (Stripe).
@@ -37,6 +63,8 @@ class Order(models.Model):
     # Contact
     full_name = models.CharField(max_length=120, blank=True, default="")
     email = models.EmailField(blank=True, default="", db_index=True)
+    # normalize_email(email), maintained in save(); see OrderQuerySet.for_email
+    email_normalized = models.EmailField(blank=True, default="", db_index=True, editable=False)
     phone = models.CharField(max_length=40, blank=True, default="")
 
     # Shipping address
@@ -64,6 +92,11 @@ class Order(models.Model):
 
     # Stripe
     payment_intent_id = models.CharField(max_length=120, blank=True, default="")
+    # Cached from the PaymentIntent so payment page reloads need no Stripe round-trip.
+    # The client secret is encrypted at rest (see checkout/crypto.py).
+    payment_intent_client_secret = models.TextField(blank=True, default="", editable=False)
+    payment_intent_amount = models.IntegerField(default=0)  # euro cents the intent was made for
+    payment_intent_status = models.CharField(max_length=40, blank=True, default="")
     stripe_receipt_url = models.URLField(blank=True, default="")
 
     # Status & timestamps
@@ -76,8 +109,14 @@ class Order(models.Model):
     # Use default=timezone.now (NO auto_now_add) to avoid interactive prompts on existing rows
     created_at = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
 
+    objects = OrderQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Account order history: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+            models.Index(fields=["user", "-created_at", "-id"], name="order_user_created_idx"),
+        ]
 
     def order_number(self) -> str:
         return f"FP-{self.id:06d}"
@@ -85,6 +124,13 @@ class Order(models.Model):
     def __str__(self) -> str:
         return f"{self.order_number()} — {self.email}"
 
+    def save(self, *args, **kwargs):
+        self.email_normalized = normalize_email(self.email)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "email" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "email_normalized"}
+        super().save(*args, **kwargs)
+
     @property
     def display_number(self) -> str:
         return self.order_number()
@@ -93,6 +139,27 @@ class Order(models.Model):
     def is_paid(self) -> bool:
         return self.status == OrderStatus.PAID
 
+    # Stripe PaymentIntent cache
+
+    def get_client_secret(self) -> str:
+        return decrypt_str(self.payment_intent_client_secret)
+
+    def remember_payment_intent(self, intent) -> list[str]:
+        """
+        Copy id, client secret, amount and status from a PaymentIntent onto the
+        order. Returns the changed field names for save(update_fields=...).
+        """
+        self.payment_intent_id = intent.id
+        self.payment_intent_client_secret = encrypt_str(intent.client_secret or "")
+        self.payment_intent_amount = int(intent.amount or 0)
+        self.payment_intent_status = intent.status or ""
+        return [
+            "payment_intent_id",
+            "payment_intent_client_secret",
+            "payment_intent_amount",
+            "payment_intent_status",
+        ]
+
 
 class OrderItem(models.Model):
     """
@@ -108,6 +175,14 @@ class OrderItem(models.Model):
         Product, on_delete=models.SET_NULL, null=True, blank=True, related_name="order_items"
     )
 
+    # Exact color + size purchased; null for lines from before SKUs or deleted SKUs
+    sku = models.ForeignKey(
+        "shop.SKU", on_delete=models.SET_NULL, null=True, blank=True, related_name="order_items"
+    )
+    # Whether checkout reserved units of `sku` for this line (its stock was
+    # tracked then); only such lines are committed or released later
+    reserved = models.BooleanField(default=False, editable=False)
+
     # Frozen fields
     product_name = models.CharField(max_length=255, blank=True, default="")
     unit_price = models.IntegerField(default=0)  # euro cents
@@ -140,3 +215,41 @@ class OrderItem(models.Model):
                 if price_decimal is not None:
                     self.unit_price = int(round(float(price_decimal) * 100))
         super().save(*args, **kwargs)
+
+
+class StripeEventStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    PROCESSED = "processed", "Processed"
+    FAILED = "failed", "Failed"
+
+
+class StripeEvent(models.Model):
+    """
+    Verified Stripe webhook event, stored on receipt and processed later by
+    `manage.py process_stripe_events`. The unique event_id makes Stripe's
+    retried deliveries no-ops.
+    """
+
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField()
+
+    status = models.CharField(
+        max_length=20, choices=StripeEventStatus.choices, default=StripeEventStatus.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    # Failed events are retried with exponential backoff from this time on
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    received_at = models.DateTimeField(default=timezone.now, editable=False)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="stripeevent_due_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.event_type} ({self.event_id})"
@@ -0,0 +1,309 @@
+"""
+Stripe client layer for checkout.
+
+All Stripe API calls go through `get_client()`, which adds what the bare
+`stripe` module calls lacked:
+  - one shared requests.Session with a keep-alive connection pool
+  - explicit connect/read timeouts (a slow Stripe can't pin a gunicorn worker)
+  - retries with exponential backoff, reusing one idempotency key per logical call
+  - a circuit breaker that fails fast while Stripe keeps erroring
+  - per-call timing metrics (see fempowered.metrics)
+
+With STRIPE_USE_STUB=True the same client talks to the in-memory stub in
+checkout/stripe_stub.py; with STRIPE_API_BASE pointing at
+`manage.py run_stripe_stub` it talks HTTP to the local fake server.
+"""
+
+import logging
+import random
+import threading
+import time
+import uuid
+
+import requests
+import stripe
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from fempowered import metrics
+
+
+logger = logging.getLogger(__name__)
+
+# PaymentIntent states in which Stripe refuses further changes
+TERMINAL_INTENT_STATUSES = ("succeeded", "canceled")
+
+# Infrastructure failures worth retrying (and counted by the circuit breaker)
+RETRYABLE_ERRORS = (stripe.APIConnectionError, stripe.RateLimitError, stripe.APIError)
+
+
+class PaymentsUnavailable(Exception):
+    """Raised without calling Stripe while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Classic closed -> open -> half-open breaker.
+
+    After `failure_threshold` consecutive failures the breaker opens and calls
+    are rejected for `reset_timeout` seconds; then one trial call is let
+    through, and its outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+
+
+class _StripeBackend:
+    """Real Stripe API via stripe.StripeClient on a pooled requests.Session."""
+
+    def __init__(self, api_key, api_base, connect_timeout, read_timeout, pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        http_client = stripe.RequestsClient(
+            timeout=(connect_timeout, read_timeout), session=session
+        )
+        base_addresses = {"api": api_base} if api_base else {}
+        self._client = stripe.StripeClient(
+            api_key,
+            http_client=http_client,
+            base_addresses=base_addresses,
+            max_network_retries=0,  # retries are handled by PaymentsClient
+        )
+
+    def create_payment_intent(self, params, idempotency_key):
+        return self._client.payment_intents.create(
+            params=params, options={"idempotency_key": idempotency_key}
+        )
+
+    def retrieve_payment_intent(self, pi_id):
+        return self._client.payment_intents.retrieve(pi_id)
+
+    def update_payment_intent(self, pi_id, params, idempotency_key):
+        return self._client.payment_intents.update(
+            pi_id, params=params, options={"idempotency_key": idempotency_key}
+        )
+
+    def cancel_payment_intent(self, pi_id, idempotency_key):
+        return self._client.payment_intents.cancel(
+            pi_id, options={"idempotency_key": idempotency_key}
+        )
+
+    def retrieve_charge(self, charge_id):
+        return self._client.charges.retrieve(charge_id)
+
+
+class _StubBackend:
+    """In-memory stub from checkout/stripe_stub.py (no network)."""
+
+    def __init__(self, stub):
+        self._stub = stub
+
+    def create_payment_intent(self, params, idempotency_key):
+        return self._stub.PaymentIntent.create(idempotency_key=idempotency_key, **params)
+
+    def retrieve_payment_intent(self, pi_id):
+        return self._stub.PaymentIntent.retrieve(pi_id)
+
+    def update_payment_intent(self, pi_id, params, idempotency_key):
+        return self._stub.PaymentIntent.modify(pi_id, **params)
+
+    def cancel_payment_intent(self, pi_id, idempotency_key):
+        return self._stub.PaymentIntent.cancel(pi_id)
+
+    def retrieve_charge(self, charge_id):
+        return self._stub.Charge.retrieve(charge_id)
+
+
+class PaymentsClient:
+    """Instrumented, fault-tolerant facade over a Stripe backend."""
+
+    def __init__(self, backend, max_retries=2, backoff=0.25, breaker=None, sleep=time.sleep):
+        self.backend = backend
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+
+    # Public API
+
+    def create_payment_intent(self, *, idempotency_key=None, **params):
+        return self._call(
+            "payment_intent.create",
+            self.backend.create_payment_intent,
+            params,
+            idempotency_key=idempotency_key,
+            mutating=True,
+        )
+
+    def retrieve_payment_intent(self, pi_id):
+        return self._call("payment_intent.retrieve", self.backend.retrieve_payment_intent, pi_id)
+
+    def update_payment_intent(self, pi_id, *, idempotency_key=None, **params):
+        return self._call(
+            "payment_intent.update",
+            self.backend.update_payment_intent,
+            pi_id,
+            params,
+            idempotency_key=idempotency_key,
+            mutating=True,
+        )
+
+    def cancel_payment_intent(self, pi_id, *, idempotency_key=None):
+        return self._call(
+            "payment_intent.cancel",
+            self.backend.cancel_payment_intent,
+            pi_id,
+            idempotency_key=idempotency_key,
+            mutating=True,
+        )
+
+    def retrieve_charge(self, charge_id):
+        return self._call("charge.retrieve", self.backend.retrieve_charge, charge_id)
+
+    def receipt_url_for(self, intent) -> str:
+        """Receipt URL of the intent's latest charge, or "" (never raises)."""
+        if isinstance(intent, dict):
+            charge_id = intent.get("latest_charge")
+        else:
+            charge_id = getattr(intent, "latest_charge", None)
+        if not charge_id:
+            return ""
+        try:
+            charge = self.retrieve_charge(charge_id)
+        except Exception:
+            # Not critical; lack of receipt link shouldn't block order completion
+            logger.warning("Could not fetch receipt for charge %s", charge_id, exc_info=True)
+            return ""
+        return getattr(charge, "receipt_url", "") or ""
+
+    # Internals
+
+    def _call(self, op, fn, *args, idempotency_key=None, mutating=False):
+        """
+        Run one logical Stripe call. Mutating calls get an idempotency key (the
+        caller's or a fresh one) that is reused across retries, so Stripe applies
+        them at most once.
+        """
+        if mutating:
+            args = (*args, idempotency_key or f"fp-{uuid.uuid4()}")
+
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                metrics.incr(f"stripe.{op}.rejected")
+                raise PaymentsUnavailable(f"Stripe circuit open; {op} not attempted")
+
+            started = time.perf_counter()
+            try:
+                result = fn(*args)
+            except RETRYABLE_ERRORS as exc:
+                metrics.observe(f"stripe.{op}", time.perf_counter() - started)
+                metrics.incr(f"stripe.{op}.errors")
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff * (2**attempt) * (1 + random.random())
+                logger.warning(
+                    "Stripe %s failed (%s); retry %d in %.2fs", op, exc, attempt + 1, delay
+                )
+                metrics.incr(f"stripe.{op}.retries")
+                self._sleep(delay)
+                continue
+            except Exception:
+                # Client-side errors (invalid request, card errors) are not an outage
+                metrics.observe(f"stripe.{op}", time.perf_counter() - started)
+                metrics.incr(f"stripe.{op}.errors")
+                self.breaker.record_success()
+                raise
+
+            metrics.observe(f"stripe.{op}", time.perf_counter() - started)
+            self.breaker.record_success()
+            return result
+
+
+_client_lock = threading.Lock()
+_client_cache = {}
+
+
+def _client_config():
+    return (
+        bool(getattr(settings, "STRIPE_USE_STUB", False)),
+        settings.STRIPE_SECRET_KEY,
+        settings.STRIPE_API_BASE,
+        settings.STRIPE_CONNECT_TIMEOUT,
+        settings.STRIPE_READ_TIMEOUT,
+        settings.STRIPE_MAX_RETRIES,
+        settings.STRIPE_BREAKER_THRESHOLD,
+        settings.STRIPE_BREAKER_RESET_SECONDS,
+        settings.STRIPE_HTTP_POOL_SIZE,
+    )
+
+
+def get_client() -> PaymentsClient:
+    """Return the shared PaymentsClient for the current settings (one per process)."""
+    config = _client_config()
+    with _client_lock:
+        client = _client_cache.get(config)
+        if client is None:
+            use_stub, api_key, api_base, connect, read, retries, threshold, reset, pool = config
+            if use_stub:
+                from .stripe_stub import stub
+
+                backend = _StubBackend(stub)
+            else:
+                backend = _StripeBackend(api_key, api_base, connect, read, pool)
+            client = PaymentsClient(
+                backend,
+                max_retries=retries,
+                breaker=CircuitBreaker(failure_threshold=threshold, reset_timeout=reset),
+            )
+            _client_cache.clear()
+            _client_cache[config] = client
+        return client
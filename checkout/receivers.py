@@ -0,0 +1,10 @@
+from django.dispatch import receiver
+
+from .emails import queue_order_confirmation
+from .signals import order_paid
+
+
+@receiver(order_paid, dispatch_uid="checkout.order_confirmation_email")
+def send_order_confirmation(sender, order, **kwargs):
+    # Only queues (one INSERT); rendering and SMTP happen in send_queued_mail
+    queue_order_confirmation(order)
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent once per order, after the transaction that moved it to PAID commits.
+# Receivers get `order` (fresh instance). Only the winning transition sends it,
+# so receivers (emails, stats, indexing...) never run twice for one payment.
+order_paid = Signal()
@@ -0,0 +1,93 @@
+"""
+Stock reservations for checkout.
+
+An order reserves its lines' SKUs when it is created, paying commits the
+reservation and cancelling it (reaper, Stripe cancellation) releases it:
+
+    reserve: available = available - q   WHERE available >= q
+    commit:  stock     = stock - q
+    release: available = available + q
+
+Every change is a single conditional UPDATE on the SKU row, never a read then
+write, so concurrent buyers of the last units cannot oversell: the database
+serialises the updates and the WHERE clause fails for whoever comes too late.
+Untracked SKUs (available IS NULL) are never limited. reserve() returns the
+SKUs it did reserve and checkout records that on each line (OrderItem.reserved),
+so commit and release settle exactly the units that were taken, even if a
+SKU's tracking is switched on or off while the order is open.
+
+Commit and release run only for the caller that won the order's status
+transition (see checkout.transitions), so each reservation is settled once.
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from shop.models import SKU
+
+from .models import OrderItem
+
+
+class OutOfStock(Exception):
+    """Some lines could not be reserved; `sku_ids` are the SKUs that ran out."""
+
+    def __init__(self, sku_ids):
+        self.sku_ids = sorted(sku_ids)
+        super().__init__(f"Not enough stock for SKUs {self.sku_ids}")
+
+
+def reserve(lines) -> set:
+    """
+    Reserve (sku_id, quantity) pairs, all or nothing, and return the ids of the
+    SKUs reserved (the tracked ones). Raises OutOfStock, undoing any reservation
+    this call made, if a tracked SKU has too few units left.
+    """
+    wanted = Counter()
+    for sku_id, quantity in lines:
+        if sku_id is not None and quantity > 0:
+            wanted[sku_id] += quantity
+    if not wanted:
+        return set()
+
+    tracked = set(
+        SKU.objects.filter(id__in=wanted, available__isnull=False).values_list("id", flat=True)
+    )
+    missing = set()
+    with transaction.atomic():
+        # Fixed order, so two orders sharing SKUs lock the rows in the same sequence
+        for sku_id in sorted(tracked):
+            quantity = wanted[sku_id]
+            if not SKU.objects.filter(id=sku_id, available__gte=quantity).update(
+                available=F("available") - quantity
+            ):
+                missing.add(sku_id)
+        if missing:
+            raise OutOfStock(missing)  # rolls back the lines already reserved
+    return tracked
+
+
+def commit(order_ids) -> None:
+    """Paid orders: the reserved units leave the warehouse."""
+    for sku_id, quantity in _reserved(order_ids):
+        SKU.objects.filter(id=sku_id, stock__isnull=False).update(stock=F("stock") - quantity)
+
+
+def release(order_ids) -> None:
+    """Cancelled orders: their reserved units become available again."""
+    for sku_id, quantity in _reserved(order_ids):
+        SKU.objects.filter(id=sku_id, available__isnull=False).update(
+            available=F("available") + quantity
+        )
+
+
+def _reserved(order_ids):
+    """(sku_id, total quantity) over the orders' reserved lines, in SKU id order."""
+    return (
+        OrderItem.objects.filter(order_id__in=order_ids, reserved=True, sku__isnull=False)
+        .values("sku")
+        .annotate(quantity=Sum("quantity"))
+        .order_by("sku")
+        .values_list("sku", "quantity")
+    )
@@ -0,0 +1,272 @@
+"""
+Local stand-in for the parts of the Stripe API that checkout uses.
+
+- `stub`: an in-memory, thread-safe Stripe account. With STRIPE_USE_STUB=True
+  checkout.payments calls it directly (tests, local development).
+- `StubStripeServer`: serves the same state over HTTP in Stripe's wire format,
+  so the real `stripe` library (and the whole checkout) can be load-tested
+  offline: run `manage.py run_stripe_stub` and set STRIPE_API_BASE to its URL.
+"""
+
+import itertools
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+import stripe
+
+from .payments import TERMINAL_INTENT_STATUSES
+
+
+class StubObject(dict):
+    """Dict with attribute access, like stripe.StripeObject."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+class _PaymentIntentAPI:
+    def __init__(self, stub):
+        self._stub = stub
+
+    def create(self, amount, currency="eur", metadata=None, idempotency_key=None, **kwargs):
+        with self._stub.lock:
+            # Like Stripe: replaying an idempotency key returns the original intent
+            if idempotency_key and idempotency_key in self._stub.idempotency:
+                pi_id = self._stub.idempotency[idempotency_key]
+                self._stub.calls.append(("PaymentIntent.create", pi_id))
+                return StubObject(self._stub.intents[pi_id])
+            pi_id = f"pi_stub_{next(self._stub.counter):06d}"
+            intent = StubObject(
+                id=pi_id,
+                object="payment_intent",
+                amount=int(amount),
+                currency=currency,
+                status="requires_payment_method",
+                client_secret=f"{pi_id}_secret_{secrets.token_hex(8)}",
+                metadata=StubObject(metadata or {}),
+                latest_charge=None,
+                receipt_email=kwargs.get("receipt_email", ""),
+            )
+            self._stub.intents[pi_id] = intent
+            if idempotency_key:
+                self._stub.idempotency[idempotency_key] = pi_id
+            self._stub.calls.append(("PaymentIntent.create", pi_id))
+            return StubObject(intent)
+
+    def retrieve(self, pi_id, **kwargs):
+        with self._stub.lock:
+            self._stub.calls.append(("PaymentIntent.retrieve", pi_id))
+            return StubObject(self._stub.get_intent(pi_id))
+
+    def modify(self, pi_id, **kwargs):
+        with self._stub.lock:
+            intent = self._stub.get_intent(pi_id)
+            if intent["status"] in TERMINAL_INTENT_STATUSES:
+                raise stripe.InvalidRequestError(
+                    f"PaymentIntent {pi_id} has status {intent['status']}", "intent"
+                )
+            if "amount" in kwargs:
+                intent["amount"] = int(kwargs["amount"])
+            if "metadata" in kwargs:
+                intent["metadata"].update(kwargs["metadata"] or {})
+            self._stub.calls.append(("PaymentIntent.modify", pi_id))
+            return StubObject(intent)
+
+    def cancel(self, pi_id, **kwargs):
+        with self._stub.lock:
+            intent = self._stub.get_intent(pi_id)
+            if intent["status"] in TERMINAL_INTENT_STATUSES:
+                raise stripe.InvalidRequestError(
+                    f"PaymentIntent {pi_id} has status {intent['status']}", "intent"
+                )
+            intent["status"] = "canceled"
+            self._stub.calls.append(("PaymentIntent.cancel", pi_id))
+            return StubObject(intent)
+
+
+class _ChargeAPI:
+    def __init__(self, stub):
+        self._stub = stub
+
+    def retrieve(self, charge_id, **kwargs):
+        with self._stub.lock:
+            self._stub.calls.append(("Charge.retrieve", charge_id))
+            try:
+                return StubObject(self._stub.charges[charge_id])
+            except KeyError:
+                raise stripe.InvalidRequestError(
+                    f"No such charge: '{charge_id}'", "id", http_status=404
+                ) from None
+
+
+class StripeStub:
+    """Thread-safe in-memory Stripe account."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.PaymentIntent = _PaymentIntentAPI(self)
+        self.Charge = _ChargeAPI(self)
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counter = itertools.count(1)
+            self.intents = {}
+            self.charges = {}
+            self.idempotency = {}
+            self.calls = []
+
+    def get_intent(self, pi_id):
+        try:
+            return self.intents[pi_id]
+        except KeyError:
+            raise stripe.InvalidRequestError(
+                f"No such payment_intent: '{pi_id}'", "intent", http_status=404
+            ) from None
+
+    def succeed(self, pi_id):
+        """Simulate a successful card payment for the given PaymentIntent."""
+        with self.lock:
+            intent = self.get_intent(pi_id)
+            charge_id = f"ch_stub_{pi_id.rsplit('_', 1)[-1]}"
+            self.charges[charge_id] = StubObject(
+                id=charge_id,
+                object="charge",
+                amount=intent["amount"],
+                payment_intent=pi_id,
+                receipt_url=f"https://pay.stripe.test/receipts/{charge_id}",
+            )
+            intent["status"] = "succeeded"
+            intent["latest_charge"] = charge_id
+            return StubObject(intent)
+
+
+stub = StripeStub()
+
+
+# HTTP fake server
+
+
+def _parse_form(body: str) -> dict:
+    """Decode Stripe's form encoding, including one level of `key[sub]=value` nesting."""
+    data = {}
+    for key, value in parse_qsl(body, keep_blank_values=True):
+        match = re.fullmatch(r"(\w+)\[(\w+)\]", key)
+        if match:
+            data.setdefault(match.group(1), {})[match.group(2)] = value
+        else:
+            data[key] = value
+    return data
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like api.stripe.com
+
+    routes = [
+        ("POST", r"/v1/payment_intents", "create_intent"),
+        ("GET", r"/v1/payment_intents/(?P<pi>[\w]+)", "retrieve_intent"),
+        ("POST", r"/v1/payment_intents/(?P<pi>[\w]+)", "update_intent"),
+        ("POST", r"/v1/payment_intents/(?P<pi>[\w]+)/cancel", "cancel_intent"),
+        ("POST", r"/v1/payment_intents/(?P<pi>[\w]+)/confirm", "confirm_intent"),
+        ("GET", r"/v1/charges/(?P<ch>[\w]+)", "retrieve_charge"),
+    ]
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _dispatch(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        path = self.path.split("?", 1)[0]
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.fail_rate and random.random() < self.server.fail_rate:
+            return self._send(500, {"error": {"type": "api_error", "message": "Injected failure"}})
+
+        for verb, pattern, handler in self.routes:
+            match = re.fullmatch(pattern, path)
+            if verb == method and match:
+                try:
+                    result = getattr(self, handler)(_parse_form(body), **match.groupdict())
+                except stripe.InvalidRequestError as exc:
+                    status = exc.http_status or 400
+                    payload = {"error": {"type": "invalid_request_error", "message": str(exc)}}
+                    return self._send(status, payload)
+                return self._send(200, result)
+        return self._send(404, {"error": {"type": "invalid_request_error", "message": "Not found"}})
+
+    def _send(self, status, payload):
+        raw = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.send_header("Request-Id", f"req_stub_{secrets.token_hex(6)}")
+        self.end_headers()
+        self.wfile.write(raw)
+
+    # Handlers
+
+    def create_intent(self, form):
+        form.pop("automatic_payment_methods", None)
+        return self.server.stub.PaymentIntent.create(
+            idempotency_key=self.headers.get("Idempotency-Key"), **form
+        )
+
+    def retrieve_intent(self, form, pi):
+        return self.server.stub.PaymentIntent.retrieve(pi)
+
+    def update_intent(self, form, pi):
+        return self.server.stub.PaymentIntent.modify(pi, **form)
+
+    def cancel_intent(self, form, pi):
+        return self.server.stub.PaymentIntent.cancel(pi)
+
+    def confirm_intent(self, form, pi):
+        # Test helper: any confirmation succeeds, like Stripe's pm_card_visa
+        return self.server.stub.succeed(pi)
+
+    def retrieve_charge(self, form, ch):
+        return self.server.stub.Charge.retrieve(ch)
+
+
+class StubStripeServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server speaking enough of Stripe's REST API for checkout.
+    `latency` (seconds) and `fail_rate` (0..1) inject delay and 500 errors.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), stub_account=None, latency=0.0, fail_rate=0.0):
+        super().__init__(address, _StubRequestHandler)
+        self.stub = stub_account or stub
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.verbose = False
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start_in_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,120 @@
+"""
+Background jobs for checkout (run by `manage.py runworker`, see jobs/queue.py).
+"""
+
+import logging
+import time
+
+import stripe
+from django.conf import settings
+
+from jobs.models import Job, JobStatus
+
+from .models import Order, OrderStatus
+from .payments import TERMINAL_INTENT_STATUSES, get_client
+
+logger = logging.getLogger(__name__)
+
+PREPARE_TASK = "checkout.tasks.prepare_payment_intent"
+
+
+def describe_order_for_metadata(order: Order) -> str:
+    return ", ".join(
+        f"{name}x{qty}" for name, qty in order.items.values_list("product_name", "quantity")
+    )[:200]
+
+
+def sync_payment_intent(order: Order, cart_description: str = ""):
+    """
+    Return a usable PaymentIntent for the order: create one if missing or no longer
+    usable (canceled), and update its amount if the order total changed.
+
+    Calls carry idempotency keys derived from the order and amount, so the
+    background job and the payment page racing on one order end up with the
+    same intent instead of two.
+    """
+    client = get_client()
+    intent = None
+    replaces = ""
+    if order.payment_intent_id:
+        intent = client.retrieve_payment_intent(order.payment_intent_id)
+        if intent.status == "canceled":
+            replaces = f"-after-{intent.id}"
+            intent = None
+        elif intent.status != "succeeded" and intent.amount != order.total:
+            intent = client.update_payment_intent(
+                intent.id,
+                amount=order.total,
+                idempotency_key=f"order-{order.id}-{intent.id}-amount-{order.total}",
+            )
+
+    if intent is None:
+        params = dict(
+            amount=order.total,  # euro cents
+            currency="eur",
+            receipt_email=order.email,
+            metadata={
+                "order_id": str(order.id),
+                "email": order.email,
+                "cart": cart_description or describe_order_for_metadata(order),
+            },
+            automatic_payment_methods={"enabled": True},
+            idempotency_key=f"order-{order.id}-{order.total}{replaces}",
+        )
+        for attempt in range(3):
+            try:
+                intent = client.create_payment_intent(**params)
+                break
+            except stripe.IdempotencyError:
+                # Same key still in flight (job vs. page): wait, then get the replayed result
+                if attempt == 2:
+                    raise
+                time.sleep(0.25)
+    return intent
+
+
+def intent_is_ready(order: Order) -> bool:
+    """True if the payment page can be served from the intent cached on the order."""
+    return bool(
+        order.payment_intent_client_secret
+        and order.payment_intent_id
+        and order.payment_intent_amount == order.total
+        and order.payment_intent_status not in TERMINAL_INTENT_STATUSES
+    )
+
+
+def wait_for_prepared_intent(order: Order) -> bool:
+    """
+    If a worker is creating this order's intent right now, wait for it (up to
+    CHECKOUT_INTENT_WAIT_SECONDS) rather than racing it. Refreshes `order` after
+    waiting; returns True once the intent is ready.
+    """
+    running = Job.objects.filter(
+        task=PREPARE_TASK, status=JobStatus.RUNNING, kwargs__order_id=order.id
+    )
+    if not running.exists():
+        return False
+    deadline = time.monotonic() + settings.CHECKOUT_INTENT_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        if not running.exists():
+            break
+    order.refresh_from_db()
+    return intent_is_ready(order)
+
+
+def prepare_payment_intent(order_id: int) -> None:
+    """
+    Job queued by address_view: create the PaymentIntent while the customer is
+    being redirected, so payment_view usually finds it ready.
+    """
+    order = Order.objects.filter(id=order_id, status=OrderStatus.PENDING).first()
+    if order is None or intent_is_ready(order):
+        return
+    intent = sync_payment_intent(order)
+    fields = order.remember_payment_intent(intent)
+    # Conditional: never touch an order that got paid/cancelled meanwhile
+    Order.objects.filter(id=order.id, status=OrderStatus.PENDING).update(
+        **{name: getattr(order, name) for name in fields}
+    )
+    logger.debug("Order %s: PaymentIntent %s prepared in background", order.id, intent.id)
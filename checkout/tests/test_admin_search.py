@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from checkout.admin import EstimatedCountPaginator, parse_order_number
+from checkout.models import Order, OrderItem
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    }
+)
+class OrderAdminSearchTests(TestCase):
+    """
+    Order numbers search by exact id, email addresses by the normalized email
+    column, and the changelists never run an unbounded COUNT(*).
+    """
+
+    def setUp(self):
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin)
+        self.anna = Order.objects.create(email="Anna@Example.com", full_name="Anna A", total=990)
+        self.bob = Order.objects.create(email="bob@example.com", full_name="Bob B", total=1990)
+
+    def _search(self, name, term):
+        resp = self.client.get(reverse(f"admin:checkout_{name}_changelist"), {"q": term})
+        self.assertEqual(resp.status_code, 200)
+        return list(resp.context["cl"].result_list)
+
+    def test_parse_order_number(self):
+        self.assertEqual(parse_order_number("FP-000123"), 123)
+        self.assertEqual(parse_order_number(" fp123 "), 123)
+        self.assertEqual(parse_order_number("#42"), 42)
+        self.assertIsNone(parse_order_number("anna"))
+        self.assertIsNone(parse_order_number("FP-12a"))
+
+    def test_order_number_is_exact_id_match(self):
+        self.assertEqual(self._search("order", self.bob.order_number()), [self.bob])
+
+    def test_email_uses_normalized_column(self):
+        with CaptureQueriesContext(connection) as ctx:
+            result = self._search("order", " ANNA@example.com")
+
+        self.assertEqual(result, [self.anna])
+        sql = " ".join(q["sql"] for q in ctx.captured_queries if "checkout_order" in q["sql"])
+        self.assertIn("email_normalized", sql)
+        self.assertNotIn("LIKE", sql)
+
+    def test_other_terms_fall_back_to_substring_search(self):
+        self.assertEqual(self._search("order", "bob b"), [self.bob])
+
+    def test_order_item_search_by_order_number(self):
+        item = OrderItem.objects.create(order=self.anna, product_name="Tee", unit_price=990)
+        OrderItem.objects.create(order=self.bob, product_name="Tee", unit_price=990)
+
+        self.assertEqual(self._search("orderitem", self.anna.order_number()), [item])
+        self.assertEqual(len(self._search("orderitem", "tee")), 2)
+
+    def test_changelist_skips_full_result_count(self):
+        resp = self.client.get(reverse("admin:checkout_order_changelist"), {"status": "pending"})
+
+        self.assertIsNone(resp.context["cl"].full_result_count)
+        self.assertEqual(resp.context["cl"].result_count, 2)
+
+    def test_partial_email_falls_back_to_substring_search(self):
+        self.assertEqual(self._search("order", "@example.com"), [self.bob, self.anna])
+        self.assertEqual(self._search("order", "bob@"), [self.bob])
+
+    def test_paginator_counts_exactly_without_an_estimate(self):
+        Order.objects.bulk_create(Order(email=f"user{i}@example.com") for i in range(3))
+        paginator = EstimatedCountPaginator(Order.objects.order_by("id"), 1)
+        paginator.EXACT_BELOW = 1
+
+        self.assertEqual(paginator.count, 5)  # SQLite has no planner estimate
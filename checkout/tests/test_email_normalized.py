@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from checkout.models import Order, OrderItem
+from shop.models import Product, Review
+
+
+class EmailNormalizedTests(TestCase):
+    """
+    Orders store a trimmed, lowercased copy of the email; every email-based lookup
+    goes through Order.objects.for_email, which filters on that indexed column.
+    """
+
+    def test_save_keeps_normalized_email_in_sync(self):
+        order = Order.objects.create(email="  Anna@Example.COM ", total=1590)
+        self.assertEqual(order.email_normalized, "anna@example.com")
+
+        order.email = "Other@Example.com"
+        order.save(update_fields=["email"])
+
+        order.refresh_from_db()
+        self.assertEqual(order.email_normalized, "other@example.com")
+
+    def test_for_email_matches_case_and_whitespace(self):
+        order = Order.objects.create(email="Anna@Example.com", total=1590)
+        Order.objects.create(email="someone@example.com", total=990)
+
+        self.assertEqual(list(Order.objects.for_email(" ANNA@example.com")), [order])
+        self.assertFalse(Order.objects.for_email("").exists())
+
+    def test_backfill_fills_missing_rows_in_batches(self):
+        orders = [Order.objects.create(email=f"User{i}@Example.com", total=990) for i in range(5)]
+        Order.objects.update(email_normalized="")  # rows from before the column existed
+
+        out = StringIO()
+        call_command("backfill_order_emails", "--batch-size", "2", stdout=out)
+
+        self.assertIn("updated 5", out.getvalue())
+        for i, order in enumerate(orders):
+            order.refresh_from_db()
+            self.assertEqual(order.email_normalized, f"user{i}@example.com")
+
+        out = StringIO()
+        call_command("backfill_order_emails", stdout=out)
+        self.assertIn("updated 0", out.getvalue())
+
+    def test_backfill_dry_run_writes_nothing(self):
+        Order.objects.create(email="Anna@Example.com", total=1590)
+        Order.objects.update(email_normalized="")
+
+        out = StringIO()
+        call_command("backfill_order_emails", "--dry-run", stdout=out)
+
+        self.assertIn("would update 1", out.getvalue())
+        self.assertEqual(Order.objects.get().email_normalized, "")
+
+    def test_purchase_check_matches_guest_order_by_email(self):
+        user = get_user_model().objects.create_user("anna", "anna@example.com", "pw-123456!")
+        product = Product.objects.create(name="Tee", description="-", price="25.00")
+        order = Order.objects.create(email="ANNA@example.com ", total=2500, status="paid")
+        OrderItem.objects.create(order=order, product=product, product_name="Tee", unit_price=2500)
+
+        self.assertTrue(product.user_has_purchased(user))
+
+        Order.objects.filter(id=order.id).update(status="pending")
+        self.assertFalse(product.user_has_purchased(user))
+
+    @override_settings(
+        STORAGES={
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        }
+    )
+    def test_review_badge_matches_guest_order_by_normalized_email(self):
+        user = get_user_model().objects.create_user("anna", "Anna@Example.com", "pw-123456!")
+        product = Product.objects.create(name="Tee", description="-", price="25.00")
+        order = Order.objects.create(email=" anna@EXAMPLE.com", total=2500, status="paid")
+        OrderItem.objects.create(order=order, product=product, product_name="Tee", unit_price=2500)
+        Review.objects.create(product=product, user=user, rating=5)
+
+        resp = self.client.get(reverse("product_detail", args=[product.pk]))
+
+        self.assertTrue(resp.context["reviews"][0].is_verified)
@@ -0,0 +1,102 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from checkout.export import HEADER, format_cents, stream_export
+from checkout.models import Order, OrderItem
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    }
+)
+class OrderExportTests(TestCase):
+    """Order lines stream out as CSV/JSONL (optionally gzipped) from admin and command."""
+
+    def setUp(self):
+        self.paid = Order.objects.create(
+            email="anna@example.com", status="paid", subtotal=5980, shipping_cost=499, total=6479
+        )
+        OrderItem.objects.create(order=self.paid, product_name="Tee", unit_price=2990, quantity=2)
+        OrderItem.objects.create(order=self.paid, product_name='Cap, "blue"', unit_price=1005)
+        self.pending = Order.objects.create(email="bob@example.com", total=990)
+        OrderItem.objects.create(order=self.pending, product_name="Socks", unit_price=990)
+
+    def _csv(self, data: bytes):
+        return list(csv.DictReader(io.StringIO(data.decode("utf-8"))))
+
+    def test_format_cents(self):
+        self.assertEqual(format_cents(6479), "64.79")
+        self.assertEqual(format_cents(5), "0.05")
+        self.assertEqual(format_cents(-150), "-1.50")
+        self.assertEqual(format_cents(None), "0.00")
+
+    def test_csv_has_one_row_per_line_with_euro_amounts(self):
+        data = b"".join(stream_export(Order.objects.filter(status="paid"), chunk_size=1))
+        rows = self._csv(data)
+
+        self.assertEqual(list(rows[0].keys()), HEADER)
+        self.assertEqual([r["product_name"] for r in rows], ["Tee", 'Cap, "blue"'])
+        self.assertEqual(rows[0]["order_number"], self.paid.order_number())
+        self.assertEqual(rows[0]["unit_price"], "29.90")
+        self.assertEqual(rows[0]["line_total"], "59.80")
+        self.assertEqual(rows[0]["order_total"], "64.79")
+
+    def test_jsonl_gzip(self):
+        data = b"".join(stream_export(Order.objects.all(), "jsonl", gzip=True))
+        lines = gzip.decompress(data).decode("utf-8").splitlines()
+
+        self.assertEqual([json.loads(line)["product_name"] for line in lines][-1], "Socks")
+        self.assertEqual(len(lines), 3)
+
+    def test_admin_action_streams_selected_orders(self):
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin)
+
+        resp = self.client.post(
+            reverse("admin:checkout_order_changelist"),
+            {"action": "export_csv_gzip", "_selected_action": [self.paid.id]},
+        )
+
+        self.assertTrue(resp.streaming)
+        self.assertIn(".csv.gz", resp["Content-Disposition"])
+        rows = self._csv(gzip.decompress(b"".join(resp.streaming_content)))
+        self.assertEqual({r["email"] for r in rows}, {"anna@example.com"})
+
+    def test_command_filters_by_date_and_status(self):
+        old = Order.objects.create(email="old@example.com", status="paid", total=990)
+        OrderItem.objects.create(order=old, product_name="Old", unit_price=990)
+        Order.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=40))
+        today = timezone.localdate().isoformat()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "orders.csv")
+            call_command(
+                "export_orders", "--from", today, "--to", today, "-o", path, stderr=io.StringIO()
+            )
+            with open(path, "rb") as fh:
+                rows = self._csv(fh.read())
+
+        self.assertEqual([r["product_name"] for r in rows], ["Tee", 'Cap, "blue"'])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "orders.csv")
+            call_command(
+                "export_orders", "--from", today, "--to", today, "--status", "pending",
+                "--status", "paid", "-o", path, stderr=io.StringIO(),
+            )
+            with open(path, "rb") as fh:
+                self.assertEqual(len(self._csv(fh.read())), 3)
@@ -0,0 +1,95 @@
+from datetime import datetime
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from checkout import transitions
+from checkout.emails import ORDER_CONFIRMATION_RENDERER, render_order_confirmation
+from checkout.models import Order, OrderItem, OrderStatus
+from outbox.mail import send_pending
+from outbox.models import OutboxMessage
+
+
+@override_settings(
+    STRIPE_USE_STUB=True,
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class OrderConfirmationEmailTests(TestCase):
+    """Paying an order queues a confirmation; the outbox worker renders and sends it."""
+
+    def setUp(self):
+        self.order = Order.objects.create(
+            full_name="Anna Svensson",
+            email="anna@example.com",
+            address1="Storgatan 1",
+            postal_code="111 22",
+            city="Stockholm",
+            subtotal=1000,
+            shipping_cost=590,
+            total=1590,
+        )
+        OrderItem.objects.create(
+            order=self.order, product_name="Sports Bra", unit_price=1000, quantity=1, size="M"
+        )
+
+    def test_paid_order_queues_unrendered_confirmation(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            transitions.mark_paid(self.order.id)
+            transitions.mark_paid(self.order.id)  # losing duplicate sends nothing
+
+        queued = OutboxMessage.objects.get()
+        self.assertEqual(queued.renderer, ORDER_CONFIRMATION_RENDERER)
+        self.assertEqual(queued.context, {"order_id": self.order.id})
+        self.assertEqual(queued.body, "")
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(send_pending(), (1, 1, 0))
+
+        sent = mail.outbox[0]
+        self.assertEqual(sent.to, ["anna@example.com"])
+        self.assertIn(self.order.order_number(), sent.subject)
+        self.assertIn("Sports Bra (M) x 1: €10,00", sent.body)
+        self.assertIn("Storgatan 1", sent.body)
+        html, mimetype = sent.alternatives[0]
+        self.assertEqual(mimetype, "text/html")
+        self.assertIn("€15,90", html)
+
+    def test_plain_text_parts_are_not_html_escaped(self):
+        Order.objects.filter(id=self.order.id).update(full_name="Zoë O'Brien & Co")
+        OrderItem.objects.filter(order=self.order).update(product_name="Tank & Tights")
+
+        subject, text, html = render_order_confirmation(self.order.id)
+
+        self.assertIn("Hi Zoë O'Brien & Co,", text)
+        self.assertIn("- Tank & Tights (M)", text)
+        self.assertNotIn("&amp;", subject + text)
+        self.assertIn("O&#x27;Brien &amp; Co", html)
+
+    def test_resend_for_date_range(self):
+        def paid_order(day):
+            return Order.objects.create(
+                email=f"day{day}@example.com",
+                status=OrderStatus.PAID,
+                created_at=timezone.make_aware(datetime(2025, 3, day, 12)),
+            )
+
+        in_range = [paid_order(1), paid_order(2)]
+        paid_order(5)
+        Order.objects.filter(id=self.order.id).update(
+            created_at=timezone.make_aware(datetime(2025, 3, 1, 9))
+        )  # pending: skipped
+
+        out = StringIO()
+        call_command(
+            "resend_order_confirmations", "--from", "2025-03-01", "--to", "2025-03-02", stdout=out
+        )
+
+        self.assertIn("Queued 2", out.getvalue())
+        self.assertEqual(
+            sorted(m.context["order_id"] for m in OutboxMessage.objects.all()),
+            [o.id for o in in_range],
+        )
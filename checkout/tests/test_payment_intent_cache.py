@@ -0,0 +1,81 @@
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from fempowered import metrics
+from checkout.models import Order
+from checkout.stripe_stub import stub
+
+
+@override_settings(
+    STRIPE_USE_STUB=True,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class PaymentIntentCacheTests(TestCase):
+    """
+    The payment page creates the PaymentIntent once and serves reloads from the
+    encrypted client secret stored on the order, without calling Stripe.
+    """
+
+    def setUp(self):
+        stub.reset()
+        metrics.reset()
+        self.order = Order.objects.create(email="anna@example.com", subtotal=4000, total=4590)
+        session = self.client.session
+        session["checkout_order_id"] = self.order.id
+        session.save()
+
+    def _get_payment(self):
+        resp = self.client.get(reverse("checkout_payment"))
+        self.assertEqual(resp.status_code, 200)
+        return resp
+
+    def _stripe_calls(self):
+        return [name for name, _ in stub.calls]
+
+    def test_reload_does_not_call_stripe(self):
+        first = self._get_payment()
+        second = self._get_payment()
+
+        self.assertEqual(self._stripe_calls(), ["PaymentIntent.create"])
+        self.assertEqual(first.context["client_secret"], second.context["client_secret"])
+        self.assertEqual(metrics.get("stripe.payment_intent.retrieve_avoided"), 1)
+
+    def test_client_secret_is_encrypted_at_rest(self):
+        resp = self._get_payment()
+        self.order.refresh_from_db()
+
+        secret = resp.context["client_secret"]
+        self.assertNotIn(secret, self.order.payment_intent_client_secret)
+        self.assertEqual(self.order.get_client_secret(), secret)
+        self.assertEqual(self.order.payment_intent_amount, 4590)
+
+    def test_amount_change_updates_the_intent(self):
+        self._get_payment()
+        Order.objects.filter(id=self.order.id).update(total=5000)
+
+        self._get_payment()
+
+        self.order.refresh_from_db()
+        self.assertEqual(
+            self._stripe_calls(),
+            ["PaymentIntent.create", "PaymentIntent.retrieve", "PaymentIntent.modify"],
+        )
+        self.assertEqual(stub.intents[self.order.payment_intent_id]["amount"], 5000)
+        self.assertEqual(self.order.payment_intent_amount, 5000)
+
+    def test_terminal_intent_is_replaced(self):
+        self._get_payment()
+        self.order.refresh_from_db()
+        old_pi = self.order.payment_intent_id
+        stub.PaymentIntent.cancel(old_pi)
+        Order.objects.filter(id=self.order.id).update(payment_intent_status="canceled")
+
+        self._get_payment()
+
+        self.order.refresh_from_db()
+        self.assertNotEqual(self.order.payment_intent_id, old_pi)
+        self.assertEqual(self.order.payment_intent_status, "requires_payment_method")
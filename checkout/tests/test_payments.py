@@ -0,0 +1,136 @@
+import requests
+import stripe
+from django.test import SimpleTestCase
+
+from fempowered import metrics
+from checkout.payments import (
+    CircuitBreaker,
+    PaymentsClient,
+    PaymentsUnavailable,
+    _StripeBackend,
+)
+from checkout.stripe_stub import StripeStub, StubStripeServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FlakyBackend:
+    """Backend whose create_payment_intent fails `failures` times before succeeding."""
+
+    def __init__(self, failures, error=stripe.APIConnectionError("network down")):
+        self.failures = failures
+        self.error = error
+        self.keys = []
+
+    def create_payment_intent(self, params, idempotency_key):
+        self.keys.append(idempotency_key)
+        if len(self.keys) <= self.failures:
+            raise self.error
+        return {"id": "pi_1", "amount": params["amount"]}
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_after_threshold_and_half_opens_after_timeout(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+        clock.now = 10
+        self.assertTrue(breaker.allow())  # single trial call
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_trial_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+        breaker.record_failure()
+        clock.now = 5
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+
+class PaymentsClientTests(SimpleTestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def test_retries_reuse_one_idempotency_key(self):
+        backend = FlakyBackend(failures=2)
+        client = PaymentsClient(backend, max_retries=2, sleep=lambda s: None)
+
+        intent = client.create_payment_intent(amount=1000, currency="eur")
+
+        self.assertEqual(intent["id"], "pi_1")
+        self.assertEqual(len(backend.keys), 3)
+        self.assertEqual(len(set(backend.keys)), 1)
+        self.assertEqual(metrics.get("stripe.payment_intent.create.retries"), 2)
+        self.assertEqual(metrics.timings()["stripe.payment_intent.create"]["count"], 3)
+
+    def test_client_errors_are_not_retried(self):
+        backend = FlakyBackend(failures=1, error=stripe.InvalidRequestError("bad", "amount"))
+        client = PaymentsClient(backend, max_retries=2, sleep=lambda s: None)
+
+        with self.assertRaises(stripe.InvalidRequestError):
+            client.create_payment_intent(amount=1000, currency="eur")
+        self.assertEqual(len(backend.keys), 1)
+
+    def test_open_breaker_fails_fast(self):
+        backend = FlakyBackend(failures=10)
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        client = PaymentsClient(backend, max_retries=1, breaker=breaker, sleep=lambda s: None)
+
+        with self.assertRaises(stripe.APIConnectionError):
+            client.create_payment_intent(amount=1000, currency="eur")
+        with self.assertRaises(PaymentsUnavailable):
+            client.create_payment_intent(amount=1000, currency="eur")
+        self.assertEqual(len(backend.keys), 2)
+
+
+class StubStripeServerTests(SimpleTestCase):
+    """The real stripe library works end-to-end against the local fake server."""
+
+    def setUp(self):
+        self.account = StripeStub()
+        self.server = StubStripeServer(stub_account=self.account)
+        self.server.start_in_thread()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        backend = _StripeBackend("sk_test_stub", self.server.url, 1, 5, pool_size=2)
+        self.client = PaymentsClient(backend, sleep=lambda s: None)
+
+    def test_payment_intent_round_trip(self):
+        intent = self.client.create_payment_intent(
+            amount=4590,
+            currency="eur",
+            metadata={"order_id": "7"},
+            automatic_payment_methods={"enabled": True},
+            idempotency_key="order-7",
+        )
+        again = self.client.create_payment_intent(
+            amount=4590, currency="eur", idempotency_key="order-7"
+        )
+        self.assertEqual(intent.id, again.id)
+        self.assertEqual(intent.metadata["order_id"], "7")
+        self.assertTrue(intent.client_secret.startswith(intent.id))
+
+        requests.post(f"{self.server.url}/v1/payment_intents/{intent.id}/confirm", timeout=5)
+
+        paid = self.client.retrieve_payment_intent(intent.id)
+        self.assertEqual(paid.status, "succeeded")
+        self.assertIn("/receipts/", self.client.receipt_url_for(paid))
+
+    def test_unknown_intent_raises_invalid_request(self):
+        with self.assertRaises(stripe.InvalidRequestError):
+            self.client.retrieve_payment_intent("pi_missing")
@@ -0,0 +1,91 @@
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from fempowered import metrics
+from checkout.models import Order
+from checkout.stripe_stub import stub
+from checkout.tasks import prepare_payment_intent, sync_payment_intent
+from jobs.models import Job
+from jobs.queue import run_job
+
+
+@override_settings(
+    STRIPE_USE_STUB=True,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class PreparePaymentIntentTests(TestCase):
+    """
+    Submitting the address form queues a job that creates the PaymentIntent, so the
+    payment page finds it ready; without the job it falls back to creating it inline.
+    """
+
+    ADDRESS = {
+        "full_name": "Anna Andersson",
+        "email": "anna@example.com",
+        "phone": "",
+        "address1": "Test Street 1",
+        "postal_code": "12345",
+        "city": "Stockholm",
+        "country": "SE",
+        "shipping_method": "standard",
+        "billing_same_as_shipping": True,
+    }
+
+    def setUp(self):
+        stub.reset()
+        metrics.reset()
+        session = self.client.session
+        session["cart"] = {"7": {"name": "Sports Bra", "qty": 1, "price_cent": 4000, "size": "M"}}
+        session.save()
+
+    def _submit_address(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(reverse("checkout_address"), self.ADDRESS)
+        self.assertRedirects(resp, reverse("checkout_payment"), fetch_redirect_response=False)
+        return Order.objects.get()
+
+    def _stripe_calls(self):
+        return [name for name, _ in stub.calls]
+
+    def test_address_submit_queues_job_and_payment_page_uses_it(self):
+        order = self._submit_address()
+        job = Job.objects.get()
+        self.assertEqual(job.task, "checkout.tasks.prepare_payment_intent")
+        self.assertEqual(job.kwargs, {"order_id": order.id})
+
+        run_job(job.id)
+        resp = self.client.get(reverse("checkout_payment"))
+
+        order.refresh_from_db()
+        self.assertTrue(resp.context["client_secret"].startswith(order.payment_intent_id))
+        self.assertEqual(self._stripe_calls(), ["PaymentIntent.create"])
+        self.assertEqual(metrics.get("stripe.payment_intent.sync_fallback"), 0)
+
+    def test_payment_page_falls_back_when_job_has_not_run(self):
+        self._submit_address()
+
+        self.client.get(reverse("checkout_payment"))
+        run_job(Job.objects.get().id)  # late job finds the intent ready
+
+        self.assertEqual(self._stripe_calls(), ["PaymentIntent.create"])
+        self.assertEqual(metrics.get("stripe.payment_intent.sync_fallback"), 1)
+
+    def test_racing_creates_share_one_intent(self):
+        order = Order.objects.create(email="anna@example.com", total=4590)
+
+        first = sync_payment_intent(order)
+        second = sync_payment_intent(order)  # e.g. page and job before either saved
+
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(len(stub.intents), 1)
+
+    def test_job_skips_orders_that_are_no_longer_pending(self):
+        order = Order.objects.create(email="anna@example.com", total=4590, status="paid")
+
+        prepare_payment_intent(order.id)
+
+        self.assertEqual(self._stripe_calls(), [])
@@ -0,0 +1,76 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from checkout.models import Order, OrderItem, OrderStatus
+from checkout.stripe_stub import stub
+
+
+@override_settings(STRIPE_USE_STUB=True, CHECKOUT_PENDING_ORDER_MAX_AGE_HOURS=48)
+class ReapPendingOrdersTests(TestCase):
+    """
+    The reaper only touches pending orders older than the cutoff, works in
+    batches, and never reaps an order whose PaymentIntent actually succeeded.
+    """
+
+    def setUp(self):
+        stub.reset()
+        old = timezone.now() - timedelta(days=3)
+        self.old_pending = [
+            Order.objects.create(email=f"old{i}@example.com", created_at=old) for i in range(5)
+        ]
+        self.fresh_pending = Order.objects.create(email="fresh@example.com")
+        self.old_paid = Order.objects.create(
+            email="paid@example.com", created_at=old, status=OrderStatus.PAID
+        )
+
+    def _run(self, *args):
+        out = StringIO()
+        call_command("reap_pending_orders", *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_marks_old_pending_orders_cancelled_in_batches(self):
+        output = self._run("--batch-size", "2")
+
+        for order in self.old_pending:
+            order.refresh_from_db()
+            self.assertEqual(order.status, OrderStatus.CANCELLED)
+        self.fresh_pending.refresh_from_db()
+        self.old_paid.refresh_from_db()
+        self.assertEqual(self.fresh_pending.status, OrderStatus.PENDING)
+        self.assertEqual(self.old_paid.status, OrderStatus.PAID)
+        self.assertIn("batch 3: 1 orders", output)
+        self.assertIn("orders/s", output)
+
+    def test_delete_removes_orders_and_items(self):
+        OrderItem.objects.create(order=self.old_pending[0], product_name="Hoodie", unit_price=100)
+
+        self._run("--delete")
+
+        self.assertEqual(Order.objects.filter(status=OrderStatus.PENDING).count(), 1)
+        self.assertFalse(OrderItem.objects.exists())
+
+    def test_dry_run_changes_nothing(self):
+        output = self._run("--dry-run")
+
+        self.assertIn("5 pending orders", output)
+        self.assertEqual(Order.objects.filter(status=OrderStatus.PENDING).count(), 6)
+
+    def test_cancel_intents_skips_orders_that_were_paid_at_stripe(self):
+        cancelled, succeeded = self.old_pending[:2]
+        for order in (cancelled, succeeded):
+            order.payment_intent_id = stub.PaymentIntent.create(amount=1000).id
+            order.save(update_fields=["payment_intent_id"])
+        stub.succeed(succeeded.payment_intent_id)
+
+        self._run("--cancel-intents")
+
+        cancelled.refresh_from_db()
+        succeeded.refresh_from_db()
+        self.assertEqual(cancelled.status, OrderStatus.CANCELLED)
+        self.assertEqual(stub.intents[cancelled.payment_intent_id]["status"], "canceled")
+        self.assertEqual(succeeded.status, OrderStatus.PENDING)
@@ -0,0 +1,235 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from checkout import stock, transitions
+from checkout.models import Order, OrderItem, OrderStatus
+from checkout.stock import OutOfStock
+from checkout.stripe_stub import stub
+from checkout.webhooks import handle_event
+from shop.models import SKU, Product
+
+ADDRESS = {
+    "full_name": "Anna Andersson",
+    "email": "anna@example.com",
+    "address1": "Test Street 1",
+    "postal_code": "12345",
+    "city": "Stockholm",
+    "country": "SE",
+    "shipping_method": "standard",
+    "billing_same_as_shipping": True,
+}
+
+
+def _sku(units, name="Mat"):
+    product = Product.objects.create(name=name, description="-", price=30)
+    sku = product.skus.get()
+    sku.stock = units
+    sku.save()
+    return sku
+
+
+def _levels(sku):
+    sku.refresh_from_db()
+    return sku.stock, sku.available
+
+
+@override_settings(
+    STRIPE_USE_STUB=True,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class StockReservationTests(TestCase):
+    """
+    Orders reserve SKU units when created; paying commits the reservation and
+    cancelling (reaper, Stripe) releases it, exactly once.
+    """
+
+    def setUp(self):
+        stub.reset()
+        self.mat = _sku(3)
+        self.band = _sku(1, name="Band")
+
+    def _order(self, *lines, **fields):
+        order = Order.objects.create(email="anna@example.com", **fields)
+        reserved = stock.reserve((sku.id, qty) for sku, qty in lines)
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order,
+                product=sku.product,
+                sku=sku,
+                quantity=qty,
+                reserved=sku.id in reserved,
+            )
+            for sku, qty in lines
+        )
+        return order
+
+    def test_reserve_is_all_or_nothing(self):
+        stock.reserve([(self.mat.id, 2)])
+
+        with self.assertRaises(OutOfStock) as ctx:
+            stock.reserve([(self.mat.id, 1), (self.band.id, 2)])
+
+        self.assertEqual(ctx.exception.sku_ids, [self.band.id])
+        self.assertEqual(_levels(self.mat), (3, 1))
+        self.assertEqual(_levels(self.band), (1, 1))
+
+    def test_untracked_skus_are_not_limited(self):
+        untracked = Product.objects.create(name="Cap", description="-", price=5).skus.get()
+
+        order = self._order((untracked, 1000))
+
+        self.assertEqual(_levels(untracked), (None, None))
+        self.assertFalse(order.items.get().reserved)
+        # Tracking switched on while the order is open: nothing was taken, so
+        # cancelling must not hand units back
+        untracked.stock = 5
+        untracked.save()
+        self.assertTrue(transitions.mark_cancelled(order.id))
+        self.assertEqual(_levels(untracked), (5, 5))
+
+    def test_editing_stock_shifts_available(self):
+        stock.reserve([(self.mat.id, 2)])
+        sku = SKU.objects.get(id=self.mat.id)
+
+        sku.stock = 10
+        sku.save()
+
+        self.assertEqual(_levels(self.mat), (10, 8))
+
+    def test_paying_commits_and_cancelling_releases_once(self):
+        paid = self._order((self.mat, 2))
+        cancelled = self._order((self.mat, 1), (self.band, 1))
+        self.assertEqual(_levels(self.mat), (3, 0))
+
+        self.assertTrue(transitions.mark_paid(paid.id))
+        self.assertTrue(transitions.mark_cancelled(cancelled.id))
+        self.assertFalse(transitions.mark_cancelled(cancelled.id))
+        self.assertFalse(transitions.mark_cancelled(paid.id))
+
+        self.assertEqual(_levels(self.mat), (1, 1))
+        self.assertEqual(_levels(self.band), (1, 1))
+
+    def test_batch_cancel_releases_only_the_winners(self):
+        pending = self._order((self.mat, 2))
+        paid = self._order((self.band, 1))
+        transitions.mark_paid(paid.id)
+
+        won = transitions.mark_many_cancelled([pending.id, paid.id])
+
+        self.assertEqual(won, [pending.id])
+        self.assertEqual(transitions.mark_many_cancelled([pending.id]), [])
+        self.assertEqual(_levels(self.mat), (3, 3))
+        self.assertEqual(_levels(self.band), (0, 0))
+
+    def test_reaper_and_cancelled_intent_release_stock(self):
+        old = timezone.now() - timedelta(days=3)
+        reaped = self._order((self.mat, 2), created_at=old, status=OrderStatus.FAILED)
+        expired = self._order((self.band, 1))
+
+        call_command("reap_pending_orders", stdout=StringIO())
+        handle_event(
+            "payment_intent.canceled",
+            {"data": {"object": {"metadata": {"order_id": str(expired.id)}}}},
+        )
+
+        reaped.refresh_from_db()
+        expired.refresh_from_db()
+        self.assertEqual((reaped.status, expired.status), (OrderStatus.CANCELLED,) * 2)
+        self.assertEqual(_levels(self.mat), (3, 3))
+        self.assertEqual(_levels(self.band), (1, 1))
+
+    def test_checkout_reserves_or_sends_back_to_cart(self):
+        session = self.client.session
+        session["cart"] = {
+            str(self.band.product_id): {"name": "Band", "qty": 2, "price_cent": 100, "size": "NA"}
+        }
+        session.save()
+
+        resp = self.client.post(reverse("checkout_address"), ADDRESS)
+
+        self.assertRedirects(resp, reverse("cart_detail"), fetch_redirect_response=False)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(_levels(self.band), (1, 1))
+
+        session = self.client.session
+        session["cart"][str(self.band.product_id)]["qty"] = 1
+        session.save()
+        resp = self.client.post(reverse("checkout_address"), ADDRESS)
+
+        self.assertRedirects(resp, reverse("checkout_payment"), fetch_redirect_response=False)
+        self.assertEqual(OrderItem.objects.get().sku_id, self.band.id)
+        self.assertEqual(_levels(self.band), (1, 0))
+        detail = self.client.get(reverse("product_detail", args=[self.band.product_id]))
+        self.assertContains(detail, "Sold out")
+
+
+    def test_sizes_a_product_does_not_come_in_are_refused(self):
+        resp = self.client.post(
+            reverse("add_to_cart", args=[self.mat.product_id]), {"size": "XXL"}
+        )
+
+        self.assertRedirects(
+            resp,
+            reverse("product_detail", args=[self.mat.product_id]),
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(self.client.session.get("cart", {}), {})
+
+        # A stale or forged cart line is stopped at checkout, before any order exists
+        session = self.client.session
+        session["cart"] = {
+            f"{self.mat.product_id}:XXL": {
+                "product_id": self.mat.product_id,
+                "name": "Mat",
+                "qty": 1,
+                "price_cent": 3000,
+                "size": "XXL",
+            }
+        }
+        session.save()
+
+        resp = self.client.post(reverse("checkout_address"), ADDRESS)
+
+        self.assertRedirects(resp, reverse("cart_detail"), fetch_redirect_response=False)
+        self.assertFalse(Order.objects.exists())
+
+
+class ConcurrentReservationTests(TransactionTestCase):
+    """Many buyers racing for the last units: exactly the units in stock are reserved."""
+
+    THREADS = 8
+
+    def test_no_oversell_under_contention(self):
+        sku = _sku(5)
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+
+        def buyer():
+            try:
+                barrier.wait()
+                stock.reserve([(sku.id, 1)])
+                results.append(True)
+            except OutOfStock:
+                results.append(False)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buyer) for _ in range(self.THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(sorted(results), [False] * 3 + [True] * 5)
+        self.assertEqual(_levels(sku), (5, 0))
@@ -0,0 +1,124 @@
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from checkout.management.commands.replay_stripe_events import sign_payload
+from checkout.models import Order, OrderStatus, StripeEvent, StripeEventStatus
+from checkout.stripe_stub import stub
+from checkout.webhooks import process_pending_events
+
+
+@override_settings(STRIPE_USE_STUB=True, STRIPE_WEBHOOK_SECRET="")
+class StripeWebhookTests(TestCase):
+    """
+    The webhook only stores verified events (de-duplicated by event id);
+    the processor applies them to orders later.
+    """
+
+    def setUp(self):
+        stub.reset()
+        self.order = Order.objects.create(email="anna@example.com", total=1590)
+        intent = stub.PaymentIntent.create(amount=1590, metadata={"order_id": str(self.order.id)})
+        self.intent = stub.succeed(intent.id)
+
+    def _event(self, event_type="payment_intent.succeeded", event_id="evt_1"):
+        return {
+            "id": event_id,
+            "object": "event",
+            "type": event_type,
+            "data": {"object": dict(self.intent, metadata=dict(self.intent.metadata))},
+        }
+
+    def _post(self, event, **headers):
+        return self.client.post(
+            reverse("checkout_webhook"),
+            data=json.dumps(event),
+            content_type="application/json",
+            **headers,
+        )
+
+    def test_webhook_stores_event_without_processing(self):
+        resp = self._post(self._event())
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(StripeEvent.objects.get().status, StripeEventStatus.PENDING)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, OrderStatus.PENDING)
+        self.assertEqual(stub.calls[-1][0], "PaymentIntent.create")  # no Stripe call in request
+
+    def test_duplicate_deliveries_are_recorded_once(self):
+        for _ in range(3):
+            self.assertEqual(self._post(self._event()).status_code, 200)
+
+        self.assertEqual(StripeEvent.objects.count(), 1)
+
+    def test_processing_marks_order_paid(self):
+        self._post(self._event())
+        retrieve_charge = stub.Charge.retrieve
+        statuses = []
+
+        def retrieve_after_batch(*args, **kwargs):
+            statuses.append(StripeEvent.objects.get().status)
+            return retrieve_charge(*args, **kwargs)
+
+        with patch.object(stub.Charge, "retrieve", retrieve_after_batch):
+            with self.captureOnCommitCallbacks(execute=True):
+                claimed, processed, failed = process_pending_events()
+
+        self.assertEqual((claimed, processed, failed), (1, 1, 0))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, OrderStatus.PAID)
+        self.assertIn("/receipts/", self.order.stripe_receipt_url)
+        self.assertEqual(StripeEvent.objects.get().status, StripeEventStatus.PROCESSED)
+        # The receipt is fetched once the batch has committed, not under its locks
+        self.assertEqual(statuses, [StripeEventStatus.PROCESSED])
+
+    def test_payment_failed_event_marks_order_failed(self):
+        self._post(self._event("payment_intent.payment_failed"))
+
+        out = StringIO()
+        call_command("process_stripe_events", stdout=out)
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, OrderStatus.FAILED)
+        self.assertIn("Processed 1 events", out.getvalue())
+
+    def test_failing_event_backs_off_then_fails(self):
+        self._post(self._event())
+        event = StripeEvent.objects.get()
+
+        with patch("checkout.webhooks.handle_event", side_effect=RuntimeError("boom")):
+            self.assertEqual(process_pending_events(max_attempts=2), (1, 0, 0))
+            # Not due again until its backoff has passed
+            self.assertEqual(process_pending_events(max_attempts=2), (0, 0, 0))
+            event.refresh_from_db()
+            self.assertEqual(event.attempts, 1)
+            self.assertGreater(event.next_attempt_at, event.received_at)
+
+            StripeEvent.objects.update(next_attempt_at=event.received_at)
+            self.assertEqual(process_pending_events(max_attempts=2), (1, 0, 1))
+
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), (StripeEventStatus.FAILED, 2))
+        self.assertIn("boom", event.last_error)
+
+    @override_settings(STRIPE_WEBHOOK_SECRET="whsec_test")
+    def test_signature_is_verified(self):
+        body = json.dumps(self._event()).encode("utf-8")
+
+        bad = self._post(self._event(), HTTP_STRIPE_SIGNATURE="t=1,v1=deadbeef")
+        good = self.client.post(
+            reverse("checkout_webhook"),
+            data=body,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=sign_payload(body, "whsec_test"),
+        )
+
+        self.assertEqual(bad.status_code, 400)
+        self.assertEqual(good.status_code, 200)
+        self.assertEqual(StripeEvent.objects.count(), 1)
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from checkout.models import Order, OrderItem, OrderStatus
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    }
+)
+class SuccessReceiptTests(TestCase):
+    """
+    The success page never writes the order, serves the receipt from a cached
+    fragment and answers conditional GETs with 304.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.order = Order.objects.create(
+            email="anna@example.com", subtotal=1000, shipping_cost=590, total=1590
+        )
+        OrderItem.objects.create(
+            order=self.order, product_name="Sports Bra", unit_price=1000, quantity=1, size="M"
+        )
+        self.url = reverse("checkout_success", args=[self.order.order_number()])
+        self._own(self.order)
+
+    def _own(self, order):
+        """Mark `order` as placed in this client's session, as confirm_view does."""
+        session = self.client.session
+        session["checkout_success_order_id"] = order.id
+        session.save()
+
+    def test_get_does_not_claim_or_mark_paid(self):
+        user = get_user_model().objects.create_user("anna", "anna@example.com", "pw-123456!")
+        self.client.force_login(user)
+
+        resp = self.client.get(self.url)
+
+        self.assertEqual(resp.status_code, 200)
+        self.order.refresh_from_db()
+        self.assertIsNone(self.order.user)
+        self.assertEqual(self.order.status, OrderStatus.PENDING)
+
+    def test_receipt_fragment_is_cached(self):
+        first = self.client.get(self.url)
+        self.assertContains(first, "Sports Bra")
+
+        with self.assertNumQueries(2):  # order + session, no items query
+            again = self.client.get(self.url)
+        self.assertContains(again, "Sports Bra")
+
+    def test_conditional_get_returns_304(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        with self.assertNumQueries(2):  # order + session
+            resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(resp.status_code, 304)
+
+    def test_etag_changes_when_order_is_paid(self):
+        etag = self.client.get(self.url)["ETag"]
+        Order.objects.filter(id=self.order.id).update(
+            status=OrderStatus.PAID, stripe_receipt_url="https://pay.stripe.test/receipts/1"
+        )
+
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+        self.assertContains(resp, "View Stripe receipt")
+
+    def test_stranger_gets_no_receipt(self):
+        self.client.logout()
+        self.assertNotContains(self.client.get(self.url), "Sports Bra")
+
+        stranger = get_user_model().objects.create_user("eve", "eve@example.com", "pw-123456!")
+        self.client.force_login(stranger)
+        resp = self.client.get(self.url)
+
+        self.assertContains(resp, self.order.order_number())
+        self.assertNotContains(resp, "Sports Bra")
+
+    def test_account_owner_gets_receipt(self):
+        user = get_user_model().objects.create_user("anna", "anna@example.com", "pw-123456!")
+        Order.objects.filter(id=self.order.id).update(user=user)
+        self.client.logout()
+        self.client.force_login(user)
+
+        self.assertContains(self.client.get(self.url), "Sports Bra")
+
+    def test_owners_etag_is_not_reused_for_a_stranger(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.logout()
+
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotContains(resp, "Sports Bra")
@@ -0,0 +1,87 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import override_settings
+
+from checkout import transitions
+from checkout.models import Order, OrderStatus
+from checkout.signals import order_paid
+from checkout.stripe_stub import stub
+
+
+@override_settings(STRIPE_USE_STUB=True)
+class OrderTransitionTests(TestCase):
+    """Status changes are conditional updates that only succeed from allowed sources."""
+
+    def setUp(self):
+        stub.reset()
+        self.order = Order.objects.create(email="anna@example.com", total=1590)
+
+    def test_paid_order_cannot_be_failed_or_cancelled(self):
+        self.assertTrue(transitions.mark_paid(self.order.id))
+
+        self.assertFalse(transitions.mark_failed(self.order.id))
+        self.assertFalse(transitions.transition(self.order.id, OrderStatus.CANCELLED))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, OrderStatus.PAID)
+
+    def test_failed_order_can_still_be_paid(self):
+        self.assertTrue(transitions.mark_failed(self.order.id))
+        self.assertTrue(transitions.mark_paid(self.order.id))
+
+    def test_mark_paid_keeps_existing_owner(self):
+        User = get_user_model()
+        owner = User.objects.create_user("owner", "owner@example.com", "pw-123456!")
+        other = User.objects.create_user("other", "other@example.com", "pw-123456!")
+        Order.objects.filter(id=self.order.id).update(user=owner)
+
+        transitions.mark_paid(self.order.id, user=other)
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.user, owner)
+
+
+@override_settings(STRIPE_USE_STUB=True)
+class ConcurrentMarkPaidTests(TransactionTestCase):
+    """Confirm view and webhook worker racing on one order: exactly one wins."""
+
+    THREADS = 8
+
+    def setUp(self):
+        stub.reset()
+        self.order = Order.objects.create(email="anna@example.com", total=1590)
+        intent = stub.PaymentIntent.create(amount=1590, metadata={"order_id": str(self.order.id)})
+        self.intent = stub.succeed(intent.id)
+        self.sent = []
+        order_paid.connect(self._on_paid)
+        self.addCleanup(order_paid.disconnect, self._on_paid)
+
+    def _on_paid(self, sender, order, **kwargs):
+        self.sent.append(order.id)
+
+    def test_only_one_caller_wins(self):
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+
+        def worker():
+            try:
+                barrier.wait()
+                results.append(transitions.mark_paid(self.order.id, intent=self.intent))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(sorted(results), [False] * (self.THREADS - 1) + [True])
+        self.assertEqual(self.sent, [self.order.id])
+        charge_lookups = [name for name, _ in stub.calls if name == "Charge.retrieve"]
+        self.assertEqual(len(charge_lookups), 1)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, OrderStatus.PAID)
+        self.assertIn("/receipts/", self.order.stripe_receipt_url)
@@ -0,0 +1,131 @@
+"""
+Order status state machine.
+
+Every status change is a single conditional UPDATE (`... WHERE status IN
+(<allowed sources>)`), so concurrent callers (confirm_view, webhook worker,
+reaper) race safely: exactly one of them "wins" and gets True back. Only the
+winner runs side effects such as fetching the receipt and sending order_paid.
+Stock reservations (checkout.stock) are settled in the same transaction as the
+winning update: committed on PAID, released on CANCELLED.
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+
+from . import stock
+from .models import Order, OrderStatus
+from .payments import get_client
+from .signals import order_paid
+
+logger = logging.getLogger(__name__)
+
+# target status -> statuses it may be entered from
+ALLOWED_SOURCES = {
+    # A failed attempt can still be paid later with another card on the same intent
+    OrderStatus.PAID: (OrderStatus.PENDING, OrderStatus.FAILED),
+    OrderStatus.FAILED: (OrderStatus.PENDING,),
+    # Failed orders still hold their reservation until cancelled
+    OrderStatus.CANCELLED: (OrderStatus.PENDING, OrderStatus.FAILED),
+}
+
+
+def transition(order_id: int, target: str, **extra) -> bool:
+    """
+    Move the order to `target` if its current status allows it.
+    `extra` are additional column updates applied in the same statement.
+    Returns True if this call performed the transition.
+    """
+    updated = Order.objects.filter(id=order_id, status__in=ALLOWED_SOURCES[target]).update(
+        status=target, **extra
+    )
+    return updated == 1
+
+
+def mark_paid(order_id: int, intent=None, user=None) -> bool:
+    """
+    PENDING/FAILED -> PAID. After commit, the winner stores the receipt URL (one
+    Charge lookup) and sends `order_paid`. If `user` is given, the order is linked
+    to them unless it already belongs to someone.
+    """
+    extra = {"payment_intent_status": "succeeded"}
+    if user is not None and getattr(user, "is_authenticated", False):
+        extra["user_id"] = Coalesce(F("user_id"), Value(user.pk))
+
+    with transaction.atomic():
+        if not transition(order_id, OrderStatus.PAID, **extra):
+            return False
+        stock.commit([order_id])
+
+    # After commit: the webhook worker calls this inside its batch transaction,
+    # and the Charge lookup must not run while the batch's row locks are held
+    transaction.on_commit(lambda: _after_paid(order_id, intent))
+    return True
+
+
+def claim_for_user(order_id: int, user) -> bool:
+    """Link a guest order to `user` unless it already belongs to someone."""
+    if user is None or not getattr(user, "is_authenticated", False):
+        return False
+    return Order.objects.filter(id=order_id, user__isnull=True).update(user=user) == 1
+
+
+def mark_failed(order_id: int) -> bool:
+    """PENDING -> FAILED."""
+    return transition(order_id, OrderStatus.FAILED)
+
+
+def mark_cancelled(order_id: int) -> bool:
+    """PENDING/FAILED -> CANCELLED; the winner releases the order's stock."""
+    with transaction.atomic():
+        if not transition(order_id, OrderStatus.CANCELLED):
+            return False
+        stock.release([order_id])
+    return True
+
+
+def mark_many_cancelled(order_ids) -> list:
+    """
+    Batch mark_cancelled for the reaper: PENDING/FAILED -> CANCELLED for each of
+    `order_ids` that still allows it, with the winners' stock released in the same
+    transaction. The candidate rows are locked before the conditional UPDATE, so
+    the ids returned are exactly the orders this call cancelled.
+    """
+    sources = ALLOWED_SOURCES[OrderStatus.CANCELLED]
+    with transaction.atomic():
+        won = list(
+            Order.objects.select_for_update()
+            .filter(id__in=order_ids, status__in=sources)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        if won:
+            Order.objects.filter(id__in=won, status__in=sources).update(
+                status=OrderStatus.CANCELLED
+            )
+            stock.release(won)
+    return won
+
+
+def _after_paid(order_id: int, intent) -> None:
+    if intent is not None:
+        receipt_url = get_client().receipt_url_for(intent)
+        if receipt_url:
+            Order.objects.filter(id=order_id).update(stripe_receipt_url=receipt_url)
+    _send_order_paid(order_id)
+
+
+def _send_order_paid(order_id: int) -> None:
+    order = Order.objects.filter(id=order_id).first()
+    if order is None:
+        return
+    for receiver, result in order_paid.send_robust(sender=Order, order=order):
+        if isinstance(result, Exception):
+            logger.error(
+                "order_paid receiver %r failed for order %s",
+                receiver,
+                order_id,
+                exc_info=result,
+            )
@@ -1,15 +1,37 @@
+import hashlib
 import json
+import logging
 from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
 from django.http import JsonResponse, HttpResponseBadRequest, HttpResponse
 from django.shortcuts import redirect, render, get_object_or_404
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
 from django.urls import reverse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.utils.safestring import mark_safe
 
+from . import stock, transitions
 from .forms import CheckoutAddressForm
 from .models import Order, OrderItem, ShippingMethod
-from shop.models import Product
+from .payments import PaymentsUnavailable, get_client
+from .stock import OutOfStock
+from .tasks import (
+    intent_is_ready,
+    prepare_payment_intent,
+    sync_payment_intent,
+    wait_for_prepared_intent,
+)
+from .webhooks import record_event
+from shop import lookup
+from shop.models import SKU, normalize_size
 from accounts.models import UserAddress
+from jobs.queue import enqueue_on_commit
+from fempowered import metrics
 
 
 try:
@@ -25,7 +47,10 @@ except Exception:
 
 import stripe
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
+logger = logging.getLogger(__name__)
+
+# Rendered receipt fragments are keyed by order version, so this only bounds memory
+RECEIPT_CACHE_SECONDS = 60 * 60
 
 
 # Cart helpers (normalize multiple formats to one shape)
@@ -44,10 +69,11 @@ def normalize_cart_items(request):
          - {"123": {"items_by_size": {"S":1,"M":2}}}
       D) Keys that include size: {"123:M": {...}}  -> pid derived from key prefix "123"
 
-    For price fallback, we query Product to derive cents if not provided.
+    For name/price fallback, products are resolved in one batch via shop.lookup.
     """
     raw = request.session.get("cart") or request.session.get("bag") or {}
     items = []
+    products = lookup.get_many(_cart_product_ids(raw))
 
     for pid, val in raw.items():
         # Derive numeric pid even if key looks like '123:M'
@@ -69,16 +95,11 @@ def normalize_cart_items(request):
                     pass
 
         def db_info():
-            """Fallback to DB for name and price if needed."""
-            name, cents = f"Product {pid_key_part}", 0
-            if pid_int:
-                try:
-                    p = Product.objects.get(pk=pid_int)
-                    name = p.name
-                    cents = int(round(float(p.price) * 100))  # Decimal euros -> cents
-                except Exception:
-                    pass
-            return name, cents
+            """Fallback to the product for name and price if needed."""
+            product = products.get(pid_int)
+            if product is None:
+                return f"Product {pid_key_part}", 0
+            return product.name, product.price_cents
 
         # Case: dict with flat qty/price fields (non Boutique Ado)
         if isinstance(val, dict) and "items_by_size" not in val:
@@ -140,6 +161,16 @@ def normalize_cart_items(request):
     return items
 
 
+def _cart_product_ids(raw) -> set:
+    """Every product id a session cart may refer to, by key prefix or stored id."""
+    ids = set()
+    for pid, val in raw.items():
+        ids.add(str(pid).split(":", 1)[0])
+        if isinstance(val, dict):
+            ids.add(val.get("product_id") or val.get("id"))
+    return ids
+
+
 def get_cart_subtotal_cents(request) -> int:
     return sum(i["price_cent"] * i["qty"] for i in normalize_cart_items(request))
 
@@ -204,49 +235,82 @@ def address_view(request):
             shipping_cost = calc_shipping_cost_cents(data["shipping_method"], subtotal)
             total = subtotal + shipping_cost
 
-            order = Order.objects.create(
-                user=request.user if request.user.is_authenticated else None,
-                full_name=data["full_name"],
-                email=data["email"],
-                phone=data.get("phone") or "",
-                address1=data["address1"],
-                address2=data.get("address2") or "",
-                postal_code=data["postal_code"],
-                city=data["city"],
-                country=data["country"],
-                billing_same_as_shipping=data["billing_same_as_shipping"],
-                billing_address1=data.get("billing_address1") or "",
-                billing_address2=data.get("billing_address2") or "",
-                billing_postal_code=data.get("billing_postal_code") or "",
-                billing_city=data.get("billing_city") or "",
-                billing_country=data.get("billing_country") or "",
-                shipping_method=data["shipping_method"],
-                shipping_cost=shipping_cost,
-                subtotal=subtotal,
-                total=total,
-                status=OrderStatus.PENDING,
-            )
-
-            # Snapshot cart into OrderItems using the exact product PK (no name fallback)
-            for it in items:
-                pid_val = it.get("pid")
-                if not pid_val:
-                    # Skip lines without a resolvable product id to avoid linking wrong variants
-                    continue
-
-                product_fk = Product.objects.filter(pk=pid_val).first()
-                if not product_fk:
-                    # Skip if product not found; safer than guessing by name
-                    continue
-
-                OrderItem.objects.create(
-                    order=order,
-                    product=product_fk,  # exact variant linkage (color)
+            # Snapshot cart into OrderItems using the exact product PK (no name fallback).
+            # Lines without a resolvable or existing product are skipped rather than
+            # guessed by name, to avoid linking wrong variants.
+            products = lookup.get_many(it["pid"] for it in items if it.get("pid"))
+            skus = SKU.ids_for((it["pid"], it["size"]) for it in items if it.get("pid"))
+            lines = [
+                OrderItem(
+                    product_id=it["pid"],  # exact variant linkage (color)
+                    sku_id=skus.get((it["pid"], normalize_size(it["size"]))),  # and size
                     product_name=it["name"],  # textual snapshot for convenience
-                    unit_price=it["price_cent"],
+                    unit_price=it["price_cent"] or products[it["pid"]].price_cents,
                     quantity=it["qty"],
                     size=it["size"],
                 )
+                for it in items
+                if it.get("pid") in products
+            ]
+
+            # A sized product must resolve to one of its SKUs: a size it does not
+            # come in (stale or forged cart) is not sold untracked
+            sized = set(
+                SKU.objects.filter(product_id__in=products).values_list("product_id", flat=True)
+            )
+            unmatched = sorted(
+                {
+                    line.product_name
+                    for line in lines
+                    if line.sku_id is None and line.product_id in sized
+                }
+            )
+            if unmatched:
+                messages.error(
+                    request,
+                    f"Sorry, not available in the chosen size: {', '.join(unmatched)}. "
+                    "Please update your cart.",
+                )
+                return redirect("cart_detail")
+
+            try:
+                with transaction.atomic():
+                    order = Order.objects.create(
+                        user=request.user if request.user.is_authenticated else None,
+                        full_name=data["full_name"],
+                        email=data["email"],
+                        phone=data.get("phone") or "",
+                        address1=data["address1"],
+                        address2=data.get("address2") or "",
+                        postal_code=data["postal_code"],
+                        city=data["city"],
+                        country=data["country"],
+                        billing_same_as_shipping=data["billing_same_as_shipping"],
+                        billing_address1=data.get("billing_address1") or "",
+                        billing_address2=data.get("billing_address2") or "",
+                        billing_postal_code=data.get("billing_postal_code") or "",
+                        billing_city=data.get("billing_city") or "",
+                        billing_country=data.get("billing_country") or "",
+                        shipping_method=data["shipping_method"],
+                        shipping_cost=shipping_cost,
+                        subtotal=subtotal,
+                        total=total,
+                        status=OrderStatus.PENDING,
+                    )
+                    # Hold the units until payment (commit) or cancellation (release)
+                    reserved = stock.reserve((line.sku_id, line.quantity) for line in lines)
+                    for line in lines:
+                        line.order = order
+                        line.reserved = line.sku_id in reserved
+                    OrderItem.objects.bulk_create(lines)
+            except OutOfStock as exc:
+                names = sorted({line.product_name for line in lines if line.sku_id in exc.sku_ids})
+                messages.error(
+                    request,
+                    f"Sorry, not enough left in stock: {', '.join(names)}. "
+                    "Please update your cart.",
+                )
+                return redirect("cart_detail")
 
             # Auto-save address back to profile (logged-in users)
             if request.user.is_authenticated:
@@ -276,6 +340,9 @@ def address_view(request):
                     ua.billing_country = data.get("billing_country") or ""
                 ua.save()
 
+            # Create the PaymentIntent in the background while the customer is redirected
+            enqueue_on_commit(prepare_payment_intent, order_id=order.id, priority=10)
+
             # Link order in session and continue to payment
             request.session["checkout_order_id"] = order.id
             request.session.modified = True
@@ -298,24 +365,30 @@ def payment_view(request):
 
     order = get_object_or_404(Order, id=order_id, status="pending")
 
-    # Create or retrieve PaymentIntent
-    if not order.payment_intent_id:
-        intent = stripe.PaymentIntent.create(
-            amount=order.total,  # euro cents
-            currency="eur",
-            receipt_email=order.email,
-            metadata={
-                "order_id": str(order.id),
-                "email": order.email,
-                "cart": describe_cart_for_metadata(request),
-            },
-            automatic_payment_methods={"enabled": True},
-        )
-        order.payment_intent_id = intent.id
-        order.save(update_fields=["payment_intent_id"])
-        client_secret = intent.client_secret
+    # Reloads are served from the client secret cached on the order; Stripe is only
+    # contacted when there is no intent yet, the amount changed, or it is terminal.
+    # The intent is normally prepared by the prepare_payment_intent job queued in
+    # address_view; the synchronous path below is the fallback when it isn't ready.
+    if intent_is_ready(order) or wait_for_prepared_intent(order):
+        client_secret = order.get_client_secret()
+        avoided = metrics.incr("stripe.payment_intent.retrieve_avoided")
+        logger.debug("Order %s: client secret served from cache (%d avoided)", order.id, avoided)
     else:
-        intent = stripe.PaymentIntent.retrieve(order.payment_intent_id)
+        metrics.incr("stripe.payment_intent.sync_fallback")
+        try:
+            intent = sync_payment_intent(order, describe_cart_for_metadata(request))
+        except (PaymentsUnavailable, stripe.StripeError):
+            logger.exception("Order %s: could not prepare PaymentIntent", order.id)
+            messages.error(
+                request, "Payments are temporarily unavailable. Please try again in a moment."
+            )
+            context = {
+                "order": order,
+                "STRIPE_PUBLISHABLE_KEY": settings.STRIPE_PUBLISHABLE_KEY,
+                "client_secret": "",
+            }
+            return render(request, "checkout/checkout_payment.html", context, status=503)
+        order.save(update_fields=order.remember_payment_intent(intent))
         client_secret = intent.client_secret
 
     context = {
@@ -351,41 +424,26 @@ def confirm_view(request):
 
     # 4) Retrieve PaymentIntent from Stripe
     try:
-        pi = stripe.PaymentIntent.retrieve(pi_id)
+        pi = get_client().retrieve_payment_intent(pi_id)
     except Exception as e:
         return JsonResponse({"ok": False, "error": f"Stripe retrieve failed: {e}"}, status=400)
 
     if pi.status != "succeeded":
         return JsonResponse({"ok": False, "error": "Payment not succeeded"}, status=400)
 
-    # 5) Get receipt URL via latest_charge (PaymentIntent doesn't include charges by default)
-    receipt_url = ""
-    try:
-        latest_charge_id = getattr(pi, "latest_charge", None)
-        if latest_charge_id:
-            ch = stripe.Charge.retrieve(latest_charge_id)
-            receipt_url = getattr(ch, "receipt_url", "") or (
-                ch.get("receipt_url") if hasattr(ch, "get") else ""
-            )
-    except Exception:
-        # Not critical; lack of receipt link shouldn't block order completion
-        pass
-
-    # 6) Mark order as paid + store receipt + (optional) attach user if logged in
-    order.status = OrderStatus.PAID
-    order.stripe_receipt_url = receipt_url
-    if request.user.is_authenticated and order.user is None:
-        order.user = request.user
-        order.save(update_fields=["status", "stripe_receipt_url", "user"])
-    else:
-        order.save(update_fields=["status", "stripe_receipt_url"])
+    # 5) Mark order as paid. The webhook may race us here; only the winner fetches
+    # the receipt and runs side effects. Either way, attach the logged-in user.
+    if not transitions.mark_paid(order.id, intent=pi, user=request.user):
+        transitions.claim_for_user(order.id, request.user)
 
-    # 7) Clear cart and unlink the order from the session
+    # 6) Clear cart and unlink the order from the session
     request.session["cart"] = {}
     request.session.pop("checkout_order_id", None)
+    # Lets this browser see the receipt on the success page (see _owns_order)
+    request.session["checkout_success_order_id"] = order.id
     request.session.modified = True
 
-    # 8) Return redirect URL to success page
+    # 7) Return redirect URL to success page
     redirect_url = reverse("checkout_success", args=[order.order_number()])
     return JsonResponse({"ok": True, "redirect_url": redirect_url})
 
@@ -393,7 +451,53 @@ def confirm_view(request):
 #  Success page
 
 
+def _receipt_version(order) -> str:
+    """Changes whenever anything shown in the receipt fragment can change."""
+    seed = "|".join(
+        str(v)
+        for v in (
+            order.id,
+            order.status,
+            order.stripe_receipt_url,
+            order.subtotal,
+            order.shipping_cost,
+            order.total,
+        )
+    )
+    return hashlib.sha1(seed.encode("utf-8")).hexdigest()[:16]
+
+
+def _render_receipt(order, version: str) -> str:
+    """Receipt fragment, cached per order version so refreshes skip the items query."""
+    key = f"checkout:receipt:{order.id}:{version}"
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string(
+            "checkout/includes/receipt.html",
+            {"order": order, "items": list(order.items.all())},
+        )
+        cache.set(key, html, RECEIPT_CACHE_SECONDS)
+    return html
+
+
+def _owns_order(request, order) -> bool:
+    """The order belongs to this user, or was placed in this browser session."""
+    if request.user.is_authenticated and order.user_id == request.user.pk:
+        return True
+    return order.id in (
+        request.session.get("checkout_order_id"),
+        request.session.get("checkout_success_order_id"),
+    )
+
+
+@require_http_methods(["GET", "HEAD"])
 def success_view(request, order_number: str):
+    """
+    Read-only: payment state is written by checkout.transitions (confirm/webhook),
+    never by viewing this page. Conditional GETs get a 304 after one order lookup.
+    Order numbers are sequential, so the receipt (items, totals, Stripe receipt)
+    is shown only to the order's owner; anyone else gets the bare confirmation.
+    """
     # order_number like "FP-000123" -> extract numeric id
     try:
         order_id = int(order_number.split("-")[-1])
@@ -401,13 +505,28 @@ def success_view(request, order_number: str):
         return HttpResponseBadRequest("Invalid order number")
     order = get_object_or_404(Order, id=order_id)
 
-    if request.user.is_authenticated and order.user is None:
-        order.user = request.user
-        if order.status != OrderStatus.PAID:
-            order.status = OrderStatus.PAID
-        order.save(update_fields=["user", "status"])
-
-    return render(request, "checkout/success.html", {"order": order})
+    # The page also shows the nav (login state, cart badge) and flash messages
+    version = _receipt_version(order)
+    owner = _owns_order(request, order)
+    page_seed = (
+        f"{version}:{int(owner)}:{request.user.pk or 0}"
+        f":{len(request.session.get('cart') or {})}:{len(messages.get_messages(request))}"
+    )
+    etag = quote_etag(hashlib.sha1(page_seed.encode("utf-8")).hexdigest()[:16])
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = render(
+            request,
+            "checkout/success.html",
+            {
+                "order": order,
+                "receipt_html": mark_safe(_render_receipt(order, version)) if owner else "",
+            },
+        )
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 # Stripe Webhook (server-to-server, optional in dev)
@@ -422,60 +541,19 @@ def stripe_webhook(request):
     # Verify signature if a secret is configured
     if wh_secret:
         try:
-            event = stripe.Webhook.construct_event(
-                payload=payload, sig_header=sig_header, secret=wh_secret
-            )
+            stripe.Webhook.construct_event(payload=payload, sig_header=sig_header, secret=wh_secret)
         except Exception:
             return HttpResponseBadRequest("Invalid signature")
-    else:
-        # Fallback (dev environments): parse without verification
-        try:
-            event = json.loads(payload.decode("utf-8"))
-        except Exception:
-            return HttpResponseBadRequest("Invalid payload")
-
-    event_type = event["type"] if isinstance(event, dict) else event.type
-    obj = event["data"]["object"] if isinstance(event, dict) else event.data.object
-
-    # Helper to mark order paid/failed
-    def _update_order_from_pi(pi, paid: bool):
-        # metadata access for both dict and StripeObject
-        meta = (pi.get("metadata") if isinstance(pi, dict) else getattr(pi, "metadata", None)) or {}
-        order_id_val = meta.get("order_id")
-        if not order_id_val:
-            return
-        try:
-            order = Order.objects.get(id=int(order_id_val))
-        except (Order.DoesNotExist, ValueError):
-            return
+    # (Dev environments without a secret: accept the payload unverified)
+    try:
+        event = json.loads(payload.decode("utf-8"))
+    except Exception:
+        return HttpResponseBadRequest("Invalid payload")
+    if not isinstance(event, dict) or not event.get("id"):
+        return HttpResponseBadRequest("Invalid payload")
 
-        if paid and order.status != OrderStatus.PAID:
-            receipt_url = ""
-            try:
-                latest_charge_id = (
-                    pi.get("latest_charge")
-                    if isinstance(pi, dict)
-                    else getattr(pi, "latest_charge", None)
-                )
-                if latest_charge_id:
-                    ch = stripe.Charge.retrieve(latest_charge_id)
-                    receipt_url = getattr(ch, "receipt_url", "") or (
-                        ch.get("receipt_url") if hasattr(ch, "get") else ""
-                    )
-            except Exception:
-                pass
-
-            order.status = OrderStatus.PAID
-            order.stripe_receipt_url = receipt_url
-            order.save(update_fields=["status", "stripe_receipt_url"])
-        elif not paid and order.status != OrderStatus.FAILED:
-            order.status = OrderStatus.FAILED
-            order.save(update_fields=["status"])
-
-    # Handle events
-    if event_type == "payment_intent.succeeded":
-        _update_order_from_pi(obj, paid=True)
-    elif event_type == "payment_intent.payment_failed":
-        _update_order_from_pi(obj, paid=False)
+    # Persist and acknowledge immediately; `manage.py process_stripe_events` does
+    # the work. Retried deliveries of the same event id are recorded only once.
+    record_event(event)
 
     return HttpResponse(status=200)
@@ -0,0 +1,113 @@
+"""
+Stripe webhook event processing.
+
+The webhook view only verifies and stores events (StripeEvent); the work
+happens here, driven by `manage.py process_stripe_events`. Batches are
+claimed with select_for_update(skip_locked=True) so several workers can
+drain the table in parallel without processing an event twice. An event that
+fails is retried with exponential backoff (jobs.queue.backoff_delay) until
+max_attempts, so one bad event is not retried on every pass.
+"""
+
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.queue import backoff_delay
+
+from . import transitions
+from .models import StripeEvent, StripeEventStatus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 5
+
+
+def _update_order_from_pi(pi: dict, paid: bool) -> None:
+    """Mark the order referenced by the PaymentIntent's metadata as paid/failed."""
+    order_id = _order_id(pi)
+    if order_id is None:
+        return
+
+    if paid:
+        transitions.mark_paid(order_id, intent=pi)
+    else:
+        transitions.mark_failed(order_id)
+
+
+def _order_id(pi: dict):
+    order_id_val = (pi.get("metadata") or {}).get("order_id")
+    try:
+        return int(order_id_val)
+    except (TypeError, ValueError):
+        return None
+
+
+def handle_event(event_type: str, payload: dict) -> None:
+    """Apply one Stripe event. Unknown event types are ignored."""
+    obj = payload.get("data", {}).get("object", {})
+    if event_type == "payment_intent.succeeded":
+        _update_order_from_pi(obj, paid=True)
+    elif event_type == "payment_intent.payment_failed":
+        _update_order_from_pi(obj, paid=False)
+    elif event_type == "payment_intent.canceled":
+        # Cancelled or expired intent: the order can no longer be paid
+        order_id = _order_id(obj)
+        if order_id is not None:
+            transitions.mark_cancelled(order_id)
+
+
+def record_event(event: dict) -> bool:
+    """
+    Store a verified event for later processing.
+    Returns False if the event id was already recorded (a retried delivery).
+    """
+    _, created = StripeEvent.objects.get_or_create(
+        event_id=event["id"],
+        defaults={"event_type": event.get("type", ""), "payload": event},
+    )
+    return created
+
+
+def process_pending_events(
+    batch_size=100, max_attempts=DEFAULT_MAX_ATTEMPTS
+) -> tuple[int, int, int]:
+    """
+    Claim and process one batch of pending events.
+    Returns (claimed, processed, failed); claimed == 0 means no event is due.
+    Events that raise stay pending with a backed-off next_attempt_at until
+    max_attempts.
+    """
+    processed = failed = 0
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            StripeEvent.objects.select_for_update(skip_locked=True)
+            .filter(status=StripeEventStatus.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        for event in batch:
+            event.attempts += 1
+            try:
+                # Savepoint per event: one bad event doesn't roll back the batch
+                with transaction.atomic():
+                    handle_event(event.event_type, event.payload)
+            except Exception as exc:
+                logger.exception("Stripe event %s failed", event.event_id)
+                event.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+                if event.attempts >= max_attempts:
+                    event.status = StripeEventStatus.FAILED
+                    failed += 1
+                else:
+                    event.next_attempt_at = now + backoff_delay(event.attempts)
+                continue
+            event.status = StripeEventStatus.PROCESSED
+            event.processed_at = timezone.now()
+            event.last_error = ""
+            processed += 1
+
+        StripeEvent.objects.bulk_update(
+            batch, ["status", "attempts", "last_error", "next_attempt_at", "processed_at"]
+        )
+    return len(batch), processed, failed
@@ -1,11 +1,12 @@
 from django.conf import settings
 from django.contrib import messages
-from django.core.mail import EmailMessage
 from django.shortcuts import redirect
 from django.template.loader import render_to_string
 from django.urls import reverse_lazy
 from django.views.generic.edit import FormView
 
+from outbox.mail import enqueue_mail
+
 from .forms import ContactForm
 
 
@@ -30,15 +31,14 @@ class ContactView(FormView):
         }
         body_txt = render_to_string("contact/email/contact_email.txt", ctx)
 
-        # Reply to
-        mail = EmailMessage(
+        # Reply to; delivered by `manage.py send_queued_mail`, not in the request
+        enqueue_mail(
             subject=f"[Fempowered] {subject}",
             body=body_txt,
             from_email=settings.DEFAULT_FROM_EMAIL,
             to=settings.CONTACT_RECIPIENTS,
             reply_to=[email],
         )
-        mail.send(fail_silently=False)
 
         messages.success(self.request, "Thanks! Your message has been sent.")
         return redirect(self.get_success_url())
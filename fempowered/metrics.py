@@ -0,0 +1,78 @@
+"""
+Lightweight in-process counters and timers (checkout, jobs and outbox instrumentation).
+
+Values are per worker process (no external metrics backend is required);
+they are also logged so they can be aggregated from the Heroku log stream.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger("fempowered.metrics")
+
+_lock = threading.Lock()
+_counters = Counter()
+_timings = {}
+
+
+def incr(name: str, amount: int = 1) -> int:
+    """Increase counter `name` and return its new value."""
+    with _lock:
+        _counters[name] += amount
+        value = _counters[name]
+    logger.debug("%s=%d", name, value)
+    return value
+
+
+def get(name: str) -> int:
+    with _lock:
+        return _counters[name]
+
+
+def observe(name: str, seconds: float) -> None:
+    """Record one duration sample for timer `name`."""
+    with _lock:
+        stat = _timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+        stat["count"] += 1
+        stat["total"] += seconds
+        stat["max"] = max(stat["max"], seconds)
+    logger.debug("%s took %.1fms", name, seconds * 1000)
+
+
+@contextmanager
+def timer(name: str):
+    """Time the enclosed block and record it with observe()."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started)
+
+
+def snapshot() -> dict:
+    """Return a copy of all counters."""
+    with _lock:
+        return dict(_counters)
+
+
+def timings() -> dict:
+    """Return {name: {"count", "total_ms", "avg_ms", "max_ms"}} for all timers."""
+    with _lock:
+        return {
+            name: {
+                "count": stat["count"],
+                "total_ms": stat["total"] * 1000,
+                "avg_ms": stat["total"] * 1000 / stat["count"],
+                "max_ms": stat["max"] * 1000,
+            }
+            for name, stat in _timings.items()
+        }
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _timings.clear()
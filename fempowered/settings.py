@@ -26,6 +26,9 @@ def env_list(name: str, default: str = "") -> list[str]:
 
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "dev-insecure-change-me")
 
+# Key for secrets encrypted at rest (checkout/crypto.py); derived from SECRET_KEY if unset
+FIELD_ENCRYPTION_KEY = os.getenv("FIELD_ENCRYPTION_KEY", "")
+
 DEBUG = os.getenv("DEBUG", "True").lower() == "true"
 
 ALLOWED_HOSTS = env_list("ALLOWED_HOSTS", "127.0.0.1,localhost")
@@ -60,6 +63,23 @@ STRIPE_PUBLISHABLE_KEY = os.getenv("STRIPE_PUBLISHABLE_KEY", "")
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "")
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "")
 STRIPE_CURRENCY = os.getenv("STRIPE_CURRENCY", "eur")
+# Use the in-memory Stripe stub (checkout/stripe_stub.py) instead of the real API
+STRIPE_USE_STUB = os.getenv("STRIPE_USE_STUB", "False").lower() == "true"
+# Stripe client tuning (checkout/payments.py). STRIPE_API_BASE may point at
+# `manage.py run_stripe_stub` for offline load tests.
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE", "")
+STRIPE_CONNECT_TIMEOUT = float(os.getenv("STRIPE_CONNECT_TIMEOUT", 3.05))  # seconds
+STRIPE_READ_TIMEOUT = float(os.getenv("STRIPE_READ_TIMEOUT", 10))  # seconds
+STRIPE_MAX_RETRIES = int(os.getenv("STRIPE_MAX_RETRIES", 2))
+STRIPE_BREAKER_THRESHOLD = int(os.getenv("STRIPE_BREAKER_THRESHOLD", 5))
+STRIPE_BREAKER_RESET_SECONDS = float(os.getenv("STRIPE_BREAKER_RESET_SECONDS", 30))
+STRIPE_HTTP_POOL_SIZE = int(os.getenv("STRIPE_HTTP_POOL_SIZE", 10))
+
+# Checkout
+# Pending (unpaid) orders older than this are reaped by `manage.py reap_pending_orders`
+CHECKOUT_PENDING_ORDER_MAX_AGE_HOURS = int(os.getenv("CHECKOUT_PENDING_ORDER_MAX_AGE_HOURS", 48))
+# How long the payment page waits for a PaymentIntent a worker is already creating
+CHECKOUT_INTENT_WAIT_SECONDS = float(os.getenv("CHECKOUT_INTENT_WAIT_SECONDS", 3))
 
 # Feature flags
 TEST_ALLOW_REVIEW_WITHOUT_PURCHASE = DEBUG  # allow in dev, off in prod
@@ -87,6 +107,10 @@ INSTALLED_APPS = [
     "accounts",
     "checkout",
     "contact",
+    "outbox",
+    "jobs",
+    "reports",
+    "recommendations",
     # Dev-tools (optional)
     "django_extensions",
 ]
@@ -138,7 +162,10 @@ ACCOUNT_AUTHENTICATION_METHOD = "username_email"
 ACCOUNT_EMAIL_REQUIRED = True
 ACCOUNT_SIGNUP_EMAIL_ENTER_TWICE = True
 ACCOUNT_USERNAME_MIN_LENGTH = 4
-ACCOUNT_EMAIL_VERIFICATION = "none"  
+# Guest orders are only linked to an account once its email is confirmed
+ACCOUNT_EMAIL_VERIFICATION = "optional"
+# Sends allauth mails through the outbox (see outbox/mail.py)
+ACCOUNT_ADAPTER = "accounts.adapter.AccountAdapter"
 LOGIN_URL = "/accounts/login/"
 LOGIN_REDIRECT_URL = "/"
 
@@ -152,6 +179,12 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Wait for locks instead of failing fast when workers and web overlap;
+        # IMMEDIATE takes the write lock at BEGIN, so claim transactions
+        # (SELECT then UPDATE) queue up instead of failing with "database is locked"
+        "OPTIONS": {"timeout": 20, "transaction_mode": "IMMEDIATE"},
+        # File-backed test DB so threaded tests (checkout transitions) share it
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
@@ -160,6 +193,20 @@ if os.environ.get("DATABASE_URL"):
     DATABASES["default"] = dj_database_url.config(conn_max_age=600, ssl_require=True)
 
 
+# Cache
+# The catalog version token (shop/lookup.py) and cached cards/receipts must be
+# seen by every dyno and worker process, so deployed sites use the database
+# cache (table created by `createcachetable` in the release phase). Local
+# single-process runs and tests keep the per-process default.
+if os.environ.get("DATABASE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "django_cache",
+        }
+    }
+
+
 #  Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -270,5 +317,7 @@ LOGGING = {
     "loggers": {
         "django": {"handlers": ["console"], "level": "ERROR", "propagate": True},
         "django.server": {"handlers": ["console"], "level": "ERROR", "propagate": True},
+        # stripe-python logs every request at INFO; checkout.payments logs failures
+        "stripe": {"handlers": ["console"], "level": "WARNING", "propagate": False},
     },
 }
@@ -1,10 +1,15 @@
 from django.shortcuts import render
 
-# Create your views here.
+from recommendations.cards import render_cards
+from reports.rankings import bestseller_ids
+
+FEATURED_COUNT = 4
 
 
 def index(request):
-    return render(request, "home/index.html")
+    # Bestseller strip: one indexed query on the rankings, cards from the cache
+    featured_cards = render_cards(bestseller_ids(FEATURED_COUNT))
+    return render(request, "home/index.html", {"featured_cards": featured_cards})
 
 
 def about(request):
@@ -0,0 +1,38 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job, JobStatus
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Background jobs and their state; failed jobs can be re-queued."""
+
+    list_display = ("id", "task", "status", "priority", "attempts", "run_at", "finished_at")
+    list_filter = ("status", "task")
+    search_fields = ("task",)
+    readonly_fields = (
+        "task",
+        "kwargs",
+        "priority",
+        "run_at",
+        "status",
+        "attempts",
+        "max_attempts",
+        "last_error",
+        "locked_by",
+        "locked_at",
+        "created_at",
+        "finished_at",
+    )
+    actions = ["requeue"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Re-queue selected jobs")
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status=JobStatus.RUNNING).update(
+            status=JobStatus.QUEUED, attempts=0, run_at=timezone.now(), finished_at=None
+        )
+        self.message_user(request, f"{updated} job(s) re-queued.")
@@ -0,0 +1,139 @@
+from __future__ import annotations
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+from jobs.queue import MAINTENANCE_INTERVAL, claim, purge_finished, requeue_stale, run_job
+
+
+def _init_process():
+    # Spawned (non-forked) children need their own Django setup
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _execute(job_id):
+    # Each pool thread/process has its own connection; drop broken or expired ones
+    close_old_connections()
+    try:
+        return run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (jobs.Job).\n"
+        "Claims due jobs with SELECT ... FOR UPDATE SKIP LOCKED and runs them in a thread "
+        "(default) or process pool. Every minute it also re-queues jobs of crashed workers "
+        "and deletes finished jobs older than a week. SIGTERM/SIGINT stop claiming and "
+        "wait for running jobs. "
+        "Use --burst to exit once the queue is empty."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency", type=int, default=4, help="Jobs run in parallel (default: 4)."
+        )
+        parser.add_argument(
+            "--processes",
+            action="store_true",
+            help="Use a process pool instead of threads (for CPU-heavy jobs).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.25,
+            help="Seconds to wait when no job is due (default: 0.25). Checkout jobs are "
+            "latency-sensitive, so keep this short.",
+        )
+        parser.add_argument(
+            "--burst", action="store_true", help="Exit when no job is due instead of polling."
+        )
+
+    def handle(self, *args, **opts):
+        concurrency = opts["concurrency"]
+        if concurrency <= 0:
+            raise CommandError("--concurrency must be positive.")
+
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        if opts["processes"]:
+            # Children must not inherit this process' open DB connections
+            connections.close_all()
+            executor = ProcessPoolExecutor(concurrency, initializer=_init_process)
+        else:
+            executor = ThreadPoolExecutor(concurrency, thread_name_prefix="job")
+
+        self.stdout.write(
+            self.style.NOTICE(
+                f"Worker {worker_id}: {concurrency} "
+                f"{'processes' if opts['processes'] else 'threads'}"
+            )
+        )
+
+        started = time.monotonic()
+        counts = {}
+        in_flight = set()
+        next_maintenance = started
+        try:
+            while not self._stopping:
+                if time.monotonic() >= next_maintenance:
+                    self._maintain()
+                    next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+                free = concurrency - len(in_flight)
+                job_ids = claim(free, worker_id) if free else []
+                for job_id in job_ids:
+                    in_flight.add(executor.submit(_execute, job_id))
+
+                if not in_flight:
+                    if opts["burst"]:
+                        break
+                    time.sleep(opts["sleep"])
+                    continue
+
+                done, in_flight = wait(
+                    in_flight, timeout=opts["sleep"], return_when=FIRST_COMPLETED
+                )
+                self._collect(done, counts)
+        finally:
+            # Graceful: no new claims, but let running jobs finish and record their result
+            executor.shutdown(wait=True)
+            self._collect(in_flight, counts)
+
+        elapsed = time.monotonic() - started
+        summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items())) or "no jobs"
+        self.stdout.write(self.style.SUCCESS(f"Worker stopped after {elapsed:.1f}s: {summary}."))
+
+    def _maintain(self):
+        """Recover jobs of crashed workers and drop old finished ones."""
+        requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Re-queued {requeued} stale running jobs."))
+        purged = purge_finished()
+        if purged:
+            self.stdout.write(f"Deleted {purged} finished jobs.")
+
+    def _collect(self, futures, counts):
+        for future in futures:
+            try:
+                status = future.result()
+            except Exception as exc:
+                self.stderr.write(f"  job crashed the runner: {exc}")
+                status = "crashed"
+            counts[status] = counts.get(status, 0) + 1
+
+    def _stop(self, signum, frame):
+        self.stdout.write("Stopping: finishing running jobs...")
+        self._stopping = True
@@ -0,0 +1,205 @@
+"""
+Database-backed job queue.
+
+    from jobs.queue import enqueue
+    enqueue(send_something, order_id=order.id, priority=10)  # or a dotted path
+
+`manage.py runworker` claims due jobs (highest priority first) in a short
+transaction with select_for_update(skip_locked=True), marks them running and
+executes them outside that transaction, so several workers can share the table.
+Failing jobs are retried with exponential backoff until max_attempts. While a
+job runs, its worker renews the lease (locked_at) every HEARTBEAT_INTERVAL, so
+only jobs whose worker died go stale. The worker also does housekeeping every
+MAINTENANCE_INTERVAL: jobs with no heartbeat for STALE_AFTER are re-queued (the
+lost run counts as an attempt), and finished jobs are deleted after KEEP_FINISHED.
+
+Delivery is at least once: a worker can die after the work is done but before
+the outcome is saved, or lose its lease to a long database stall. Handlers must
+be idempotent (check state first, use conditional updates, idempotency keys).
+"""
+
+import logging
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from fempowered import metrics
+
+from .models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 3
+BACKOFF_BASE_SECONDS = 10
+BACKOFF_MAX_SECONDS = 60 * 60
+STALE_AFTER = timedelta(minutes=15)
+HEARTBEAT_INTERVAL = 60  # seconds; several beats fit in STALE_AFTER
+KEEP_FINISHED = timedelta(days=7)
+MAINTENANCE_INTERVAL = 60  # seconds
+PURGE_BATCH_SIZE = 1000
+
+
+def task_path(task) -> str:
+    """Dotted path for a function or an already dotted string."""
+    if isinstance(task, str):
+        return task
+    return f"{task.__module__}.{task.__qualname__}"
+
+
+def enqueue(
+    task, *, priority=0, run_at=None, delay=None, max_attempts=DEFAULT_MAX_ATTEMPTS, **kwargs
+) -> Job:
+    """
+    Queue `task(**kwargs)`. kwargs must be JSON-serialisable (pass ids, not objects).
+    `delay` (seconds or timedelta) or `run_at` postpone the job.
+    """
+    if run_at is None:
+        run_at = timezone.now()
+        if delay:
+            run_at += delay if isinstance(delay, timedelta) else timedelta(seconds=delay)
+    job = Job.objects.create(
+        task=task_path(task),
+        kwargs=kwargs,
+        priority=priority,
+        run_at=run_at,
+        max_attempts=max_attempts,
+    )
+    metrics.incr("jobs.enqueued")
+    return job
+
+
+def enqueue_on_commit(task, **options) -> None:
+    """Queue after the current transaction commits (so the job sees committed rows)."""
+    transaction.on_commit(lambda: enqueue(task, **options))
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    seconds = min(BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=seconds)
+
+
+def claim(limit: int, worker_id: str) -> list[int]:
+    """Mark up to `limit` due jobs as running for `worker_id`; returns their ids."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=JobStatus.QUEUED, run_at__lte=now)
+            .order_by("-priority", "run_at", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if ids:
+            Job.objects.filter(id__in=ids).update(
+                status=JobStatus.RUNNING, locked_by=worker_id, locked_at=now
+            )
+    return ids
+
+
+def requeue_stale(stale_after=STALE_AFTER) -> int:
+    """
+    Put back jobs whose worker died while running them; returns how many. The
+    lost run counts as an attempt, so a job that keeps killing its worker ends
+    up FAILED after max_attempts instead of looping forever.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status=JobStatus.RUNNING, locked_at__lt=now - stale_after)
+    unlock = {"attempts": F("attempts") + 1, "locked_by": "", "locked_at": None}
+    failed = stale.filter(attempts__gte=F("max_attempts") - 1).update(
+        status=JobStatus.FAILED,
+        finished_at=now,
+        last_error="Worker stopped while running this job.",
+        **unlock,
+    )
+    if failed:
+        logger.warning("Gave up on %d jobs whose worker died on their last attempt", failed)
+    return stale.update(status=JobStatus.QUEUED, run_at=now, **unlock)
+
+
+def purge_finished(keep=KEEP_FINISHED, batch_size=PURGE_BATCH_SIZE) -> int:
+    """Delete done and failed jobs that finished more than `keep` ago, in small batches."""
+    cutoff = timezone.now() - keep
+    finished = Job.objects.filter(
+        status__in=[JobStatus.DONE, JobStatus.FAILED], finished_at__lt=cutoff
+    )
+    deleted = 0
+    while True:
+        ids = list(finished.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += Job.objects.filter(id__in=ids).delete()[0]
+
+
+@contextmanager
+def heartbeat(job_id: int, worker_id: str, interval=HEARTBEAT_INTERVAL):
+    """
+    Renew the job's lease every `interval` seconds while the block runs, from a
+    background thread with its own database connection. Only the worker that
+    holds the lock renews it.
+    """
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                Job.objects.filter(
+                    id=job_id, status=JobStatus.RUNNING, locked_by=worker_id
+                ).update(locked_at=timezone.now())
+        except Exception:
+            logger.exception("Heartbeat for job %s failed", job_id)
+        finally:
+            connections.close_all()  # this thread's connections only
+
+    thread = threading.Thread(target=beat, name=f"job-{job_id}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job_id: int) -> str:
+    """
+    Execute one claimed job and record the outcome. Returns the new status.
+    """
+    job = Job.objects.get(id=job_id)
+    job.attempts += 1
+    try:
+        func = import_string(job.task)
+        with metrics.timer(f"jobs.{job.task}"), heartbeat(job.id, job.locked_by):
+            func(**job.kwargs)
+    except Exception as exc:
+        logger.warning("Job %s (%s) failed, attempt %d: %s", job.id, job.task, job.attempts, exc)
+        metrics.incr("jobs.errors")
+        job.last_error = "".join(traceback.format_exception(exc))[-4000:]
+        if job.attempts >= job.max_attempts:
+            job.status = JobStatus.FAILED
+            job.finished_at = timezone.now()
+        else:
+            job.status = JobStatus.QUEUED
+            job.run_at = timezone.now() + backoff_delay(job.attempts)
+    else:
+        job.status = JobStatus.DONE
+        job.finished_at = timezone.now()
+        job.last_error = ""
+        metrics.incr("jobs.done")
+    job.locked_by = ""
+    job.locked_at = None
+    job.save(
+        update_fields=[
+            "status",
+            "attempts",
+            "last_error",
+            "run_at",
+            "finished_at",
+            "locked_by",
+            "locked_at",
+        ]
+    )
+    return job.status
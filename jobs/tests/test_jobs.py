@@ -0,0 +1,110 @@
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from jobs.models import Job, JobStatus
+from jobs.queue import claim, enqueue, heartbeat, purge_finished, requeue_stale, run_job
+
+CALLS = []
+
+
+def record(value):
+    CALLS.append(value)
+
+
+def explode():
+    raise RuntimeError("boom")
+
+
+class JobQueueTests(TestCase):
+    """Claiming order, retries with backoff and stale-job recovery."""
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_claims_due_jobs_by_priority(self):
+        low = enqueue(record, value="low")
+        high = enqueue(record, value="high", priority=10)
+        enqueue(record, value="later", delay=60)
+
+        ids = claim(10, "test")
+
+        self.assertEqual(ids, [high.id, low.id])
+        self.assertEqual(claim(10, "other"), [])  # already running, future one not due
+        self.assertEqual(Job.objects.get(id=high.id).status, JobStatus.RUNNING)
+
+    def test_failing_job_is_retried_then_failed(self):
+        job = enqueue("jobs.tests.test_jobs.explode", max_attempts=2)
+
+        self.assertEqual(run_job(job.id), JobStatus.QUEUED)
+        job.refresh_from_db()
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn("RuntimeError: boom", job.last_error)
+
+        self.assertEqual(run_job(job.id), JobStatus.FAILED)
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = enqueue(record, value=1)
+        claim(1, "dead-worker")
+        Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(Job.objects.get(id=job.id).attempts, 1)
+        self.assertEqual(claim(1, "test"), [job.id])
+
+    def test_stale_job_on_its_last_attempt_fails(self):
+        job = enqueue(record, value=1, max_attempts=2)
+        Job.objects.filter(id=job.id).update(
+            status=JobStatus.RUNNING, attempts=1, locked_at=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(requeue_stale(), 0)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JobStatus.FAILED, 2))
+        self.assertEqual(claim(1, "test"), [])
+
+    def test_purge_deletes_old_finished_jobs(self):
+        old, recent, queued = (enqueue(record, value=i) for i in range(3))
+        Job.objects.filter(id=old.id).update(
+            status=JobStatus.DONE, finished_at=timezone.now() - timedelta(days=30)
+        )
+        Job.objects.filter(id=recent.id).update(status=JobStatus.FAILED, finished_at=timezone.now())
+
+        self.assertEqual(purge_finished(batch_size=1), 1)
+        self.assertEqual(set(Job.objects.values_list("id", flat=True)), {recent.id, queued.id})
+
+
+class RunWorkerTests(TransactionTestCase):
+    """The worker command runs jobs in its thread pool and exits in --burst mode."""
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_burst_runs_all_due_jobs(self):
+        for i in range(6):
+            enqueue(record, value=i)
+
+        out = StringIO()
+        call_command("runworker", "--burst", "--concurrency", "3", "--sleep", "0.05", stdout=out)
+
+        self.assertEqual(sorted(CALLS), list(range(6)))
+        self.assertEqual(Job.objects.filter(status=JobStatus.DONE).count(), 6)
+        self.assertIn("6 done", out.getvalue())
+
+    def test_heartbeat_keeps_a_long_job_from_going_stale(self):
+        job = enqueue(record, value="slow")
+        claim(1, "w1")
+        long_ago = timezone.now() - timedelta(hours=1)
+        Job.objects.filter(id=job.id).update(locked_at=long_ago)
+
+        with heartbeat(job.id, "w1", interval=0.05):
+            time.sleep(0.3)
+
+        self.assertEqual(requeue_stale(), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JobStatus.RUNNING, 0))
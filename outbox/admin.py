@@ -0,0 +1,47 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import OutboxMessage, OutboxStatus
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """Queued transactional email and its delivery state."""
+
+    list_display = ("id", "subject", "recipients", "status", "attempts", "created_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("subject", "to")
+    readonly_fields = (
+        "subject",
+        "body",
+        "html_body",
+        "from_email",
+        "to",
+        "cc",
+        "bcc",
+        "reply_to",
+        "headers",
+        "renderer",
+        "context",
+        "status",
+        "attempts",
+        "last_error",
+        "created_at",
+        "next_attempt_at",
+        "sent_at",
+    )
+    actions = ["retry_now"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description="To")
+    def recipients(self, obj):
+        return ", ".join(obj.to)
+
+    @admin.action(description="Retry selected messages now")
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=OutboxStatus.SENT).update(
+            status=OutboxStatus.PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{updated} message(s) queued for delivery.")
@@ -0,0 +1,237 @@
+"""
+Email outbox.
+
+`enqueue()` stores an EmailMessage in OutboxMessage instead of talking SMTP
+inside the request; `enqueue_rendered()` stores only a renderer and its
+context, leaving template rendering to the worker too.
+
+`send_pending()` (driven by `manage.py send_queued_mail`) works like the job
+queue: it claims a batch with select_for_update(skip_locked=True) and commits
+it as SENDING, then renders and delivers it over one backend connection from
+get_connection() with no transaction open, recording each result as it goes.
+A claim is a lease: messages of a worker that died mid-batch become due again
+after SEND_LEASE. Failed messages are retried with exponential backoff until
+max_attempts.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from fempowered import metrics
+
+from .models import OutboxMessage, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 60 * 60
+# How long a claimed message may stay SENDING before another worker may retry it
+SEND_LEASE = timedelta(minutes=10)
+
+
+def enqueue(message) -> OutboxMessage:
+    """Store a Django EmailMessage (or EmailMultiAlternatives) for later delivery."""
+    html_body = ""
+    for content, mimetype in getattr(message, "alternatives", None) or []:
+        if mimetype == "text/html":
+            html_body = content
+            break
+    if getattr(message, "content_subtype", "plain") == "html":
+        body, html_body = "", message.body
+    else:
+        body = message.body
+
+    outbox_message = OutboxMessage.objects.create(
+        subject=message.subject,
+        body=body,
+        html_body=html_body,
+        from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(message.to),
+        cc=list(message.cc),
+        bcc=list(message.bcc),
+        reply_to=list(message.reply_to),
+        headers=dict(message.extra_headers),
+    )
+    metrics.incr("outbox.enqueued")
+    return outbox_message
+
+
+def enqueue_mail(subject, body, to, *, from_email=None, reply_to=None, html_body=""):
+    """Shortcut for the common case: plain-text body, optional HTML alternative."""
+    message = EmailMultiAlternatives(
+        subject=subject, body=body, from_email=from_email, to=to, reply_to=reply_to
+    )
+    if html_body:
+        message.attach_alternative(html_body, "text/html")
+    return enqueue(message)
+
+
+def enqueue_rendered(renderer: str, context: dict, to, *, from_email=None, reply_to=None):
+    """
+    Queue a message whose subject and bodies are produced by `renderer` (a dotted
+    path to a callable(**context) -> (subject, text, html)) at send time.
+    `context` must be JSON-serialisable, e.g. {"order_id": 42}.
+    """
+    outbox_message = OutboxMessage.objects.create(
+        renderer=renderer,
+        context=context,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+        reply_to=list(reply_to or []),
+    )
+    metrics.incr("outbox.enqueued")
+    return outbox_message
+
+
+def render_deferred(outbox_message: OutboxMessage) -> None:
+    """Fill subject/body/html_body from the renderer (once; kept for the admin)."""
+    if not outbox_message.renderer or outbox_message.body or outbox_message.html_body:
+        return
+    with metrics.timer("outbox.render"):
+        subject, body, html_body = import_string(outbox_message.renderer)(
+            **outbox_message.context
+        )
+    outbox_message.subject = " ".join(subject.splitlines()).strip()[:255]
+    outbox_message.body = body
+    outbox_message.html_body = html_body or ""
+
+
+def build_message(outbox_message: OutboxMessage, connection=None) -> EmailMultiAlternatives:
+    message = EmailMultiAlternatives(
+        subject=outbox_message.subject,
+        body=outbox_message.body,
+        from_email=outbox_message.from_email,
+        to=outbox_message.to,
+        cc=outbox_message.cc,
+        bcc=outbox_message.bcc,
+        reply_to=outbox_message.reply_to,
+        headers=outbox_message.headers,
+        connection=connection,
+    )
+    if outbox_message.html_body:
+        message.attach_alternative(outbox_message.html_body, "text/html")
+    return message
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    seconds = min(BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=seconds)
+
+
+def _close_quietly(connection) -> None:
+    try:
+        connection.close()
+    except Exception:
+        logger.debug("Ignoring error while closing mail connection", exc_info=True)
+
+
+def queue_depth() -> int:
+    """Messages still waiting to be sent (including ones backing off or being sent)."""
+    return OutboxMessage.objects.filter(
+        status__in=[OutboxStatus.PENDING, OutboxStatus.SENDING]
+    ).count()
+
+
+def claim(limit: int) -> list[OutboxMessage]:
+    """
+    Mark up to `limit` due messages as SENDING, leased for SEND_LEASE, and
+    count the attempt. Commits before returning, so no locks are held while
+    the messages are rendered and sent.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(
+                status__in=[OutboxStatus.PENDING, OutboxStatus.SENDING],
+                next_attempt_at__lte=now,
+            )
+            .order_by("next_attempt_at", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if ids:
+            OutboxMessage.objects.filter(id__in=ids).update(
+                status=OutboxStatus.SENDING,
+                attempts=F("attempts") + 1,
+                next_attempt_at=now + SEND_LEASE,
+            )
+    return list(OutboxMessage.objects.filter(id__in=ids).order_by("id")) if ids else []
+
+
+def send_pending(batch_size=50, max_attempts=DEFAULT_MAX_ATTEMPTS) -> tuple[int, int, int]:
+    """
+    Claim and send one batch of due messages over a single connection.
+    Returns (claimed, sent, failed); claimed == 0 means nothing is due.
+    Messages that raise are rescheduled with backoff until max_attempts.
+    """
+    batch = claim(batch_size)
+    if not batch:
+        return 0, 0, 0
+
+    sent = failed = 0
+    connection = get_connection(fail_silently=False)
+    is_open = False
+    try:
+        for outbox_message in batch:
+            try:
+                render_deferred(outbox_message)
+                if not is_open:
+                    connection.open()
+                    is_open = True
+                with metrics.timer("outbox.send"):
+                    build_message(outbox_message, connection).send()
+            except Exception as exc:
+                logger.warning(
+                    "Outbox message %s failed (attempt %d): %s",
+                    outbox_message.id,
+                    outbox_message.attempts,
+                    exc,
+                )
+                metrics.incr("outbox.errors")
+                outbox_message.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+                if outbox_message.attempts >= max_attempts:
+                    outbox_message.status = OutboxStatus.FAILED
+                    failed += 1
+                else:
+                    outbox_message.status = OutboxStatus.PENDING
+                    outbox_message.next_attempt_at = timezone.now() + backoff_delay(
+                        outbox_message.attempts
+                    )
+                # The connection may be broken; reopen for the next message
+                _close_quietly(connection)
+                is_open = False
+            else:
+                outbox_message.status = OutboxStatus.SENT
+                outbox_message.sent_at = timezone.now()
+                outbox_message.last_error = ""
+                metrics.observe(
+                    "outbox.queue_latency",
+                    (outbox_message.sent_at - outbox_message.created_at).total_seconds(),
+                )
+                sent += 1
+            # Recorded per message: a crash mid-batch only re-sends the unrecorded rest
+            outbox_message.save(
+                update_fields=[
+                    "subject",
+                    "body",
+                    "html_body",
+                    "status",
+                    "last_error",
+                    "next_attempt_at",
+                    "sent_at",
+                ]
+            )
+    finally:
+        if is_open:
+            _close_quietly(connection)
+
+    metrics.incr("outbox.sent", sent)
+    return len(batch), sent, failed
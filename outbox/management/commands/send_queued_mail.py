@@ -0,0 +1,82 @@
+from __future__ import annotations
+import signal
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fempowered import metrics
+from outbox.mail import DEFAULT_MAX_ATTEMPTS, queue_depth, send_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Send queued emails (outbox.OutboxMessage).\n"
+        "Runs once until nothing is due, or forever with --loop. Each batch is sent over "
+        "one mail connection; failures are retried with exponential backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=50, help="Messages per batch (default: 50)."
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=DEFAULT_MAX_ATTEMPTS,
+            help=f"Give up on a message after this many errors (default: {DEFAULT_MAX_ATTEMPTS}).",
+        )
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep polling for new mail until stopped."
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when nothing is due in --loop mode (default: 2).",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["batch_size"] <= 0:
+            raise CommandError("--batch-size must be positive.")
+
+        self._stopping = False
+        if opts["loop"]:
+            signal.signal(signal.SIGTERM, self._stop)
+            signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write(f"Queue depth: {queue_depth()}")
+        started = time.monotonic()
+        sent = failed = 0
+
+        while not self._stopping:
+            claimed, ok, bad = send_pending(
+                batch_size=opts["batch_size"], max_attempts=opts["max_attempts"]
+            )
+            sent += ok
+            failed += bad
+            if claimed:
+                self.stdout.write(
+                    f"  batch: {ok} sent, {bad} failed, {claimed - ok - bad} to retry "
+                    f"(queue depth {queue_depth()})"
+                )
+            if claimed < opts["batch_size"]:
+                if not opts["loop"]:
+                    break
+                time.sleep(opts["sleep"])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"Sent {sent} emails ({failed} failed) in {elapsed:.2f}s.")
+        )
+        timings = metrics.timings()
+        for name, label in (("outbox.send", "Send latency"), ("outbox.queue_latency", "Queued")):
+            stat = timings.get(name)
+            if stat:
+                self.stdout.write(
+                    f"  {label:<13}: avg {stat['avg_ms']:.0f} ms, max {stat['max_ms']:.0f} ms"
+                )
+        self.stdout.write(f"  Queue depth  : {queue_depth()}")
+
+    def _stop(self, signum, frame):
+        # Finish the current batch, then exit
+        self._stopping = True
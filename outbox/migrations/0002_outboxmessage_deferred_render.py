@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 07:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outbox', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='context',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='renderer',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='outboxmessage',
+            name='subject',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
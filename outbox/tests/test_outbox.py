@@ -0,0 +1,111 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemBackend
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from outbox.mail import enqueue_mail, send_pending
+from outbox.models import OutboxMessage, OutboxStatus
+
+
+class CountingBackend(LocmemBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class StatusCheckingBackend(LocmemBackend):
+    statuses = []
+
+    def send_messages(self, messages):
+        StatusCheckingBackend.statuses += OutboxMessage.objects.values_list("status", flat=True)
+        return super().send_messages(messages)
+
+
+class BrokenBackend(LocmemBackend):
+    def send_messages(self, messages):
+        raise ConnectionRefusedError("relay down")
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class OutboxTests(TestCase):
+    """Emails are queued in the request and delivered in batches by the worker."""
+
+    def test_contact_form_queues_instead_of_sending(self):
+        resp = self.client.post(
+            reverse("contact"),
+            {
+                "name": "Anna",
+                "email": "anna@example.com",
+                "subject": "Sizes",
+                "message": "Do the leggings run small?",
+            },
+        )
+
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboxMessage.objects.get()
+        self.assertEqual(queued.reply_to, ["anna@example.com"])
+
+        call_command("send_queued_mail", stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "[Fempowered] Sizes")
+
+    @override_settings(EMAIL_BACKEND="outbox.tests.test_outbox.CountingBackend")
+    def test_batch_uses_one_connection(self):
+        CountingBackend.opened = 0
+        for i in range(5):
+            enqueue_mail("Hi", "Body", [f"user{i}@example.com"], html_body="<p>Body</p>")
+
+        self.assertEqual(send_pending(), (5, 5, 0))
+
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+        self.assertFalse(OutboxMessage.objects.exclude(status=OutboxStatus.SENT).exists())
+
+    @override_settings(EMAIL_BACKEND="outbox.tests.test_outbox.BrokenBackend")
+    def test_failures_back_off_then_give_up(self):
+        message = enqueue_mail("Hi", "Body", ["anna@example.com"])
+
+        self.assertEqual(send_pending(max_attempts=2), (1, 0, 0))
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxStatus.PENDING)
+        self.assertGreater(message.next_attempt_at, timezone.now())
+        self.assertIn("relay down", message.last_error)
+        self.assertEqual(send_pending(max_attempts=2), (0, 0, 0))  # not due yet
+
+        OutboxMessage.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(send_pending(max_attempts=2), (1, 0, 1))
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxStatus.FAILED)
+
+    @override_settings(EMAIL_BACKEND="outbox.tests.test_outbox.StatusCheckingBackend")
+    def test_claim_is_recorded_before_sending_and_expires(self):
+        StatusCheckingBackend.statuses = []
+        enqueue_mail("Hi", "Body", ["anna@example.com"])
+        # A message left SENDING by a dead worker is retried once its lease is over
+        stuck = enqueue_mail("Hi", "Body", ["bob@example.com"])
+        OutboxMessage.objects.filter(id=stuck.id).update(
+            status=OutboxStatus.SENDING, attempts=1, next_attempt_at=timezone.now()
+        )
+
+        self.assertEqual(send_pending(), (2, 2, 0))
+
+        self.assertEqual(StatusCheckingBackend.statuses[:2], [OutboxStatus.SENDING] * 2)
+        stuck.refresh_from_db()
+        self.assertEqual((stuck.status, stuck.attempts), (OutboxStatus.SENT, 2))
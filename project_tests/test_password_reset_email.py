@@ -1,7 +1,10 @@
+from io import StringIO
+
 from django.test import TestCase
 from django.test.utils import override_settings
 from django.urls import reverse, NoReverseMatch
 from django.core import mail
+from django.core.management import call_command
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -44,5 +47,8 @@ class PasswordResetEmailTests(TestCase):
         self.assertIn(
             resp.status_code, self.OK, f"{label} POST unexpected {resp.status_code} at {url}"
         )
+        # The mail is queued in the outbox; the worker delivers it
+        self.assertEqual(len(mail.outbox), 0)
+        call_command("send_queued_mail", stdout=StringIO())
         self.assertGreaterEqual(len(mail.outbox), 1, "Expected at least one email to be sent")
         self.assertIn("anna@example.com", mail.outbox[0].to, "Email should be sent to the user")
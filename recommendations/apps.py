@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class RecommendationsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "recommendations"
+
+    def ready(self):
+        from . import receivers  # noqa: F401  (connects order_paid and product cache receivers)
@@ -0,0 +1,49 @@
+"""
+Rendering of "customers also bought" cards on product_detail.
+
+One indexed query reads the neighbour ids; card fragments come from the cache,
+and only cache misses load products (one query) and render. Cards contain no
+per-user state, so they are shared by all visitors and dropped when a product
+changes (see receivers.py).
+"""
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from shop.models import Product
+
+from .models import ProductNeighbour
+
+DISPLAY_COUNT = 4
+CARD_CACHE_SECONDS = 24 * 60 * 60
+
+
+def card_cache_key(product_id: int) -> str:
+    return f"recommendations:card:{product_id}"
+
+
+def render_cards(product_ids) -> list:
+    """Card HTML for the given products, in order; unknown ids are skipped."""
+    keys = {product_id: card_cache_key(product_id) for product_id in product_ids}
+    cached = cache.get_many(keys.values())
+    missing = [product_id for product_id, key in keys.items() if key not in cached]
+    if missing:
+        rendered = {
+            keys[product.id]: render_to_string(
+                "recommendations/includes/product_card.html", {"product": product}
+            )
+            for product in Product.objects.filter(id__in=missing)
+        }
+        cache.set_many(rendered, CARD_CACHE_SECONDS)
+        cached.update(rendered)
+    return [mark_safe(cached[keys[pid]]) for pid in product_ids if keys[pid] in cached]
+
+
+def recommended_cards(product_id: int, limit: int = DISPLAY_COUNT) -> list:
+    neighbour_ids = list(
+        ProductNeighbour.objects.filter(product_id=product_id)
+        .order_by("rank")
+        .values_list("neighbour_id", flat=True)[:limit]
+    )
+    return render_cards(neighbour_ids) if neighbour_ids else []
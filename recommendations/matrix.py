@@ -0,0 +1,202 @@
+"""
+"Customers also bought": a sparse product x product co-occurrence matrix built
+from paid order baskets, and the top-K neighbours per product derived from it.
+
+- rebuild() computes the whole matrix with NumPy: order lines are streamed in
+  chunks, each basket is expanded into its product pairs with vectorised index
+  arithmetic, and pair counts are reduced with np.unique (a COO sum). Top-K per
+  product comes from one lexsort over the non-zero cells.
+- add_order_to_matrix() is the job queued when an order is paid; it increments
+  the affected cells and re-ranks only the products in that basket.
+"""
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F
+
+from checkout.models import Order, OrderItem, OrderStatus
+
+from .models import CountedOrder, CoPurchase, ProductNeighbour
+
+TOP_K = 8
+# Baskets with more distinct products than this are skipped: they add O(n^2) pairs
+# and say little about what goes together.
+MAX_BASKET = 30
+CHUNK_SIZE = 50_000
+_STRIDE = np.int64(1) << 32  # pair key = product * _STRIDE + other
+
+
+# -- full rebuild (NumPy) ----------------------------------------------------
+
+
+def basket_pairs(order_ids: np.ndarray, product_ids: np.ndarray) -> np.ndarray:
+    """
+    Pair keys (product * _STRIDE + other, both directions) for every basket in the
+    given lines, without Python loops. Lines must be sorted by order id.
+    """
+    if not len(order_ids):
+        return np.zeros(0, np.int64)
+    # One line per (order, product), still sorted by order
+    lines = np.unique(order_ids * _STRIDE + product_ids)
+    orders, products = lines // _STRIDE, lines % _STRIDE
+
+    _, size = np.unique(orders, return_counts=True)
+    line_size = np.repeat(size, size)
+    keep = (line_size > 1) & (line_size <= MAX_BASKET)
+    orders, products, line_size = orders[keep], products[keep], line_size[keep]
+    if not len(orders):
+        return np.zeros(0, np.int64)
+    _, start = np.unique(orders, return_index=True)
+    line_start = np.repeat(start, np.diff(np.append(start, len(orders))))
+
+    # Each line i is paired with every line of its basket: repeat i size times and
+    # walk the basket with an offset counter that restarts per repeated block
+    left = np.repeat(np.arange(len(orders)), line_size)
+    block_start = np.repeat(np.cumsum(line_size) - line_size, line_size)
+    right = np.repeat(line_start, line_size) + (np.arange(len(left)) - block_start)
+    distinct = left != right
+    return products[left[distinct]] * _STRIDE + products[right[distinct]]
+
+
+def _merge(parts):
+    keys = np.concatenate([k for k, _ in parts])
+    counts = np.concatenate([c for _, c in parts])
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.bincount(inverse, weights=counts).astype(np.int64)
+
+
+def build_matrix(chunk_size=CHUNK_SIZE):
+    """
+    Co-occurrence matrix of all paid orders as COO arrays (product, other, orders)
+    plus the ids of the orders that were counted.
+    """
+    lines = (
+        OrderItem.objects.filter(order__status=OrderStatus.PAID, product__isnull=False)
+        .order_by("order_id")
+        .values_list("order_id", "product_id")
+    )
+    parts = []
+    order_ids = []
+    pending = 0
+    buffer = []
+
+    def flush(rows):
+        nonlocal pending
+        arr = np.array(rows, dtype=np.int64).reshape(-1, 2)
+        keys, counts = np.unique(basket_pairs(arr[:, 0], arr[:, 1]), return_counts=True)
+        parts.append((keys, counts))
+        order_ids.append(np.unique(arr[:, 0]))
+        pending += len(keys)
+        if pending > 4 * chunk_size and len(parts) > 1:
+            parts[:] = [_merge(parts)]
+            pending = 0
+
+    for row in lines.iterator(chunk_size=chunk_size):
+        # Only cut chunks between orders so no basket is split
+        if len(buffer) >= chunk_size and row[0] != buffer[-1][0]:
+            flush(buffer)
+            buffer = []
+        buffer.append(row)
+    if buffer:
+        flush(buffer)
+
+    keys, counts = _merge(parts) if parts else (np.zeros(0, np.int64), np.zeros(0, np.int64))
+    counted = np.concatenate(order_ids) if order_ids else np.zeros(0, np.int64)
+    return keys // _STRIDE, keys % _STRIDE, counts, counted
+
+
+def top_k(product, other, counts, k=TOP_K):
+    """Rows of the k best cells per product: highest count first, ties by lower id."""
+    order = np.lexsort((other, -counts, product))
+    product, other, counts = product[order], other[order], counts[order]
+    _, start, size = np.unique(product, return_index=True, return_counts=True)
+    rank = np.arange(len(product)) - np.repeat(start, size)
+    keep = rank < k
+    return product[keep], other[keep], counts[keep], rank[keep] + 1
+
+
+def rebuild(chunk_size=CHUNK_SIZE) -> dict:
+    """Replace CoPurchase, ProductNeighbour and CountedOrder from all paid orders."""
+    product, other, counts, counted = build_matrix(chunk_size)
+    top = top_k(product, other, counts)
+    with transaction.atomic():
+        CountedOrder.objects.all().delete()
+        CoPurchase.objects.all().delete()
+        ProductNeighbour.objects.all().delete()
+        CoPurchase.objects.bulk_create(
+            (
+                CoPurchase(product_id=int(a), other_id=int(b), orders=int(n))
+                for a, b, n in zip(product, other, counts)
+            ),
+            batch_size=2000,
+        )
+        ProductNeighbour.objects.bulk_create(
+            (
+                ProductNeighbour(product_id=int(a), neighbour_id=int(b), score=int(n), rank=int(r))
+                for a, b, n, r in zip(*top)
+            ),
+            batch_size=2000,
+        )
+        CountedOrder.objects.bulk_create(
+            (CountedOrder(order_id=int(order_id)) for order_id in counted), batch_size=2000
+        )
+    # Orders paid while the matrix was being built were wiped with the old markers
+    missed = list(
+        Order.objects.filter(status=OrderStatus.PAID)
+        .exclude(id__in=CountedOrder.objects.values("order_id"))
+        .values_list("id", flat=True)
+    )
+    for order_id in missed:
+        add_order_to_matrix(order_id)
+    return {
+        "orders": len(counted) + len(missed),
+        "cells": len(counts),
+        "products": len(np.unique(product)),
+        "neighbours": len(top[0]),
+    }
+
+
+# -- incremental updates ------------------------------------------------------
+
+
+def refresh_neighbours(product_ids) -> None:
+    """Re-rank the top-K rows of the given products from CoPurchase."""
+    for product_id in product_ids:
+        best = list(
+            CoPurchase.objects.filter(product_id=product_id)
+            .order_by("-orders", "other_id")
+            .values_list("other_id", "orders")[:TOP_K]
+        )
+        ProductNeighbour.objects.filter(product_id=product_id).delete()
+        ProductNeighbour.objects.bulk_create(
+            ProductNeighbour(product_id=product_id, neighbour_id=other, score=n, rank=rank)
+            for rank, (other, n) in enumerate(best, start=1)
+        )
+
+
+def add_order_to_matrix(order_id: int) -> None:
+    """Job: count one paid order's basket into the matrix (no-op if already counted)."""
+    with transaction.atomic():
+        order = (
+            Order.objects.select_for_update()
+            .filter(id=order_id, status=OrderStatus.PAID)
+            .first()
+        )
+        if order is None or CountedOrder.objects.filter(order_id=order_id).exists():
+            return
+        CountedOrder.objects.create(order=order)
+        product_ids = sorted(
+            set(order.items.filter(product__isnull=False).values_list("product_id", flat=True))
+        )
+        if not 1 < len(product_ids) <= MAX_BASKET:
+            return
+
+        pairs = [(a, b) for a in product_ids for b in product_ids if a != b]
+        CoPurchase.objects.bulk_create(
+            [CoPurchase(product_id=a, other_id=b) for a, b in pairs], ignore_conflicts=True
+        )
+        for a in product_ids:
+            CoPurchase.objects.filter(
+                product_id=a, other_id__in=[b for b in product_ids if b != a]
+            ).update(orders=F("orders") + 1)
+        refresh_neighbours(product_ids)
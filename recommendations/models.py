@@ -0,0 +1,53 @@
+from django.db import models
+
+from checkout.models import Order
+from shop.models import Product
+
+
+class CoPurchase(models.Model):
+    """
+    One non-zero cell of the sparse product x product co-occurrence matrix: the
+    number of paid orders containing both products. Stored in both directions so
+    a product's row is a single index range.
+    """
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    other = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    orders = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "other"], name="copurchase_pair")
+        ]
+        indexes = [
+            models.Index(fields=["product", "-orders", "other"], name="copurchase_top_idx")
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product_id} + {self.other_id}: {self.orders}"
+
+
+class ProductNeighbour(models.Model):
+    """Top-K "customers also bought" products per product, ranked from 1."""
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    neighbour = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    score = models.PositiveIntegerField()  # co-purchase count
+
+    class Meta:
+        ordering = ["product", "rank"]
+        constraints = [
+            models.UniqueConstraint(fields=["product", "rank"], name="product_neighbour_rank")
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product_id} #{self.rank}: {self.neighbour_id}"
+
+
+class CountedOrder(models.Model):
+    """Marks a paid order as counted into CoPurchase, so re-running the job is a no-op."""
+
+    order = models.OneToOneField(
+        Order, on_delete=models.CASCADE, primary_key=True, related_name="+"
+    )
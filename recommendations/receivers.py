@@ -0,0 +1,21 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from checkout.signals import order_paid
+from jobs.queue import enqueue
+from shop.models import Product
+
+from .cards import card_cache_key
+from .matrix import add_order_to_matrix
+
+
+@receiver(order_paid, dispatch_uid="recommendations.add_order_to_matrix")
+def queue_matrix_update(sender, order, **kwargs):
+    enqueue(add_order_to_matrix, order_id=order.id)
+
+
+@receiver(post_save, sender=Product, dispatch_uid="recommendations.product_saved")
+@receiver(post_delete, sender=Product, dispatch_uid="recommendations.product_deleted")
+def drop_product_card(sender, instance, **kwargs):
+    cache.delete(card_cache_key(instance.pk))
@@ -0,0 +1,134 @@
+from io import StringIO
+
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from checkout import transitions
+from checkout.models import Order, OrderItem
+from jobs.models import Job
+from jobs.queue import run_job
+from recommendations.matrix import _STRIDE, add_order_to_matrix, basket_pairs, top_k
+from recommendations.models import CoPurchase, CountedOrder, ProductNeighbour
+from shop.models import Product
+
+
+@override_settings(
+    STRIPE_USE_STUB=True,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class RecommendationTests(TestCase):
+    """
+    Paid baskets feed a co-purchase matrix (NumPy rebuild or incremental job) whose
+    top-K neighbours are shown on product_detail from cached cards.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.tee, self.bra, self.cap, self.mat = (
+            Product.objects.create(name=name, description="-", price=20)
+            for name in ("Tee", "Bra", "Cap", "Mat")
+        )
+
+    def _order(self, *products, status="paid"):
+        order = Order.objects.create(email="anna@example.com", status=status, total=100)
+        for product in products:
+            OrderItem.objects.create(order=order, product=product, unit_price=2000)
+        return order
+
+    def _neighbours(self, product):
+        return list(
+            ProductNeighbour.objects.filter(product=product)
+            .order_by("rank")
+            .values_list("neighbour__name", "score")
+        )
+
+    def _baskets(self):
+        self._order(self.tee, self.bra)
+        self._order(self.tee, self.bra, self.cap, self.tee)  # duplicate line counts once
+        self._order(self.tee, self.cap)
+        self._order(self.tee, self.mat, status="pending")
+
+    def test_basket_pairs_vectorised(self):
+        orders = np.array([1, 1, 1, 2, 2, 3])
+        products = np.array([10, 11, 12, 10, 10, 13])
+
+        pairs = sorted((k // _STRIDE, k % _STRIDE) for k in basket_pairs(orders, products))
+
+        expected = [(a, b) for a in (10, 11, 12) for b in (10, 11, 12) if a != b]
+        self.assertEqual(pairs, expected)  # order 2 collapses to one product, order 3 alone
+
+    def test_top_k_orders_by_count_then_id(self):
+        product = np.array([1, 1, 1, 2])
+        other = np.array([5, 3, 4, 1])
+        counts = np.array([2, 2, 7, 1])
+
+        rows = list(zip(*(a.tolist() for a in top_k(product, other, counts, k=2))))
+
+        self.assertEqual(rows, [(1, 4, 7, 1), (1, 3, 2, 2), (2, 1, 1, 1)])
+
+    def test_rebuild_command(self):
+        self._baskets()
+
+        call_command("rebuild_recommendations", stdout=StringIO())
+
+        self.assertEqual(self._neighbours(self.tee), [("Bra", 2), ("Cap", 2)])
+        self.assertEqual(self._neighbours(self.cap), [("Tee", 2), ("Bra", 1)])
+        self.assertEqual(self._neighbours(self.mat), [])
+
+    def test_incremental_job_matches_rebuild(self):
+        self._baskets()
+        call_command("rebuild_recommendations", stdout=StringIO())
+        rebuilt = sorted(CoPurchase.objects.values_list("product_id", "other_id", "orders"))
+
+        CoPurchase.objects.all().delete()
+        ProductNeighbour.objects.all().delete()
+        CountedOrder.objects.all().delete()
+        for order in Order.objects.all():
+            add_order_to_matrix(order.id)
+            add_order_to_matrix(order.id)  # retried job is a no-op
+
+        self.assertEqual(
+            sorted(CoPurchase.objects.values_list("product_id", "other_id", "orders")), rebuilt
+        )
+        self.assertEqual(self._neighbours(self.tee), [("Bra", 2), ("Cap", 2)])
+
+    def test_paying_an_order_queues_the_update(self):
+        order = self._order(self.cap, self.mat, status="pending")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transitions.mark_paid(order.id)
+        run_job(Job.objects.get(task="recommendations.matrix.add_order_to_matrix").id)
+
+        self.assertEqual(self._neighbours(self.mat), [("Cap", 1)])
+
+    def test_product_detail_renders_cached_cards(self):
+        self._baskets()
+        call_command("rebuild_recommendations", stdout=StringIO())
+        url = reverse("product_detail", args=[self.tee.pk])
+        self.client.get(url)  # warm the card cache
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+
+        self.assertContains(resp, "Customers also bought")
+        self.assertContains(resp, reverse("product_detail", args=[self.bra.pk]))
+        card_lookups = 'WHERE "shop_product"."id" IN'
+        queries = [
+            q["sql"]
+            for q in ctx.captured_queries
+            if "recommendations_" in q["sql"] or card_lookups in q["sql"]
+        ]
+        self.assertEqual(len(queries), 1)  # neighbour ids; cards come from the cache
+
+        # Editing a product drops its card
+        self.bra.name = "Sports Bra"
+        self.bra.save()
+        self.assertContains(self.client.get(url), "Sports Bra")
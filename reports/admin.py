@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.contrib import admin
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+
+from .models import DailyProductSales, DailySalesRollup
+from .rollups import summarize
+
+DASHBOARD_DAYS = (7, 30, 90, 365)
+
+
+class ReadOnlyRollupAdmin(admin.ModelAdmin):
+    """Rollup rows are written by reports.rollups only."""
+
+    date_hierarchy = "day"
+    show_full_result_count = False
+
+    @admin.display(description="Revenue (€)", ordering="revenue")
+    def revenue_eur(self, obj):
+        return f"€{obj.revenue / 100:.2f}"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailySalesRollup)
+class DailySalesRollupAdmin(ReadOnlyRollupAdmin):
+    """Daily sales per shipping method/country, plus the sales dashboard."""
+
+    list_display = ("day", "shipping_method", "country", "order_count", "units", "revenue_eur")
+    list_filter = ("shipping_method", "country")
+    change_list_template = "admin/reports/dailysalesrollup/change_list.html"
+
+    def get_urls(self):
+        return [
+            path(
+                "dashboard/",
+                self.admin_site.admin_view(self.dashboard_view),
+                name="reports_sales_dashboard",
+            ),
+            *super().get_urls(),
+        ]
+
+    def dashboard_view(self, request):
+        """Charts and breakdowns for the last N days, read from the rollup tables."""
+        try:
+            days = int(request.GET.get("days", 30))
+        except ValueError:
+            days = 30
+        if days not in DASHBOARD_DAYS:
+            days = 30
+        date_to = timezone.localdate()
+        date_from = date_to - timedelta(days=days - 1)
+
+        summary = summarize(date_from, date_to)
+        peak = max((row["revenue"] for row in summary["days"]), default=0)
+        for row in summary["days"]:
+            row["bar_pct"] = round(row["revenue"] * 100 / peak) if peak else 0
+        for key in ("by_shipping_method", "by_country", "top_products"):
+            total = summary["totals"]["revenue"]
+            for row in summary[key]:
+                row["share_pct"] = round(row["revenue"] * 100 / total) if total else 0
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Sales dashboard",
+            "date_from": date_from,
+            "date_to": date_to,
+            "days": days,
+            "day_choices": DASHBOARD_DAYS,
+            **summary,
+        }
+        return TemplateResponse(request, "admin/reports/sales_dashboard.html", context)
+
+
+@admin.register(DailyProductSales)
+class DailyProductSalesAdmin(ReadOnlyRollupAdmin):
+    list_display = ("day", "product_name", "product", "order_count", "units", "revenue_eur")
+    list_select_related = ("product",)
+    search_fields = ("product_name",)
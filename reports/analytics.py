@@ -0,0 +1,409 @@
+"""
+Columnar sales analytics for `manage.py sales_report`.
+
+Order lines are streamed from the database in chunks and turned into NumPy
+column arrays (order id, product, unit price, quantity, month, country, status,
+customer, colour, size). Each chunk is reduced with vectorised group-bys
+(np.unique / np.bincount) into accumulators whose size depends on the number of
+distinct keys (orders per chunk, customers, countries, variants), never on the
+number of lines, so memory stays bounded for tens of millions of rows.
+
+Strings are mapped to small integer codes by a Vocabulary; customers are keyed
+by user id, or by normalized email for guest orders.
+"""
+
+from datetime import date, datetime, time as dt_time, timedelta
+
+import numpy as np
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from checkout.models import OrderItem, OrderStatus
+
+CHUNK_SIZE = 50_000
+BASKET_SIZE_CAP = 20  # basket sizes above this are reported as one "20+" bucket
+REPORTS = (
+    "summary",
+    "statuses",
+    "countries",
+    "products",
+    "variants",
+    "basket_sizes",
+    "repeat",
+    "cohorts",
+)
+# (customer, month) pairs are packed into one int64: customer * _MONTHS + month index
+_MONTHS = 12 * 10_000
+
+_COLUMNS = (
+    "order_id",
+    "product_id",
+    "unit_price",
+    "quantity",
+    "year",
+    "month",
+    "order__country",
+    "order__status",
+    "order__user_id",
+    "order__email_normalized",
+    "product__color",
+    "size",
+)
+
+
+class Vocabulary:
+    """Maps strings to dense integer codes, one np.unique per chunk (no per-row dict lookups)."""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, column) -> np.ndarray:
+        uniques, inverse = np.unique(np.asarray(column, dtype=object), return_inverse=True)
+        lookup = np.empty(len(uniques), dtype=np.int64)
+        for i, value in enumerate(uniques):  # loops over distinct values only
+            code = self._codes.get(value)
+            if code is None:
+                code = self._codes[value] = len(self.values)
+                self.values.append(value)
+            lookup[i] = code
+        return lookup[inverse]
+
+
+def _grow(acc: np.ndarray, size: int) -> np.ndarray:
+    if len(acc) >= size:
+        return acc
+    grown = np.zeros(max(size, len(acc) * 2), dtype=acc.dtype)
+    grown[: len(acc)] = acc
+    return grown
+
+
+def _add(acc: np.ndarray, codes: np.ndarray, weights=None) -> np.ndarray:
+    """acc[code] += weight for every row, vectorised via bincount."""
+    if not len(codes):
+        return acc
+    sums = np.bincount(codes, weights=weights)
+    acc = _grow(acc, len(sums))
+    acc[: len(sums)] += sums.astype(acc.dtype) if weights is not None else sums
+    return acc
+
+
+def _month_label(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+class SalesAnalytics:
+    """Streaming accumulator; feed it chunks with add_chunk(), then call report()."""
+
+    def __init__(self):
+        self.countries = Vocabulary()
+        self.statuses = Vocabulary()
+        self.emails = Vocabulary()
+        self.variants = Vocabulary()
+
+        self.lines = 0
+        self.country_orders = np.zeros(0, np.int64)
+        self.country_units = np.zeros(0, np.int64)
+        self.country_revenue = np.zeros(0, np.int64)
+        self.status_orders = np.zeros(0, np.int64)
+        self.status_revenue = np.zeros(0, np.int64)
+        # Indexed by product_id + 1 (0 = product deleted)
+        self.product_lines = np.zeros(0, np.int64)
+        self.product_units = np.zeros(0, np.int64)
+        self.product_revenue = np.zeros(0, np.int64)
+        self.variant_lines = np.zeros(0, np.int64)
+        self.variant_units = np.zeros(0, np.int64)
+        self.variant_revenue = np.zeros(0, np.int64)
+        self.basket_sizes = np.zeros(BASKET_SIZE_CAP + 1, np.int64)
+
+        # Distinct (customer, month) pairs and (customer, order count) pairs seen so
+        # far; per-chunk partial results are merged whenever they pile up
+        self._pairs = []
+        self._customer_orders = []
+        self._pending = 0
+        # Order lines of the last order in a chunk, which may continue in the next chunk
+        self._carry = None
+
+    # -- ingestion -----------------------------------------------------------
+
+    def add_chunk(self, columns: dict) -> None:
+        if self._carry is not None:
+            columns = {k: np.concatenate([self._carry[k], v]) for k, v in columns.items()}
+            self._carry = None
+        order_id = columns["order_id"]
+        if not len(order_id):
+            return
+        # Rows arrive ordered by order_id: hold back the (possibly incomplete) last order
+        tail = order_id == order_id[-1]
+        self._carry = {k: v[tail] for k, v in columns.items()}
+        if not tail.all():
+            self._reduce({k: v[~tail] for k, v in columns.items()})
+
+    def finish(self) -> None:
+        if self._carry is not None:
+            carry, self._carry = self._carry, None
+            self._reduce(carry)
+        self._compact()
+
+    def _reduce(self, c: dict) -> None:
+        self.lines += len(c["order_id"])
+        revenue = c["unit_price"] * c["quantity"]
+
+        product = c["product_id"] + 1
+        self.product_lines = _add(self.product_lines, product)
+        self.product_units = _add(self.product_units, product, c["quantity"])
+        self.product_revenue = _add(self.product_revenue, product, revenue)
+
+        variant = self.variants.encode(c["color"] + "\x1f" + c["size"])
+        self.variant_lines = _add(self.variant_lines, variant)
+        self.variant_units = _add(self.variant_units, variant, c["quantity"])
+        self.variant_revenue = _add(self.variant_revenue, variant, revenue)
+
+        # Collapse lines to orders: first row per order carries the order-level columns
+        _, first, order_index = np.unique(c["order_id"], return_index=True, return_inverse=True)
+        units = np.bincount(order_index, weights=c["quantity"]).astype(np.int64)
+        order_revenue = np.bincount(order_index, weights=revenue).astype(np.int64)
+        country = self.countries.encode(c["country"][first])
+        status = self.statuses.encode(c["status"][first])
+        month = c["month"][first]
+
+        self.country_orders = _add(self.country_orders, country)
+        self.country_units = _add(self.country_units, country, units)
+        self.country_revenue = _add(self.country_revenue, country, order_revenue)
+        self.status_orders = _add(self.status_orders, status)
+        self.status_revenue = _add(self.status_revenue, status, order_revenue)
+        self.basket_sizes += np.bincount(
+            np.minimum(units, BASKET_SIZE_CAP), minlength=BASKET_SIZE_CAP + 1
+        )
+
+        # Customer key: even = user id, odd = guest email code
+        user = c["user_id"][first]
+        email = self.emails.encode(c["email"][first])
+        customer = np.where(user >= 0, user * 2, email * 2 + 1)
+        self._pairs.append(np.unique(customer * _MONTHS + month))
+        self._customer_orders.append(np.unique(customer, return_counts=True))
+        self._pending += len(customer)
+        if self._pending > 4 * CHUNK_SIZE:
+            self._compact()
+
+    def _compact(self) -> None:
+        if len(self._pairs) > 1:
+            self._pairs = [np.unique(np.concatenate(self._pairs))]
+        if len(self._customer_orders) > 1:
+            keys = np.concatenate([k for k, _ in self._customer_orders])
+            counts = np.concatenate([n for _, n in self._customer_orders])
+            unique, inverse = np.unique(keys, return_inverse=True)
+            totals = np.bincount(inverse, weights=counts).astype(np.int64)
+            self._customer_orders = [(unique, totals)]
+        self._pending = 0
+
+    # -- reports -------------------------------------------------------------
+
+    def _customer_months(self):
+        pairs = self._pairs[0] if self._pairs else np.zeros(0, np.int64)
+        return pairs // _MONTHS, pairs % _MONTHS
+
+    def _orders_per_customer(self) -> np.ndarray:
+        return self._customer_orders[0][1] if self._customer_orders else np.zeros(0, np.int64)
+
+    def report(self, names=REPORTS) -> dict:
+        self.finish()
+        builders = {
+            "summary": self._summary,
+            "statuses": self._statuses,
+            "countries": self._countries,
+            "products": self._products,
+            "variants": self._variants,
+            "basket_sizes": self._basket_sizes,
+            "repeat": self._repeat,
+            "cohorts": self._cohorts,
+        }
+        return {name: builders[name]() for name in names}
+
+    def _summary(self):
+        orders = int(self.status_orders.sum())
+        revenue = int(self.status_revenue.sum())
+        units = int(self.country_units.sum())
+        per_customer = self._orders_per_customer()
+        return [
+            {
+                "lines": self.lines,
+                "orders": orders,
+                "customers": len(per_customer),
+                "repeat_customers": int((per_customer > 1).sum()),
+                "units": units,
+                "revenue": revenue,
+                "average_order_value": revenue // orders if orders else 0,
+                "average_basket_units": round(units / orders, 2) if orders else 0,
+            }
+        ]
+
+    def _statuses(self):
+        return [
+            {
+                "status": value,
+                "orders": int(self.status_orders[i]),
+                "revenue": int(self.status_revenue[i]),
+            }
+            for i, value in enumerate(self.statuses.values)
+        ]
+
+    def _countries(self):
+        order = np.argsort(-self.country_revenue[: len(self.countries)], kind="stable")
+        return [
+            {
+                "country": self.countries.values[i],
+                "orders": int(self.country_orders[i]),
+                "units": int(self.country_units[i]),
+                "revenue": int(self.country_revenue[i]),
+            }
+            for i in order
+        ]
+
+    def _products(self):
+        ids = np.nonzero(self.product_lines)[0]
+        ids = ids[np.argsort(-self.product_revenue[ids], kind="stable")]
+        return [
+            {
+                "product_id": int(i) - 1 if i else None,
+                "lines": int(self.product_lines[i]),
+                "units": int(self.product_units[i]),
+                "revenue": int(self.product_revenue[i]),
+            }
+            for i in ids
+        ]
+
+    def _variants(self):
+        total_units = int(self.variant_units.sum()) or 1
+        order = np.argsort(-self.variant_units[: len(self.variants)], kind="stable")
+        rows = []
+        for i in order:
+            color, size = self.variants.values[i].split("\x1f")
+            rows.append(
+                {
+                    "color": color,
+                    "size": size,
+                    "lines": int(self.variant_lines[i]),
+                    "units": int(self.variant_units[i]),
+                    "revenue": int(self.variant_revenue[i]),
+                    "unit_share": round(int(self.variant_units[i]) / total_units, 4),
+                }
+            )
+        return rows
+
+    def _basket_sizes(self):
+        return [
+            {"units": f"{size}+" if size == BASKET_SIZE_CAP else str(size), "orders": int(n)}
+            for size, n in enumerate(self.basket_sizes)
+            if n
+        ]
+
+    def _repeat(self):
+        """Customers by number of orders placed (1, 2, ... 20+)."""
+        per_customer = self._orders_per_customer()
+        buyers = len(per_customer)
+        histogram = np.bincount(np.minimum(per_customer, BASKET_SIZE_CAP))
+        return [
+            {
+                "orders_per_customer": f"{n}+" if n == BASKET_SIZE_CAP else str(n),
+                "customers": int(count),
+                "share": round(int(count) / buyers, 4),
+            }
+            for n, count in enumerate(histogram)
+            if count
+        ]
+
+    def _cohorts(self):
+        customers, months = self._customer_months()
+        if not len(customers):
+            return []
+        # Pairs are sorted by customer then month: the first pair per customer is its cohort
+        _, first, inverse = np.unique(customers, return_index=True, return_inverse=True)
+        cohort = months[first][inverse]
+        offset = months - cohort
+        span = int(offset.max()) + 1
+        cohorts, cohort_index = np.unique(cohort, return_inverse=True)
+        matrix = np.bincount(cohort_index * span + offset, minlength=len(cohorts) * span)
+        matrix = matrix.reshape(len(cohorts), span)
+        rows = []
+        for i, month in enumerate(cohorts):
+            size = int(matrix[i, 0])
+            for k in np.nonzero(matrix[i])[0]:
+                rows.append(
+                    {
+                        "cohort": _month_label(int(month)),
+                        "months_since_first_order": int(k),
+                        "customers": int(matrix[i, k]),
+                        "retention": round(int(matrix[i, k]) / size, 4),
+                    }
+                )
+        return rows
+
+
+def line_queryset(date_from: date, date_to: date, statuses=None):
+    start = timezone.make_aware(datetime.combine(date_from, dt_time.min))
+    end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), dt_time.min))
+    return (
+        OrderItem.objects.filter(
+            order__created_at__gte=start,
+            order__created_at__lt=end,
+            order__status__in=statuses or [OrderStatus.PAID],
+        )
+        .annotate(year=ExtractYear("order__created_at"), month=ExtractMonth("order__created_at"))
+        .order_by("order_id", "id")
+        .values_list(*_COLUMNS)
+    )
+
+
+def _strings(values) -> np.ndarray:
+    column = np.array(values, dtype=object)
+    column[np.equal(column, None)] = ""
+    return column
+
+
+def _to_columns(rows) -> dict:
+    (order_id, product_id, unit_price, quantity, year, month,
+     country, status, user_id, email, color, size) = zip(*rows)
+    n = len(order_id)
+
+    def ints(values):
+        return np.fromiter((-1 if v is None else v for v in values), dtype=np.int64, count=n)
+
+    return {
+        "order_id": np.fromiter(order_id, dtype=np.int64, count=n),
+        "product_id": ints(product_id),
+        "unit_price": np.fromiter(unit_price, dtype=np.int64, count=n),
+        "quantity": np.fromiter(quantity, dtype=np.int64, count=n),
+        # Months since year 0, so consecutive months differ by one
+        "month": np.fromiter(year, dtype=np.int64, count=n) * 12
+        + np.fromiter(month, dtype=np.int64, count=n)
+        - 1,
+        "country": np.array(country, dtype=object),
+        "status": np.array(status, dtype=object),
+        "user_id": ints(user_id),
+        "email": np.array(email, dtype=object),
+        "color": _strings(color),
+        "size": _strings(size),
+    }
+
+
+def iter_chunks(queryset, chunk_size=CHUNK_SIZE):
+    """Yield dicts of column arrays of at most chunk_size order lines each."""
+    rows = []
+    for row in queryset.iterator(chunk_size=chunk_size):
+        rows.append(row)
+        if len(rows) >= chunk_size:
+            yield _to_columns(rows)
+            rows = []
+    if rows:
+        yield _to_columns(rows)
+
+
+def build_report(date_from, date_to, statuses=None, names=REPORTS, chunk_size=CHUNK_SIZE):
+    analytics = SalesAnalytics()
+    for columns in iter_chunks(line_queryset(date_from, date_to, statuses), chunk_size):
+        analytics.add_chunk(columns)
+    return analytics.report(names)
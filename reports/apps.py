@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class ReportsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "reports"
+
+    def ready(self):
+        from . import receivers  # noqa: F401  (connects the order_paid receiver)
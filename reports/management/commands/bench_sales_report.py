@@ -0,0 +1,222 @@
+from __future__ import annotations
+import random
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from checkout.models import Order, OrderItem, OrderStatus
+from reports.analytics import BASKET_SIZE_CAP, CHUNK_SIZE, build_report
+from shop.models import Product
+
+COUNTRIES = ("SE", "FI", "NO", "DK", "DE")
+COLORS = ("Black", "White", "Pink", "Green", None)
+SIZES = ("XS", "S", "M", "L", "XL", "")
+EMAIL_DOMAIN = "bench-sales.example.com"
+
+
+def orm_report(date_from, date_to):
+    """The same figures as reports.analytics, computed with ORM aggregates."""
+    orders = Order.objects.filter(
+        status=OrderStatus.PAID,
+        created_at__date__gte=date_from,
+        created_at__date__lte=date_to,
+    ).order_by()
+    lines = OrderItem.objects.filter(order__in=orders).order_by()
+    revenue = Sum(F("unit_price") * F("quantity"))
+
+    totals = lines.aggregate(lines=Count("id"), units=Sum("quantity"), revenue=revenue)
+    order_count = orders.count()
+    customers = Counter(
+        user_id if user_id is not None else email
+        for user_id, email in orders.values_list("user_id", "email_normalized").iterator()
+    )
+    units_sub = (
+        OrderItem.objects.filter(order=OuterRef("pk"))
+        .order_by()
+        .values("order")
+        .annotate(n=Sum("quantity"))
+        .values("n")
+    )
+    baskets = Counter()
+    for units, n in (
+        orders.annotate(units=Coalesce(Subquery(units_sub), 0))
+        .values("units")
+        .annotate(n=Count("id"))
+        .values_list("units", "n")
+    ):
+        baskets[min(units, BASKET_SIZE_CAP)] += n
+
+    first_month = {}
+    active = defaultdict(set)
+    for user_id, email, year, month in (
+        orders.annotate(y=ExtractYear("created_at"), m=ExtractMonth("created_at"))
+        .values_list("user_id", "email_normalized", "y", "m")
+        .distinct()
+    ):
+        key = user_id if user_id is not None else email
+        index = year * 12 + month - 1
+        active[key].add(index)
+        first_month[key] = min(first_month.get(key, index), index)
+    cohorts = Counter()
+    for key, months in active.items():
+        for index in months:
+            cohorts[(first_month[key], index - first_month[key])] += 1
+
+    return {
+        "summary": {
+            **totals,
+            "orders": order_count,
+            "customers": len(customers),
+            "repeat_customers": sum(1 for n in customers.values() if n > 1),
+        },
+        "countries": sorted(
+            orders.values("country").annotate(orders=Count("id")).values_list("country", "orders")
+        ),
+        "products": sorted(
+            lines.values("product_id")
+            .annotate(units=Sum("quantity"), revenue=revenue)
+            .values_list("units", "revenue")
+        ),
+        "variants": sorted(
+            lines.values("product__color", "size")
+            .annotate(units=Sum("quantity"))
+            .values_list("units", flat=True)
+        ),
+        "basket_sizes": sorted(baskets.items()),
+        "repeat": sorted(Counter(min(n, BASKET_SIZE_CAP) for n in customers.values()).items()),
+        "cohorts": sorted(cohorts.items()),
+    }
+
+
+def comparable(report):
+    """Project a reports.analytics result onto orm_report()'s shape."""
+    summary = report["summary"][0]
+    return {
+        "summary": {
+            "lines": summary["lines"],
+            "units": summary["units"],
+            "revenue": sum(row["revenue"] for row in report["products"]),
+            "orders": summary["orders"],
+            "customers": summary["customers"],
+            "repeat_customers": summary["repeat_customers"],
+        },
+        "countries": sorted((row["country"], row["orders"]) for row in report["countries"]),
+        "products": sorted((row["units"], row["revenue"]) for row in report["products"]),
+        "variants": sorted(row["units"] for row in report["variants"]),
+        "basket_sizes": sorted(
+            (int(row["units"].rstrip("+")), row["orders"]) for row in report["basket_sizes"]
+        ),
+        "repeat": sorted(
+            (int(row["orders_per_customer"].rstrip("+")), row["customers"])
+            for row in report["repeat"]
+        ),
+        "cohorts": sorted(
+            (
+                (
+                    int(row["cohort"][:4]) * 12 + int(row["cohort"][5:]) - 1,
+                    row["months_since_first_order"],
+                ),
+                row["customers"],
+            )
+            for row in report["cohorts"]
+        ),
+    }
+
+
+def _measure(fn):
+    """(result, seconds, peak MB); memory is traced in a second run, tracing is slow."""
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the NumPy sales_report engine against equivalent ORM aggregates on "
+        "generated orders spread over two years, and check both give the same figures. "
+        "Writes to the configured database; only runs with DEBUG=True or --force."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=50_000, help="Orders to generate.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--keep", action="store_true", help="Keep the generated orders.")
+        parser.add_argument("--force", action="store_true", help="Allow running with DEBUG=False.")
+
+    def handle(self, *args, **opts):
+        if not settings.DEBUG and not opts["force"]:
+            raise CommandError("Refusing to write benchmark data with DEBUG=False (use --force).")
+        if opts["orders"] <= 0:
+            raise CommandError("--orders must be positive.")
+
+        rng = random.Random(opts["seed"])
+        today = timezone.localdate()
+        date_from = today - timedelta(days=730)
+        try:
+            self._generate(rng, opts["orders"])
+            lines = OrderItem.objects.filter(order__email__endswith=EMAIL_DOMAIN).count()
+
+            numpy_report, numpy_s, numpy_mb = _measure(
+                lambda: build_report(date_from, today, chunk_size=opts["chunk_size"])
+            )
+            orm, orm_s, orm_mb = _measure(lambda: orm_report(date_from, today))
+        finally:
+            if not opts["keep"]:
+                Order.objects.filter(email__endswith=EMAIL_DOMAIN).delete()
+                Product.objects.filter(name__startswith="Bench sales ").delete()
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Sales report"))
+        self.stdout.write(f"  {opts['orders']} generated orders, {lines} order lines")
+        self.stdout.write(f"  numpy: {numpy_s:.2f}s, peak traced memory {numpy_mb:.1f} MB")
+        self.stdout.write(f"  orm  : {orm_s:.2f}s, peak traced memory {orm_mb:.1f} MB")
+        if comparable(numpy_report) == orm:
+            self.stdout.write(self.style.SUCCESS("Both engines report identical figures."))
+        else:
+            raise CommandError("The NumPy and ORM reports differ.")
+
+    def _generate(self, rng, count):
+        products = Product.objects.bulk_create(
+            Product(name=f"Bench sales {i}", description="-", price=10 + i, color=color)
+            for i, color in enumerate(COLORS * 4)
+        )
+        customers = max(count // 3, 1)
+        now = timezone.now()
+        batch = 5000
+        for offset in range(0, count, batch):
+            orders = Order.objects.bulk_create(
+                Order(
+                    email=f"customer{rng.randrange(customers)}@{EMAIL_DOMAIN}",
+                    status=OrderStatus.PAID if rng.random() < 0.9 else OrderStatus.CANCELLED,
+                    country=rng.choice(COUNTRIES),
+                    created_at=now - timedelta(days=rng.randrange(720), minutes=rng.randrange(60)),
+                )
+                for _ in range(min(batch, count - offset))
+            )
+            items = []
+            for order in orders:
+                for _ in range(rng.choice((1, 1, 2, 3, 4))):
+                    product = rng.choice(products)
+                    items.append(
+                        OrderItem(
+                            order_id=order.pk,
+                            product_id=product.pk,
+                            product_name=product.name,
+                            unit_price=int(product.price * 100),
+                            quantity=rng.choice((1, 1, 1, 2, 3)),
+                            size=rng.choice(SIZES),
+                        )
+                    )
+            OrderItem.objects.bulk_create(items, batch_size=2000)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from reports.rollups import first_order_day, rebuild_day
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r} (expected YYYY-MM-DD).")
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily sales rollups from paid orders, one day per transaction. "
+        "Defaults to everything from the first paid order until today. Safe to run while "
+        "the worker keeps adding newly paid orders."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", help="YYYY-MM-DD (default: first order)")
+        parser.add_argument("--to", dest="date_to", help="YYYY-MM-DD (default: today)")
+
+    def handle(self, *args, **opts):
+        date_to = _parse_date(opts["date_to"]) if opts["date_to"] else timezone.localdate()
+        if opts["date_from"]:
+            date_from = _parse_date(opts["date_from"])
+        else:
+            date_from = first_order_day()
+            if date_from is None:
+                self.stdout.write("No paid orders; nothing to rebuild.")
+                return
+        if date_to < date_from:
+            raise CommandError("--to must not be before --from.")
+
+        started = time.monotonic()
+        days = orders = 0
+        day = date_from
+        while day <= date_to:
+            orders += rebuild_day(day)
+            days += 1
+            day += timedelta(days=1)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {days} days ({orders} paid orders) for {date_from}..{date_to} "
+                f"in {time.monotonic() - started:.2f}s."
+            )
+        )
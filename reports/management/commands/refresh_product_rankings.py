@@ -0,0 +1,24 @@
+from __future__ import annotations
+import time
+
+from django.core.management.base import BaseCommand
+
+from reports.rankings import refresh_rankings
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute product rankings (units sold all time, last 30 and 7 days, decayed "
+        "trend score) from the daily product rollups. Paid orders update rankings as they "
+        "come in; run this daily (e.g. from a scheduler) so sales age out of the windows. "
+        "After rebuild_sales_rollups, run it to pick up the corrected rollups."
+    )
+
+    def handle(self, *args, **opts):
+        started = time.monotonic()
+        count = refresh_rankings()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Refreshed rankings for {count} products in {time.monotonic() - started:.2f}s."
+            )
+        )
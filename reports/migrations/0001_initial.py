@@ -0,0 +1,60 @@
+# Generated by Django 5.2.5 on 2026-10-19 07:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('checkout', '0007_order_email_normalized'),
+        ('shop', '0004_favorite'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RolledUpOrder',
+            fields=[
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='checkout.order')),
+                ('day', models.DateField(db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('shipping_method', models.CharField(choices=[('standard', 'Standard (2–4 days)'), ('express', 'Express (1–2 days)')], max_length=20)),
+                ('country', models.CharField(max_length=2)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.BigIntegerField(default=0)),
+                ('shipping', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily sales rollup',
+                'ordering': ['-day', 'shipping_method', 'country'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'shipping_method', 'country'), name='daily_sales_rollup_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('product_name', models.CharField(blank=True, default='', max_length=255)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.BigIntegerField(default=0)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='shop.product')),
+            ],
+            options={
+                'verbose_name': 'Daily product sales',
+                'verbose_name_plural': 'Daily product sales',
+                'ordering': ['-day', '-revenue'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'product', 'product_name'), name='daily_product_sales_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+        ('shop', '0004_favorite'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRanking',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='shop.product')),
+                ('units_total', models.PositiveIntegerField(default=0)),
+                ('units_30d', models.PositiveIntegerField(default=0)),
+                ('units_7d', models.PositiveIntegerField(default=0)),
+                ('trend_score', models.FloatField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-units_30d', '-units_total'], name='ranking_bestseller_idx'), models.Index(fields=['-trend_score'], name='ranking_trend_idx')],
+            },
+        ),
+    ]
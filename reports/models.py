@@ -0,0 +1,100 @@
+from django.db import models
+
+from checkout.models import Order, ShippingMethod
+from shop.models import Product
+
+
+class DailySalesRollup(models.Model):
+    """
+    Paid orders aggregated per local day, shipping method and country.
+    Maintained by reports.rollups; amounts are euro cents like on Order.
+    """
+
+    day = models.DateField()
+    shipping_method = models.CharField(max_length=20, choices=ShippingMethod.choices)
+    country = models.CharField(max_length=2)
+
+    order_count = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.BigIntegerField(default=0)  # sum of Order.total, euro cents
+    shipping = models.BigIntegerField(default=0)  # sum of Order.shipping_cost, euro cents
+
+    class Meta:
+        ordering = ["-day", "shipping_method", "country"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "shipping_method", "country"], name="daily_sales_rollup_key"
+            )
+        ]
+        verbose_name = "Daily sales rollup"
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.shipping_method}/{self.country}"
+
+    @property
+    def average_order_value(self) -> int:
+        return self.revenue // self.order_count if self.order_count else 0
+
+
+class DailyProductSales(models.Model):
+    """Paid order lines aggregated per local day and product (frozen name kept)."""
+
+    day = models.DateField()
+    product = models.ForeignKey(
+        Product, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    product_name = models.CharField(max_length=255, blank=True, default="")
+
+    order_count = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.BigIntegerField(default=0)  # euro cents
+
+    class Meta:
+        ordering = ["-day", "-revenue"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "product", "product_name"], name="daily_product_sales_key"
+            )
+        ]
+        verbose_name = "Daily product sales"
+        verbose_name_plural = "Daily product sales"
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.product_name}"
+
+
+class RolledUpOrder(models.Model):
+    """Marks an order as counted in the rollups, so re-running the job is a no-op."""
+
+    order = models.OneToOneField(
+        Order, on_delete=models.CASCADE, primary_key=True, related_name="+"
+    )
+    day = models.DateField(db_index=True)
+
+
+class ProductRanking(models.Model):
+    """
+    Precomputed popularity per product for the "Bestsellers"/"Trending" sorts and the
+    home page strip. Maintained by reports.rankings; product_list joins it on the
+    product primary key and orders by one of the indexed score columns.
+    """
+
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name="ranking"
+    )
+    units_total = models.PositiveIntegerField(default=0)
+    units_30d = models.PositiveIntegerField(default=0)
+    units_7d = models.PositiveIntegerField(default=0)
+    # log(sum(units * exp(decay * age_from_epoch))): ordering by it equals ordering by
+    # exponentially time-decayed units, and it can be updated without touching other rows
+    trend_score = models.FloatField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-units_30d", "-units_total"], name="ranking_bestseller_idx"),
+            models.Index(fields=["-trend_score"], name="ranking_trend_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product_id}: {self.units_30d} units (30d)"
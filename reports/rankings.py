@@ -0,0 +1,171 @@
+"""
+Product popularity for the "Bestsellers" and "Trending this week" sorts.
+
+ProductRanking rows are bumped by add_order_to_rollups when an order is paid
+(same job, same idempotency marker) and fully recomputed from DailyProductSales
+by `manage.py refresh_product_rankings`, which also ages units out of the 7/30
+day windows. Nothing here scans OrderItem.
+
+The trend score is stored as log(sum(units * exp(DECAY * days_since_EPOCH))):
+ordering by it is the same as ordering by exponentially decayed units at any
+moment, and adding a sale never requires rescaling the other rows.
+"""
+
+import math
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import F, Max, Min, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from shop.models import Product
+
+from .models import DailyProductSales, ProductRanking
+
+TREND_HALF_LIFE_DAYS = 3.5
+DECAY = math.log(2) / TREND_HALF_LIFE_DAYS
+EPOCH = date(2025, 1, 1)
+# Older sales weigh less than 2**-25 of today's; the refresh ignores them for the trend
+TREND_WINDOW_DAYS = 90
+
+
+def _log_weight(day: date) -> float:
+    return DECAY * (day - EPOCH).days
+
+
+def _log_add(a, b: float) -> float:
+    """log(exp(a) + exp(b)) without overflow; a may be None (no sales yet)."""
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def add_sales(day: date, units_by_product: dict) -> None:
+    """Count freshly paid units sold on `day`. Call inside the paying job's transaction."""
+    today = timezone.localdate()
+    age = (today - day).days
+    now = timezone.now()
+    for product_id, units in units_by_product.items():
+        if product_id is None or units <= 0:
+            continue
+        ranking, _ = ProductRanking.objects.select_for_update().get_or_create(
+            product_id=product_id
+        )
+        ProductRanking.objects.filter(pk=product_id).update(
+            units_total=F("units_total") + units,
+            units_30d=F("units_30d") + (units if age < 30 else 0),
+            units_7d=F("units_7d") + (units if age < 7 else 0),
+            trend_score=_log_add(ranking.trend_score, math.log(units) + _log_weight(day)),
+            refreshed_at=now,
+        )
+
+
+def refresh_rankings(today=None) -> int:
+    """Recompute every ranking from the daily product rollups; returns the row count."""
+    today = today or timezone.localdate()
+    sales = DailyProductSales.objects.filter(product__isnull=False).order_by()
+
+    def units_since(days):
+        rows = sales.filter(day__gt=today - timedelta(days=days)) if days else sales
+        units = rows.values("product_id").annotate(units=Sum("units"))
+        return dict(units.values_list("product_id", "units"))
+
+    totals, last_30, last_7 = units_since(None), units_since(30), units_since(7)
+    trend = defaultdict(lambda: None)
+    for product_id, day, units in (
+        sales.filter(day__gt=today - timedelta(days=TREND_WINDOW_DAYS), day__lte=today)
+        .values("product_id", "day")
+        .annotate(units=Sum("units"))
+        .values_list("product_id", "day", "units")
+    ):
+        if units > 0:
+            trend[product_id] = _log_add(trend[product_id], math.log(units) + _log_weight(day))
+
+    now = timezone.now()
+    with transaction.atomic():
+        ProductRanking.objects.all().delete()
+        ProductRanking.objects.bulk_create(
+            (
+                ProductRanking(
+                    product_id=product_id,
+                    units_total=units or 0,
+                    units_30d=last_30.get(product_id, 0),
+                    units_7d=last_7.get(product_id, 0),
+                    trend_score=trend.get(product_id),
+                    refreshed_at=now,
+                )
+                for product_id, units in totals.items()
+            ),
+            batch_size=1000,
+        )
+    return len(totals)
+
+
+def bestseller_ids(limit: int) -> list:
+    """Product ids with the most units sold in the last 30 days (index-ordered)."""
+    return list(
+        ProductRanking.objects.filter(units_30d__gt=0)
+        .order_by("-units_30d", "-units_total")
+        .values_list("product_id", flat=True)[:limit]
+    )
+
+
+# Sort name -> ranking columns, best first; each is ordered descending, nulls last
+RANKED_ORDERS = {
+    "bestsellers": ("units_30d", "units_total"),
+    "trending": ("trend_score",),
+}
+
+
+class RankedIds:
+    """
+    The matching products, one per group, in "bestsellers" or "trending" order,
+    as a lazy sequence for Paginator. Each slice is one query: the matching
+    variants are joined to ProductRanking, grouped by product group, ordered by
+    the group's best score (nulls last, then the lowest id) and cut to the page
+    in SQL, so a late page or a selective filter never reads the whole ranking.
+
+    `ids` are the groups' representative variants (the list's one card per
+    group), `group_of(id)` names a variant's group and `variant_ids` are all
+    matching variants, or None when the list is unfiltered.
+    """
+
+    def __init__(self, ids, by, group_of, variant_ids=None):
+        columns = RANKED_ORDERS[by]
+        products = Product.objects.all()
+        if variant_ids is not None:
+            products = products.filter(id__in=variant_ids)
+        # Ungrouped products are their own group, keyed like shop.facets does
+        self._groups = (
+            products.annotate(group_key=Coalesce("group_id", -F("id")))
+            .values("group_key")
+            .annotate(
+                first_id=Min("id"),
+                **{f"best_{column}": Max(f"ranking__{column}") for column in columns},
+            )
+            .order_by(
+                *(F(f"best_{column}").desc(nulls_last=True) for column in columns),
+                "first_id",
+            )
+            .values_list("group_key", flat=True)
+        )
+        self._ids = ids
+        self._group_of = group_of
+        self._representatives = None
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index : index + 1][0]
+        if self._representatives is None:
+            self._representatives = {self._group_of(pk): pk for pk in self._ids}
+        return [
+            self._representatives[key]
+            for key in self._groups[index]
+            if key in self._representatives
+        ]
@@ -0,0 +1,11 @@
+from django.dispatch import receiver
+
+from checkout.signals import order_paid
+from jobs.queue import enqueue
+
+from .rollups import add_order_to_rollups
+
+
+@receiver(order_paid, dispatch_uid="reports.add_order_to_rollups")
+def queue_rollup_update(sender, order, **kwargs):
+    enqueue(add_order_to_rollups, order_id=order.id)
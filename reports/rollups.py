@@ -0,0 +1,182 @@
+"""
+Pre-aggregated sales tables.
+
+An order is added to DailySalesRollup/DailyProductSales once, by the
+add_order_to_rollups job queued when it becomes paid (see receivers.py); the
+RolledUpOrder marker makes the job idempotent. `manage.py rebuild_sales_rollups`
+recomputes whole days from the raw orders, e.g. after refunds or a backfill.
+The same job bumps the product rankings (see rankings.py).
+
+Orders are bucketed by the local date of Order.created_at, like the other
+date-range tools (export_orders, resend_order_confirmations).
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, time as dt_time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from checkout.models import Order, OrderItem, OrderStatus
+
+from . import rankings
+from .models import DailyProductSales, DailySalesRollup, RolledUpOrder
+
+
+def day_bounds(day: date):
+    """Aware [start, end) datetimes of a local day."""
+    start = timezone.make_aware(datetime.combine(day, dt_time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), dt_time.min))
+
+
+def _increment(model, key: dict, **amounts) -> None:
+    row, _ = model.objects.get_or_create(**key)
+    model.objects.filter(pk=row.pk).update(
+        **{field: F(field) + value for field, value in amounts.items()}
+    )
+
+
+def add_order_to_rollups(order_id: int) -> None:
+    """Job: count one paid order into the rollup tables (no-op if already counted)."""
+    with transaction.atomic():
+        # The row lock serialises this with rebuild_day for the same order
+        order = (
+            Order.objects.select_for_update()
+            .filter(id=order_id, status=OrderStatus.PAID)
+            .first()
+        )
+        if order is None or RolledUpOrder.objects.filter(order_id=order_id).exists():
+            return
+        day = timezone.localdate(order.created_at)
+        lines = list(
+            order.items.values("product_id", "product_name").annotate(
+                units=Sum("quantity"), revenue=Sum(F("unit_price") * F("quantity"))
+            )
+        )
+
+        _increment(
+            DailySalesRollup,
+            {"day": day, "shipping_method": order.shipping_method, "country": order.country},
+            order_count=1,
+            units=sum(line["units"] for line in lines),
+            revenue=order.total,
+            shipping=order.shipping_cost,
+        )
+        for line in lines:
+            _increment(
+                DailyProductSales,
+                {
+                    "day": day,
+                    "product_id": line["product_id"],
+                    "product_name": line["product_name"],
+                },
+                order_count=1,
+                units=line["units"],
+                revenue=line["revenue"],
+            )
+        units_by_product = defaultdict(int)
+        for line in lines:
+            units_by_product[line["product_id"]] += line["units"]
+        rankings.add_sales(day, units_by_product)
+        RolledUpOrder.objects.create(order=order, day=day)
+
+
+def rebuild_day(day: date) -> int:
+    """Recompute one day's rollup rows from the paid orders; returns the order count."""
+    start, end = day_bounds(day)
+    with transaction.atomic():
+        orders = Order.objects.filter(
+            status=OrderStatus.PAID, created_at__gte=start, created_at__lt=end
+        )
+        order_ids = list(orders.select_for_update().values_list("id", flat=True))
+
+        RolledUpOrder.objects.filter(day=day).delete()
+        DailySalesRollup.objects.filter(day=day).delete()
+        DailyProductSales.objects.filter(day=day).delete()
+        if not order_ids:
+            return 0
+
+        items = OrderItem.objects.filter(order__in=orders)
+        units = {
+            (row["order__shipping_method"], row["order__country"]): row["units"]
+            for row in items.values("order__shipping_method", "order__country").annotate(
+                units=Sum("quantity")
+            )
+        }
+        DailySalesRollup.objects.bulk_create(
+            DailySalesRollup(
+                day=day,
+                units=units.get((row["shipping_method"], row["country"])) or 0,
+                **row,
+            )
+            for row in orders.order_by()
+            .values("shipping_method", "country")
+            .annotate(order_count=Count("id"), revenue=Sum("total"), shipping=Sum("shipping_cost"))
+        )
+        DailyProductSales.objects.bulk_create(
+            DailyProductSales(day=day, **row)
+            for row in items.order_by()
+            .values("product_id", "product_name")
+            .annotate(
+                order_count=Count("order", distinct=True),
+                units=Sum("quantity"),
+                revenue=Sum(F("unit_price") * F("quantity")),
+            )
+        )
+        RolledUpOrder.objects.bulk_create(
+            (RolledUpOrder(order_id=order_id, day=day) for order_id in order_ids),
+            batch_size=1000,
+        )
+    return len(order_ids)
+
+
+def first_order_day():
+    created = (
+        Order.objects.filter(status=OrderStatus.PAID)
+        .order_by("created_at")
+        .values_list("created_at", flat=True)
+        .first()
+    )
+    return timezone.localdate(created) if created else None
+
+
+def summarize(date_from: date, date_to: date, top_products: int = 10) -> dict:
+    """Dashboard figures for [date_from, date_to], read from the rollup tables only."""
+    rows = DailySalesRollup.objects.filter(day__gte=date_from, day__lte=date_to).order_by()
+    sums = dict(
+        order_count=Sum("order_count"),
+        units=Sum("units"),
+        revenue=Sum("revenue"),
+        shipping=Sum("shipping"),
+    )
+
+    totals = {key: value or 0 for key, value in rows.aggregate(**sums).items()}
+    by_day = {row["day"]: row for row in rows.values("day").annotate(**sums)}
+    days = []
+    day = date_from
+    while day <= date_to:
+        row = by_day.get(day) or {"day": day, "order_count": 0, "units": 0, "revenue": 0}
+        days.append(row)
+        day += timedelta(days=1)
+
+    def _breakdown(field):
+        return list(rows.values(field).annotate(**sums).order_by("-revenue"))
+
+    products = (
+        DailyProductSales.objects.filter(day__gte=date_from, day__lte=date_to)
+        .values("product_id", "product_name")
+        .annotate(units=Sum("units"), revenue=Sum("revenue"), order_count=Sum("order_count"))
+        .order_by("-revenue")[:top_products]
+    )
+    summary = {
+        "totals": totals,
+        "days": days,
+        "by_shipping_method": _breakdown("shipping_method"),
+        "by_country": _breakdown("country"),
+        "top_products": list(products),
+    }
+    for group in (totals, *days, *summary["by_shipping_method"], *summary["by_country"]):
+        count = group["order_count"]
+        group["average_order_value"] = group["revenue"] // count if count else 0
+    return summary
@@ -0,0 +1,149 @@
+import json
+from datetime import datetime, timedelta
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from checkout.models import Order, OrderItem
+from reports.analytics import SalesAnalytics, build_report
+from shop.models import Product
+
+
+class SalesAnalyticsTests(TestCase):
+    """
+    sales_report streams order lines into NumPy columns and reduces them chunk by
+    chunk; results must not depend on where chunk boundaries fall.
+    """
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.tee = Product.objects.create(name="Tee", description="-", price=20, color="Black")
+        self.user = get_user_model().objects.create_user("anna", "anna@example.com", "pw")
+
+    def _order(self, email, lines, months_ago=0, country="SE", status="paid", user=None):
+        order = Order.objects.create(email=email, country=country, status=status, user=user)
+        for product, price, qty, size in lines:
+            OrderItem.objects.create(
+                order=order,
+                product=product,
+                product_name="x",
+                unit_price=price,
+                quantity=qty,
+                size=size,
+            )
+        # Noon on the 1st of the month, `months_ago` calendar months back
+        month = self.today.year * 12 + self.today.month - 1 - months_ago
+        created = datetime(month // 12, month % 12 + 1, 1, 12)
+        Order.objects.filter(id=order.id).update(created_at=timezone.make_aware(created))
+        return order
+
+    def _fixture(self):
+        self._order("bob@example.com", [(self.tee, 2000, 2, "M"), (None, 500, 1, "")], 2)
+        self._order("Bob@Example.com ", [(self.tee, 2000, 1, "S")], 0, country="FI")
+        self._order("x@example.com", [(self.tee, 2000, 1, "M")], 0, user=self.user)
+        self._order("anna@example.com", [(self.tee, 2000, 3, "M")], 1, user=self.user)
+        self._order("carl@example.com", [(self.tee, 2000, 9, "M")], 0, status="cancelled")
+
+    def _report(self, chunk_size):
+        return build_report(self.today - timedelta(days=365), self.today, chunk_size=chunk_size)
+
+    def test_reports(self):
+        self._fixture()
+        report = self._report(chunk_size=1000)
+
+        self.assertEqual(
+            report["summary"],
+            [
+                {
+                    "lines": 5,
+                    "orders": 4,
+                    "customers": 2,  # bob as a guest (any case), anna by user id
+                    "repeat_customers": 2,
+                    "units": 8,
+                    "revenue": 14500,
+                    "average_order_value": 3625,
+                    "average_basket_units": 2.0,
+                }
+            ],
+        )
+        self.assertEqual(
+            [(r["country"], r["orders"], r["units"]) for r in report["countries"]],
+            [("SE", 3, 7), ("FI", 1, 1)],
+        )
+        self.assertCountEqual(
+            [(r["color"], r["size"], r["units"]) for r in report["variants"]],
+            [("Black", "M", 6), ("Black", "S", 1), ("", "", 1)],
+        )
+        self.assertEqual(
+            [(r["product_id"], r["units"]) for r in report["products"]],
+            [(self.tee.id, 7), (None, 1)],
+        )
+        self.assertEqual(
+            [(r["units"], r["orders"]) for r in report["basket_sizes"]],
+            [("1", 2), ("3", 2)],
+        )
+        self.assertEqual(
+            report["repeat"], [{"orders_per_customer": "2", "customers": 2, "share": 1.0}]
+        )
+        self.assertEqual(
+            [(r["months_since_first_order"], r["customers"]) for r in report["cohorts"]],
+            [(0, 1), (2, 1), (0, 1), (1, 1)],
+        )
+
+    def test_chunk_boundaries_do_not_change_results(self):
+        self._fixture()
+        # chunk_size=1 splits bob's first order across chunks
+        self.assertEqual(self._report(chunk_size=1), self._report(chunk_size=1000))
+
+    def test_empty_range(self):
+        report = self._report(chunk_size=10)
+
+        self.assertEqual(report["summary"][0]["orders"], 0)
+        self.assertEqual(report["cohorts"], [])
+
+    def test_accumulators_grow_per_chunk(self):
+        analytics = SalesAnalytics()
+        columns = {
+            "order_id": np.array([1, 1, 2]),
+            "product_id": np.array([5, -1, 5]),
+            "unit_price": np.array([100, 50, 100]),
+            "quantity": np.array([1, 2, 3]),
+            "month": np.array([24000, 24000, 24001]),
+            "country": np.array(["SE", "SE", "NO"], dtype=object),
+            "status": np.array(["paid"] * 3, dtype=object),
+            "user_id": np.array([-1, -1, 7]),
+            "email": np.array(["a@x.se", "a@x.se", "b@x.se"], dtype=object),
+            "color": np.array(["", "", ""], dtype=object),
+            "size": np.array(["M", "M", "L"], dtype=object),
+        }
+        analytics.add_chunk(columns)
+
+        report = analytics.report(["summary", "products"])
+
+        self.assertEqual(report["summary"][0]["revenue"], 500)
+        self.assertEqual([r["product_id"] for r in report["products"]], [5, None])
+
+    def test_command_writes_json_and_csv(self):
+        self._fixture()
+
+        out = StringIO()
+        call_command("sales_report", stdout=out, stderr=StringIO())
+        self.assertEqual(json.loads(out.getvalue())["summary"][0]["orders"], 4)
+
+        out = StringIO()
+        call_command(
+            "sales_report",
+            "--format", "csv",
+            "--report", "countries",
+            "--status", "cancelled",
+            stdout=out,
+            stderr=StringIO(),
+        )
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            ["# countries", "country,orders,units,revenue", "SE,1,9,18000"],
+        )
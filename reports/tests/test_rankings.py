@@ -0,0 +1,144 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from checkout import transitions
+from checkout.models import Order, OrderItem
+from jobs.models import Job
+from jobs.queue import run_job
+from reports.models import DailyProductSales, ProductRanking
+from reports.rankings import RankedIds, bestseller_ids, refresh_rankings
+from reports.rollups import add_order_to_rollups
+from shop.models import Product
+
+
+@override_settings(
+    STRIPE_USE_STUB=True,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class ProductRankingTests(TestCase):
+    """
+    Rankings are bumped by the paid-order rollup job and recomputed from the daily
+    product rollups; the shop sorts and the home page read them by index.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.tee, self.bra, self.cap = (
+            Product.objects.create(name=name, description="-", price=20)
+            for name in ("Tee", "Bra", "Cap")
+        )
+        self.today = timezone.localdate()
+
+    def _sales(self, days_ago, product, units):
+        DailyProductSales.objects.create(
+            day=self.today - timedelta(days=days_ago),
+            product=product,
+            product_name=product.name,
+            order_count=1,
+            units=units,
+            revenue=units * 2000,
+        )
+
+    def _ranking(self, product):
+        ranking = ProductRanking.objects.get(product=product)
+        return ranking.units_total, ranking.units_30d, ranking.units_7d
+
+    def test_paid_order_job_updates_rankings_once(self):
+        order = Order.objects.create(email="anna@example.com", status="pending", total=100)
+        OrderItem.objects.create(order=order, product=self.tee, unit_price=2000, quantity=2)
+        OrderItem.objects.create(order=order, product=self.tee, unit_price=2000, quantity=1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transitions.mark_paid(order.id)
+        run_job(Job.objects.get(task="reports.rollups.add_order_to_rollups").id)
+        add_order_to_rollups(order.id)  # retried job is a no-op
+
+        self.assertEqual(self._ranking(self.tee), (3, 3, 3))
+        self.assertIsNotNone(ProductRanking.objects.get(product=self.tee).trend_score)
+
+    def test_refresh_ages_units_out_of_the_windows(self):
+        self._sales(0, self.tee, 1)
+        self._sales(10, self.tee, 2)
+        self._sales(40, self.tee, 4)
+
+        call_command("refresh_product_rankings", stdout=StringIO())
+
+        self.assertEqual(self._ranking(self.tee), (7, 3, 1))
+        self.assertFalse(ProductRanking.objects.filter(product=self.bra).exists())
+
+    def test_trend_prefers_recent_sales(self):
+        self._sales(20, self.tee, 10)  # more units, but weeks ago
+        self._sales(1, self.bra, 3)
+        self._sales(0, self.cap, 1)
+        refresh_rankings()
+
+        trending = list(
+            ProductRanking.objects.order_by("-trend_score").values_list("product__name", flat=True)
+        )
+
+        self.assertEqual(trending, ["Bra", "Cap", "Tee"])
+        self.assertEqual(bestseller_ids(2), [self.tee.pk, self.bra.pk])
+
+    def test_incremental_trend_matches_refresh(self):
+        for days_ago, product, units in ((5, self.tee, 2), (0, self.tee, 1), (2, self.bra, 4)):
+            order = Order.objects.create(
+                email="anna@example.com",
+                status="paid",
+                total=100,
+                created_at=timezone.now() - timedelta(days=days_ago),
+            )
+            OrderItem.objects.create(order=order, product=product, unit_price=2000, quantity=units)
+            add_order_to_rollups(order.id)
+        incremental = dict(ProductRanking.objects.values_list("product_id", "trend_score"))
+
+        refresh_rankings()
+
+        for product_id, score in ProductRanking.objects.values_list("product_id", "trend_score"):
+            self.assertAlmostEqual(score, incremental[product_id])
+
+    def test_product_list_sorts_by_rankings(self):
+        self._sales(20, self.tee, 10)
+        self._sales(1, self.bra, 3)
+        refresh_rankings()
+        url = reverse("product_list")
+
+        bestsellers = self.client.get(url, {"sort": "bestsellers"}).context["page_obj"]
+        trending = self.client.get(url, {"sort": "trending"}).context["page_obj"]
+
+        # Unranked products come last
+        self.assertEqual([p.name for p in bestsellers], ["Tee", "Bra", "Cap"])
+        self.assertEqual([p.name for p in trending], ["Bra", "Tee", "Cap"])
+
+    def test_ranked_ids_order_and_slice_in_sql(self):
+        for units, product in ((5, self.tee), (3, self.bra), (1, self.cap)):
+            self._sales(1, product, units)
+        refresh_rankings()
+        group_of = dict(Product.objects.values_list("id", "group_id")).get
+        ids = [self.cap.pk, self.bra.pk, self.tee.pk]
+
+        ranked = RankedIds(ids, "bestsellers", group_of)
+        with self.assertNumQueries(1):
+            self.assertEqual(ranked[1:2], [self.bra.pk])
+        self.assertEqual(ranked[0:3], [self.tee.pk, self.bra.pk, self.cap.pk])
+        # Only the matching variants are ranked
+        filtered = RankedIds(ids[:2], "bestsellers", group_of, variant_ids=ids[:2])
+        self.assertEqual(filtered[0:3], [self.bra.pk, self.cap.pk])
+
+    def test_home_shows_bestsellers(self):
+        self._sales(1, self.bra, 3)
+        refresh_rankings()
+
+        resp = self.client.get(reverse("home"))
+
+        self.assertContains(resp, reverse("product_detail", args=[self.bra.pk]))
+        self.assertNotContains(resp, reverse("product_detail", args=[self.cap.pk]))
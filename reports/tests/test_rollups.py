@@ -0,0 +1,125 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from checkout import transitions
+from checkout.models import Order, OrderItem
+from jobs.models import Job
+from jobs.queue import run_job
+from reports.models import DailyProductSales, DailySalesRollup
+from reports.rollups import add_order_to_rollups, summarize
+
+
+@override_settings(
+    STRIPE_USE_STUB=True,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class SalesRollupTests(TestCase):
+    """
+    Paid orders are added to the daily rollups by a job, once; the rebuild command
+    recomputes the same rows from raw orders; the dashboard reads only rollups.
+    """
+
+    def _order(self, total, items, status="pending", country="SE", method="standard"):
+        order = Order.objects.create(
+            email="anna@example.com",
+            status=status,
+            country=country,
+            shipping_method=method,
+            shipping_cost=500,
+            total=total,
+        )
+        for name, price, qty in items:
+            OrderItem.objects.create(order=order, product_name=name, unit_price=price, quantity=qty)
+        return order
+
+    def _rows(self):
+        sales = DailySalesRollup.objects.order_by("country").values_list(
+            "day", "shipping_method", "country", "order_count", "units", "revenue", "shipping"
+        )
+        products = DailyProductSales.objects.order_by("product_name").values_list(
+            "day", "product_name", "order_count", "units", "revenue"
+        )
+        return list(sales), list(products)
+
+    def test_paid_order_is_rolled_up_once_by_the_job(self):
+        order = self._order(4500, [("Tee", 2000, 2)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transitions.mark_paid(order.id)
+        job = Job.objects.get(task="reports.rollups.add_order_to_rollups")
+        run_job(job.id)
+        add_order_to_rollups(order.id)  # retried job: no double counting
+
+        today = timezone.localdate()
+        self.assertEqual(
+            self._rows(),
+            (
+                [(today, "standard", "SE", 1, 2, 4500, 500)],
+                [(today, "Tee", 1, 2, 4000)],
+            ),
+        )
+
+    def test_unpaid_orders_are_ignored(self):
+        order = self._order(4500, [("Tee", 2000, 2)])
+
+        add_order_to_rollups(order.id)
+
+        self.assertFalse(DailySalesRollup.objects.exists())
+
+    def test_rebuild_matches_incremental_rollups(self):
+        orders = [
+            self._order(4500, [("Tee", 2000, 2)], status="paid"),
+            self._order(2500, [("Tee", 2000, 1)], status="paid"),
+            self._order(3000, [("Cap", 1250, 2)], status="paid", country="FI"),
+        ]
+        self._order(9900, [("Tee", 2000, 4)])  # pending: not counted
+        for order in orders:
+            add_order_to_rollups(order.id)
+        incremental = self._rows()
+
+        call_command("rebuild_sales_rollups", stdout=StringIO())
+
+        self.assertEqual(self._rows(), incremental)
+        self.assertEqual(DailySalesRollup.objects.get(country="SE").order_count, 2)
+
+        # A refunded order disappears from the rollups after a rebuild
+        Order.objects.filter(id=orders[2].id).update(status="cancelled")
+        call_command("rebuild_sales_rollups", stdout=StringIO())
+        self.assertFalse(DailySalesRollup.objects.filter(country="FI").exists())
+
+    def test_summary_reads_only_rollup_tables(self):
+        for total, country in ((4500, "SE"), (2500, "SE"), (3000, "FI")):
+            order = self._order(total, [("Tee", 2000, 1)], status="paid", country=country)
+            add_order_to_rollups(order.id)
+        today = timezone.localdate()
+
+        with CaptureQueriesContext(connection) as ctx:
+            summary = summarize(today - timedelta(days=6), today)
+
+        self.assertFalse(any("checkout_order" in q["sql"] for q in ctx.captured_queries))
+        self.assertEqual(len(summary["days"]), 7)
+        self.assertEqual(summary["totals"]["revenue"], 10000)
+        self.assertEqual(summary["totals"]["average_order_value"], 3333)
+        self.assertEqual([row["country"] for row in summary["by_country"]], ["SE", "FI"])
+
+    def test_admin_dashboard_renders(self):
+        add_order_to_rollups(self._order(4500, [("Tee", 2000, 2)], status="paid").id)
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin)
+
+        resp = self.client.get(reverse("admin:reports_sales_dashboard"), {"days": 7})
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "Average order value")
+        self.assertContains(resp, "Tee")
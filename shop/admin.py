@@ -1,11 +1,36 @@
 from django.contrib import admin
-from .models import Product, Review, Favorite
+from .models import SKU, Category, Product, ProductGroup, Review, Favorite
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ("name", "slug", "parent", "product_count")
+    readonly_fields = ("path", "product_count")
+    prepopulated_fields = {"slug": ("name",)}
+    search_fields = ("name", "slug")
+
+
+@admin.register(ProductGroup)
+class ProductGroupAdmin(admin.ModelAdmin):
+    list_display = ("name", "slug")
+    prepopulated_fields = {"slug": ("name",)}
+    search_fields = ("name", "slug")
+
+
+class SKUInline(admin.TabularInline):
+    model = SKU
+    extra = 0
+    fields = ("size", "position", "stock", "available")
+    # Reservations move `available`; editing stock shifts it by the same delta
+    readonly_fields = ("available",)
 
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ("name", "category", "price", "color", "hex")
+    list_display = ("name", "group", "category", "price", "color", "hex")
     list_filter = ("category", "color")
+    list_select_related = ("category", "group")
+    inlines = (SKUInline,)
     search_fields = ("name", "description")
 
 
@@ -1,5 +1,5 @@
 from decimal import Decimal, InvalidOperation
-from shop.models import Product
+from shop import lookup
 
 CART_SESSION_ID = "cart"
 
@@ -107,14 +107,14 @@ class Cart:
     def __iter__(self):
         """
         Iterate over cart items, yielding (key, item_dict_copy) where:
-          - item_dict_copy["product"] is attached
+          - item_dict_copy["product"] is attached (a shop.lookup.ProductRecord)
           - item_dict_copy["price"] is Decimal
           - item_dict_copy["total_price"] is Decimal(price * quantity)
         We DO NOT mutate session objects here.
         """
         valid_items = self._valid_items()
         product_ids = [itm["product_id"] for itm in valid_items]
-        products = {p.id: p for p in Product.objects.filter(id__in=product_ids)}
+        products = lookup.get_many(product_ids)
 
         for key, raw in self.cart.items():
             if not isinstance(raw, dict):
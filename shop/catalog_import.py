@@ -0,0 +1,305 @@
+"""
+Streaming catalog import for `manage.py import_catalog`.
+
+Supplier files (JSON array, JSON Lines or CSV; a Django fixture works too) are
+read row by row, never whole. Each row is matched to an existing product by
+(name, color), compared case-insensitively, and compared by a hash of its
+content fields, so unchanged rows cost one dict lookup. Changed and new rows
+are written per batch with bulk_update / bulk_create. Columns a row lacks keep
+their current value.
+
+Bulk writes skip Product.save() and its signals, so an import does what they
+would once, at the end: new products get their group and default SKUs per
+batch, and the catalog version (shop.lookup), category counts and cached
+recommendation cards are refreshed once in finish().
+"""
+
+import csv
+import hashlib
+import json
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import cache
+from django.db import transaction
+
+from recommendations.cards import card_cache_key
+
+from . import lookup
+from .models import Category, Product, ProductGroup, SKU
+
+FIELDS = (
+    "name",
+    "color",
+    "hex",
+    "description",
+    "price",
+    "category",
+    "image_catalog",
+    "image_details",
+)
+FORMATS = ("json", "jsonl", "csv")
+CHUNK_SIZE = 64 * 1024
+MAX_ERRORS = 100
+CENT = Decimal("0.01")
+MAX_PRICE = Decimal("9999.99")  # Product.price has max_digits=6
+# Text columns -> their max_length; longer values would fail the whole batch's write
+MAX_LENGTHS = {
+    name: Product._meta.get_field(name).max_length
+    for name in ("name", "color", "hex", "image_catalog", "image_details")
+}
+# New products: fields a row does not provide (updates keep the current value)
+NEW_DEFAULTS = {name: None for name in FIELDS} | {"description": ""}
+
+
+class RowError(ValueError):
+    """An incoming row that cannot be imported (reported, not fatal)."""
+
+
+# Readers: each yields one dict per row
+
+
+def read_rows(fp, fmt):
+    if fmt == "csv":
+        return csv.DictReader(fp)
+    if fmt == "jsonl":
+        return (json.loads(line) for line in fp if line.strip())
+    if fmt == "json":
+        return _fixture_rows(iter_json_array(fp))
+    raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}.")
+
+
+def iter_json_array(fp, chunk_size=CHUNK_SIZE):
+    """Yield the elements of a top-level JSON array, holding one chunk at a time."""
+    decoder = json.JSONDecoder()
+    buffer, pos, started = "", 0, False
+    while True:
+        # Skip separators; refill when the buffer is exhausted
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer):
+                break
+            chunk = fp.read(chunk_size)
+            if not chunk:
+                return
+            buffer, pos = chunk, 0
+        if not started:
+            if buffer[pos] != "[":
+                raise ValueError("Expected a JSON array.")
+            started, pos = True, pos + 1
+            continue
+        if buffer[pos] == "]":
+            return
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError:
+                chunk = fp.read(chunk_size)
+                if not chunk:
+                    raise
+                buffer, pos = buffer[pos:] + chunk, 0
+        yield item
+        pos = end
+
+
+def _fixture_rows(items):
+    """Fixture entries ({"model", "fields"}) become plain rows; other models are skipped."""
+    for item in items:
+        if "model" in item and "fields" in item:
+            if item["model"] == "shop.product":
+                yield item["fields"]
+        else:
+            yield item
+
+
+# Normalisation and hashing
+
+
+def _text(value) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def match_key(name, color) -> tuple:
+    return (_text(name).casefold(), _text(color).casefold())
+
+
+def content_hash(values: dict) -> str:
+    """Hash of the content fields, with None and "" treated alike."""
+    payload = json.dumps(
+        [_text(getattr(values[name], "pk", values[name])) for name in FIELDS], ensure_ascii=False
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+@dataclass
+class Change:
+    key: tuple
+    values: dict
+    product_id: int = None  # None: a new product
+    old: dict = None
+
+    @property
+    def changed_fields(self) -> list:
+        return [name for name in FIELDS if _text(self.old[name]) != _text(self.values[name])]
+
+    def describe(self) -> str:
+        color = self.values["color"]
+        label = self.values["name"] + (f" ({color})" if color else "")
+        if self.product_id is None:
+            return f"+ {label}"
+        changed = [
+            f"{name}: {_text(self.old[name])[:40]!r} -> {_text(self.values[name])[:40]!r}"
+            for name in self.changed_fields
+        ]
+        return f"~ {label} [#{self.product_id}] " + "; ".join(changed)
+
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: list = field(default_factory=list)  # the first MAX_ERRORS messages
+
+
+class CatalogImporter:
+    """Diffs rows against the catalog and applies the changes in batches."""
+
+    def __init__(self, batch_size=1000, dry_run=False, max_diff=50):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.max_diff = max_diff
+        self.stats = ImportStats()
+        self.diff = []  # the first max_diff changes, described (dry-run only)
+        self.changed_ids = []
+        self._seen = set()
+        self._categories = {}
+        for category in Category.objects.all():
+            self._categories[str(category.pk)] = category
+            self._categories[category.slug.casefold()] = category
+            self._categories.setdefault(category.name.casefold(), category)
+        by_id = {c.pk: c for c in self._categories.values()}
+        # key -> (product id, content hash, values)
+        self._existing = {}
+        for product_id, *row in Product.objects.values_list("id", *FIELDS).order_by("id"):
+            values = dict(zip(FIELDS, row))
+            values["category"] = by_id.get(values["category"])
+            key = match_key(values["name"], values["color"])
+            self._existing.setdefault(key, (product_id, content_hash(values), values))
+
+    def run(self, rows) -> ImportStats:
+        batch = []
+        for row in rows:
+            self.stats.rows += 1
+            change = self._diff(row)
+            if change is not None:
+                batch.append(change)
+            if len(batch) >= self.batch_size:
+                self._apply(batch)
+                batch = []
+        if batch:
+            self._apply(batch)
+        return self.stats
+
+    def finish(self) -> None:
+        """Refresh what the skipped save() signals would have, once per import."""
+        if self.dry_run or not (self.stats.created or self.stats.updated):
+            return
+        Category.refresh_counts()
+        cache.delete_many([card_cache_key(product_id) for product_id in self.changed_ids])
+        lookup.invalidate()
+
+    def _diff(self, row):
+        try:
+            values = self._clean(row)
+        except RowError as exc:
+            return self._invalid(exc)
+        key = match_key(values["name"], values.get("color"))
+        if key in self._seen:
+            self.stats.duplicates += 1
+            return None
+        self._seen.add(key)
+
+        existing = self._existing.get(key)
+        if existing is None:
+            if "price" not in values:
+                return self._invalid("missing price")
+            return Change(key, {**NEW_DEFAULTS, **values})
+        product_id, digest, old = existing
+        values = {**old, **values}
+        if digest == content_hash(values):
+            self.stats.unchanged += 1
+            return None
+        return Change(key, values, product_id=product_id, old=old)
+
+    def _invalid(self, reason):
+        self.stats.invalid += 1
+        if len(self.stats.errors) < MAX_ERRORS:
+            self.stats.errors.append(f"row {self.stats.rows}: {reason}")
+        return None
+
+    def _clean(self, row) -> dict:
+        """The row's fields, normalised. Columns the row lacks are left out."""
+        values = {name: row[name] for name in FIELDS if name in row}
+        values["name"] = _text(values.get("name"))
+        if not values["name"]:
+            raise RowError("missing name")
+        for name in ("color", "hex", "image_catalog", "image_details"):
+            if name in values:
+                values[name] = _text(values[name]) or None
+        for name, max_length in MAX_LENGTHS.items():
+            if len(values.get(name) or "") > max_length:
+                raise RowError(f"{name} longer than {max_length} characters")
+        if "description" in values:
+            values["description"] = _text(values["description"])
+        if "price" in values:
+            try:
+                price = Decimal(_text(values["price"]).replace(",", ".")).quantize(CENT)
+            except InvalidOperation:
+                price = None
+            if price is None or not price.is_finite() or not Decimal(0) <= price <= MAX_PRICE:
+                raise RowError(f"bad price {row['price']!r}")
+            values["price"] = price
+        if "category" in values:
+            category = _text(values["category"]).casefold()
+            values["category"] = self._categories.get(category) if category else None
+            if category and values["category"] is None:
+                raise RowError(f"unknown category {row['category']!r}")
+        return values
+
+    def _apply(self, batch) -> None:
+        new = [c for c in batch if c.product_id is None]
+        changed = [c for c in batch if c.product_id is not None]
+        if self.dry_run:
+            self._count(new, changed)
+            room = self.max_diff - len(self.diff)
+            self.diff += [c.describe() for c in batch[: max(room, 0)]]
+            return
+
+        with transaction.atomic():
+            if changed:
+                # Only the columns that differ somewhere in the batch: each listed
+                # column costs a CASE WHEN over every row in the UPDATE
+                fields = {name for c in changed for name in c.changed_fields}
+                Product.objects.bulk_update(
+                    [Product(id=c.product_id, **c.values) for c in changed],
+                    [name for name in FIELDS if name in fields],
+                )
+            if new:
+                groups = ProductGroup.for_names({c.values["name"] for c in new})
+                products = Product.objects.bulk_create(
+                    Product(group=groups[c.values["name"]], **c.values) for c in new
+                )
+                SKU.objects.bulk_create(Product.default_skus(products), ignore_conflicts=True)
+        # Counted once the batch has committed: a rolled-back batch imported nothing
+        self._count(new, changed)
+        self.changed_ids += [c.product_id for c in changed]
+
+    def _count(self, new, changed) -> None:
+        self.stats.created += len(new)
+        self.stats.updated += len(changed)
@@ -0,0 +1,257 @@
+"""
+In-memory faceted filtering for product_list.
+
+The whole catalog is loaded once per worker into a FacetIndex: products (color
+variants) get a dense position 0..n-1, every category and color value a boolean
+mask over those positions, and price, name and id orders are precomputed
+permutations. Any mix of multi-select facets and a price range is then a few
+NumPy mask operations. The result is an ordered id list to paginate with one
+variant per ProductGroup (the first in sort order), plus per-value counts.
+
+Counts are of product groups and follow the usual multi-select rule: a facet's
+counts apply every filter except that facet's own selection, so ticking a second
+color shows what it adds.
+
+Categories are matched by id, and a category's mask covers its subtree via the
+materialized Category.path, so no string comparison happens per product.
+
+The index is rebuilt when the catalog version from shop.lookup changes (any
+product or category save or delete) and, like the lookup records, after
+MAX_AGE_SECONDS.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+
+from . import lookup
+from .models import Category, Product
+
+FACETS = ("category", "color")
+# Sort name -> (precomputed order, descending)
+SORTS = {
+    "name_asc": ("name", False),
+    "name_desc": ("name", True),
+    "price_asc": ("price", False),
+    "price_desc": ("price", True),
+    "newest": ("id", True),
+}
+DEFAULT_SORT = "name_asc"
+
+
+class Facet:
+    """One boolean mask per facet value, over the index's product positions."""
+
+    def __init__(self, keys, labels, masks):
+        self.keys = keys
+        self.labels = labels
+        self.masks = masks
+        self.rows = {key: i for i, key in enumerate(keys)}
+
+    @classmethod
+    def from_values(cls, values):
+        """Text field; values match case-insensitively, like iexact."""
+        labels = {}
+        for value in values:
+            if value:
+                labels.setdefault(value.casefold(), value)
+        keys = sorted(labels, key=lambda key: (key, labels[key]))
+        rows = {key: i for i, key in enumerate(keys)}
+        return cls(keys, [labels[k] for k in keys], _masks(len(keys), values, rows, str.casefold))
+
+    @classmethod
+    def from_categories(cls, categories, category_ids):
+        """
+        Category FK, keyed by slug. A category's mask covers its whole subtree, found
+        by materialized-path prefix, so selecting a parent includes its children.
+        """
+        categories = sorted(categories, key=lambda c: c[3])  # (id, name, slug, path)
+        rows = {c[0]: i for i, c in enumerate(categories)}
+        direct = _masks(len(categories), category_ids, rows)
+        masks = np.array(
+            [
+                direct[[rows[d[0]] for d in categories if d[3].startswith(c[3])]].any(axis=0)
+                for c in categories
+            ],
+            dtype=bool,
+        ).reshape(len(categories), len(category_ids))
+        return cls([c[2] for c in categories], [c[1] for c in categories], masks)
+
+    def select(self, chosen):
+        """Mask of products with any of the chosen values, or None for no filter."""
+        if not chosen:
+            return None
+        rows = [self.rows[key] for key in {c.casefold() for c in chosen} if key in self.rows]
+        if not rows:
+            return np.zeros(self.masks.shape[1], dtype=bool)
+        return self.masks[rows].any(axis=0)
+
+    def counts(self, mask, group_starts):
+        """Matching product groups per value (positions are sorted by group)."""
+        if not len(group_starts):
+            return np.zeros(len(self.keys), dtype=np.int64)
+        return np.logical_or.reduceat(self.masks & mask, group_starts, axis=1).sum(axis=1)
+
+
+def _masks(count, values, rows, normalize=None):
+    """(count x len(values)) bool matrix with row rows[value] set at each position."""
+    positions = np.array(
+        [
+            rows.get(normalize(v) if normalize else v, -1) if v is not None else -1
+            for v in values
+        ],
+        dtype=np.int64,
+    )
+    masks = np.zeros((count, len(values)), dtype=bool)
+    present = positions >= 0
+    masks[positions[present], np.flatnonzero(present)] = True
+    return masks
+
+
+@dataclass
+class FacetResult:
+    ids: list  # one variant per product group, in sort order
+    variant_ids: list = field(default_factory=list)  # every matching variant, in sort order
+    counts: dict = field(default_factory=dict)
+    price_range: tuple = (None, None)
+
+    @property
+    def total(self):
+        return len(self.ids)
+
+
+class FacetIndex:
+    def __init__(self, rows, categories=()):
+        # (id, name, category_id, color, price, group_id); positions are sorted by
+        # group so a group's variants are contiguous. Ungrouped rows stand alone.
+        rows = sorted(rows, key=lambda r: (r[5] if r[5] is not None else -r[0], r[0]))
+        self.ids = np.array([r[0] for r in rows], dtype=np.int64)
+        self.groups = np.array([r[5] if r[5] is not None else -r[0] for r in rows], dtype=np.int64)
+        changes = self.groups[1:] != self.groups[:-1]
+        self.group_starts = np.flatnonzero(np.r_[len(rows) > 0, changes])
+        self.positions = {product_id: i for i, product_id in enumerate(self.ids.tolist())}
+        self.prices = np.array([int(r[4] * 100) for r in rows], dtype=np.int64)
+        self.facets = {
+            "category": Facet.from_categories(categories, [r[2] for r in rows]),
+            "color": Facet.from_values([r[3] for r in rows]),
+        }
+        positions = range(len(rows))
+        self.orders = {
+            "id": np.argsort(self.ids, kind="stable"),
+            "price": np.lexsort((self.ids, self.prices)),
+            "name": np.array(
+                sorted(positions, key=lambda i: (rows[i][1].casefold(), rows[i][1], rows[i][0])),
+                dtype=np.int64,
+            ),
+        }
+        self.all = np.ones(len(rows), dtype=bool)
+
+    @classmethod
+    def from_db(cls):
+        return cls(
+            Product.objects.values_list("id", "name", "category", "color", "price", "group"),
+            Category.objects.values_list("id", "name", "slug", "path"),
+        )
+
+    def search(
+        self,
+        selected=None,
+        min_cents=None,
+        max_cents=None,
+        only_ids=None,
+        sort=DEFAULT_SORT,
+        scope=None,
+    ) -> FacetResult:
+        """
+        Filter by {facet: [values]}, an inclusive price range in cents and an optional
+        id restriction (e.g. a text search); ids come back in `sort` order. `scope`
+        is a category slug the whole result, counts included, is limited to.
+        """
+        selected = selected or {}
+        base = self.all.copy()
+        if scope is not None:
+            base &= self.facets["category"].select([scope])
+        if min_cents is not None:
+            base &= self.prices >= min_cents
+        if max_cents is not None:
+            base &= self.prices <= max_cents
+        if only_ids is not None:
+            base &= np.isin(self.ids, np.fromiter(only_ids, dtype=np.int64))
+
+        masks = {name: self.facets[name].select(selected.get(name) or ()) for name in FACETS}
+        mask = base.copy()
+        for facet_mask in masks.values():
+            if facet_mask is not None:
+                mask &= facet_mask
+
+        counts = {}
+        for name, facet in self.facets.items():
+            others = base.copy()
+            for other, facet_mask in masks.items():
+                if other != name and facet_mask is not None:
+                    others &= facet_mask
+            chosen = {value.casefold() for value in selected.get(name) or ()}
+            counts[name] = [
+                {"value": key, "label": label, "count": int(n), "selected": key in chosen}
+                for key, label, n in zip(
+                    facet.keys, facet.labels, facet.counts(others, self.group_starts)
+                )
+            ]
+
+        order_key, descending = SORTS.get(sort, SORTS[DEFAULT_SORT])
+        order = self.orders[order_key]
+        if descending:
+            order = order[::-1]
+        matched = order[mask[order]]
+        prices = self.prices[mask]
+        return FacetResult(
+            ids=self.ids[self._first_per_group(matched)].tolist(),
+            variant_ids=self.ids[matched].tolist(),
+            counts=counts,
+            price_range=(int(prices.min()), int(prices.max())) if len(prices) else (None, None),
+        )
+
+    def group_of(self, product_id) -> int:
+        """The product's group key (ungrouped products are their own group)."""
+        return int(self.groups[self.positions[product_id]])
+
+    def collapse(self, variant_ids) -> list:
+        """Keep the first id of each product group, preserving order."""
+        positions = np.array([self.positions[i] for i in variant_ids], dtype=np.int64)
+        return self.ids[self._first_per_group(positions)].tolist()
+
+    def _first_per_group(self, positions):
+        _, first = np.unique(self.groups[positions], return_index=True)
+        return positions[np.sort(first)]
+
+
+_lock = threading.Lock()
+_index = None
+_version = None
+_built_at = 0.0
+
+
+def get_index() -> FacetIndex:
+    """This worker's index, rebuilt if the catalog changed."""
+    global _index, _version, _built_at
+    version = lookup.catalog_version()
+    with _lock:
+        stale = time.monotonic() - _built_at > lookup.MAX_AGE_SECONDS
+        if _index is None or version != _version or stale:
+            _index = FacetIndex.from_db()
+            _version, _built_at = version, time.monotonic()
+        return _index
+
+
+def parse_cents(value):
+    """Euro amount from a query string ("49", "49.90", "49,90") in cents, or None."""
+    try:
+        amount = Decimal(str(value).strip().replace(",", "."))
+    except (InvalidOperation, TypeError):
+        return None
+    if not amount.is_finite() or amount < 0:
+        return None
+    return int(amount * 100)
@@ -0,0 +1,151 @@
+"""
+Read-through product lookups for the cart and checkout.
+
+The cart, its context processor and the checkout views resolve the same few
+products several times per request. get_many() serves them from a per-worker
+LRU of small immutable ProductRecord objects and loads only the misses, in one
+query.
+
+The LRU is invalidated by a version token kept in the Django cache. Product and
+Category save/delete (see receivers.py) replace the token, and every worker drops its
+records the next time it sees a different token. Queryset .update() and
+bulk_update() send no signals, so code that uses them calls invalidate() itself.
+This needs a cache all processes share: deployed settings use the database
+cache. With a per-process backend (LocMemCache, local runs) other workers never
+see the new token, so records are also dropped after MAX_AGE_SECONDS.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.http import Http404
+
+from .models import Product
+
+MAX_SIZE = 2048
+MAX_AGE_SECONDS = 5 * 60
+VERSION_KEY = "shop:products:version"
+
+
+class ProductRecord:
+    """The product fields the cart and checkout need; price is in integer cents."""
+
+    __slots__ = ("id", "name", "color", "category_id", "price_cents", "image_catalog")
+
+    def __init__(self, id, name, color, category_id, price_cents, image_catalog):
+        for field, value in zip(
+            self.__slots__, (id, name, color, category_id, price_cents, image_catalog)
+        ):
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ProductRecord is immutable")
+
+    def __repr__(self):
+        return f"<ProductRecord {self.id}: {self.name}>"
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def price(self) -> Decimal:
+        """Price in euros, as Product.price."""
+        return Decimal(self.price_cents).scaleb(-2)
+
+    @classmethod
+    def from_row(cls, id, name, color, category_id, price, image_catalog):
+        return cls(id, name, color, category_id, int(price * 100), image_catalog or "")
+
+
+_FIELDS = ("id", "name", "color", "category", "price", "image_catalog")
+_lock = threading.Lock()
+_records = OrderedDict()
+_version = None
+_synced_at = 0.0
+
+
+def catalog_version() -> str:
+    """Token that changes whenever a product is saved, deleted or invalidate()d."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _sync() -> None:
+    """Drop every record if the version token changed or the records are too old."""
+    global _version, _synced_at
+    version = catalog_version()
+    now = time.monotonic()
+    if version != _version or now - _synced_at > MAX_AGE_SECONDS:
+        _records.clear()
+        _version, _synced_at = version, now
+
+
+def get_many(ids) -> dict:
+    """{id: ProductRecord} for the given ids; unknown ids are left out."""
+    wanted = {_as_int(value) for value in ids} - {None}
+    if not wanted:
+        return {}
+
+    with _lock:
+        _sync()
+        version = _version
+        found = {}
+        missing = set()
+        for product_id in wanted:
+            if product_id in _records:
+                _records.move_to_end(product_id)
+                found[product_id] = _records[product_id]
+            else:
+                missing.add(product_id)
+
+    if missing:
+        loaded = {
+            row[0]: ProductRecord.from_row(*row)
+            for row in Product.objects.filter(id__in=missing).values_list(*_FIELDS)
+        }
+        with _lock:
+            # Skip caching rows that may predate an invalidate() made while loading
+            if _version == version:
+                _records.update(loaded)
+                # Remember unknown ids too (stale carts); creating a product invalidates
+                _records.update(dict.fromkeys(missing - loaded.keys()))
+            while len(_records) > MAX_SIZE:
+                _records.popitem(last=False)
+        found.update(loaded)
+    return {product_id: record for product_id, record in found.items() if record is not None}
+
+
+def get(product_id):
+    """ProductRecord or None."""
+    return get_many([product_id]).get(_as_int(product_id))
+
+
+def get_or_404(product_id) -> ProductRecord:
+    record = get(product_id)
+    if record is None:
+        raise Http404("No product matches the given query.")
+    return record
+
+
+def invalidate() -> None:
+    """Make every worker reload products on its next lookup."""
+    global _version
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    with _lock:
+        _records.clear()
+        _version = None
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
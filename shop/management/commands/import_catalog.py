@@ -0,0 +1,89 @@
+from __future__ import annotations
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.catalog_import import FORMATS, CatalogImporter, read_rows
+
+EXTENSIONS = {".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Import or update products from a supplier file (JSON array or fixture, JSON Lines, "
+        "CSV with name,color,hex,description,price,category,image_catalog,image_details "
+        "columns). The file is streamed; rows are matched to products by (name, color) and "
+        "compared by content hash, and only new or changed rows are written, with "
+        "bulk_create/bulk_update per batch. Use --dry-run to see the diff without writing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import.")
+        parser.add_argument(
+            "--format", choices=FORMATS, help="File format (default: from the extension)."
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Rows per write batch (default: 1000)."
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report what would change."
+        )
+        parser.add_argument(
+            "--show",
+            type=int,
+            default=50,
+            help="Changes to list in --dry-run output (default: 50).",
+        )
+
+    def handle(self, *args, **opts):
+        path = Path(opts["path"])
+        if not path.is_file():
+            raise CommandError(f"No such file: {path}")
+        fmt = opts["format"] or EXTENSIONS.get(path.suffix.lower())
+        if fmt is None:
+            raise CommandError(f"Cannot tell the format of {path.name}; pass --format.")
+        if opts["batch_size"] <= 0:
+            raise CommandError("--batch-size must be positive.")
+
+        importer = CatalogImporter(
+            batch_size=opts["batch_size"], dry_run=opts["dry_run"], max_diff=opts["show"]
+        )
+        started = time.monotonic()
+        try:
+            with path.open(encoding="utf-8-sig", newline="") as fp:
+                try:
+                    stats = importer.run(read_rows(fp, fmt))
+                except ValueError as exc:  # malformed JSON/JSONL
+                    raise CommandError(f"{path.name}: {exc}") from exc
+        finally:
+            # Batches written before a failure still need their caches refreshed
+            importer.finish()
+        elapsed = time.monotonic() - started
+
+        if opts["dry_run"]:
+            self.stdout.write(self.style.MIGRATE_HEADING("Dry-run: changes that would be made"))
+            for line in importer.diff:
+                self.stdout.write(f"  {line}")
+            hidden = stats.created + stats.updated - len(importer.diff)
+            if hidden > 0:
+                self.stdout.write(f"  ... and {hidden} more")
+
+        for error in stats.errors:
+            self.stderr.write(self.style.WARNING(f"  {error}"))
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Summary"))
+        self.stdout.write(f"  Rows read  : {stats.rows}")
+        self.stdout.write(f"  Created    : {stats.created}")
+        self.stdout.write(f"  Updated    : {stats.updated}")
+        self.stdout.write(f"  Unchanged  : {stats.unchanged}")
+        self.stdout.write(f"  Duplicates : {stats.duplicates} (first row per name+color wins)")
+        self.stdout.write(f"  Invalid    : {stats.invalid}")
+        self.stdout.write(
+            f"  Elapsed    : {elapsed:.2f}s "
+            f"({stats.rows / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+        if opts["dry_run"]:
+            self.stdout.write(self.style.WARNING("Dry-run: nothing was written."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Import complete."))
@@ -0,0 +1,250 @@
+from __future__ import annotations
+import os
+import re
+import time
+from collections import defaultdict
+from pathlib import PurePosixPath
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from recommendations.cards import card_cache_key
+from shop import lookup
+from shop.models import Product
+
+IMG_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".svg"}
+# Product field -> media root directory its files live under
+FIELD_ROOTS = {"image_catalog": "catalog", "image_details": "details"}
+# Trailing random token added by storage on name clashes, e.g. tee_a1B2c3d
+RANDOM_SUFFIX = re.compile(r"([_-])[a-z0-9]{4,}$", re.IGNORECASE)
+SEPARATOR = re.compile(r"[-_. ]")
+
+
+def norm_rel_path(value: str) -> str:
+    """
+    Normalize a stored value to a media-relative POSIX path: forward slashes, no
+    leading /media/ or media/, no duplicate slashes, no stray 'media/' after the
+    root and no duplicated root ('catalog/catalog/...').
+    """
+    s = value.replace("\\", "/").strip()
+    for prefix in ("/media/", "media/"):
+        if s.startswith(prefix):
+            s = s[len(prefix) :]
+    s = re.sub(r"/{2,}", "/", s)
+    for root in FIELD_ROOTS.values():
+        if s.startswith(f"{root}/media/"):
+            s = f"{root}/" + s[len(f"{root}/media/") :]
+        while s.startswith(f"{root}/{root}/"):
+            s = s[len(root) + 1 :]
+    return s
+
+
+class MediaIndex:
+    """
+    Image files under MEDIA_ROOT, from one directory walk, indexed per root
+    (catalog/, details/) by exact path, basename, stem and stem prefix. Prefixes
+    end at a separator ("tee_pink_2" is found by "tee" and "tee_pink", not by
+    "te"), so every lookup is a dict hit and never touches the disk.
+    """
+
+    def __init__(self, paths):
+        self.paths = set()
+        self.by_name = defaultdict(lambda: defaultdict(list))
+        self.by_stem = defaultdict(lambda: defaultdict(list))
+        # (root, subdir or None) -> {prefix: first path in sorted order}
+        self.by_prefix = defaultdict(dict)
+        for rel in sorted(paths):
+            path = PurePosixPath(rel)
+            if path.suffix.lower() not in IMG_EXTS or len(path.parts) < 2:
+                continue
+            root = path.parts[0]
+            self.paths.add(rel)
+            self.by_name[root][path.name].append(rel)
+            self.by_stem[root][path.stem].append(rel)
+            keys = [(root, None)] + ([(root, path.parts[1])] if len(path.parts) >= 3 else [])
+            for match in SEPARATOR.finditer(path.stem):
+                for key in keys:
+                    self.by_prefix[key].setdefault(path.stem[: match.start()], rel)
+
+    @classmethod
+    def scan(cls, media_root) -> "MediaIndex":
+        media_root = os.fspath(media_root)
+
+        def walk():
+            for root in FIELD_ROOTS.values():
+                for dirpath, _, filenames in os.walk(os.path.join(media_root, root)):
+                    rel_dir = os.path.relpath(dirpath, media_root).replace(os.sep, "/")
+                    for filename in filenames:
+                        yield f"{rel_dir}/{filename}"
+
+        return cls(walk())
+
+    def __len__(self):
+        return len(self.paths)
+
+    def resolve(self, root: str, value: str) -> Optional[str]:
+        """
+        The existing file a stored value means, or None. Tried in order: the path
+        itself, the same basename, the same stem, a stem prefix, then the stem
+        without a storage suffix (exact, then prefix). Within each step a file in
+        the value's own subdirectory (catalog/<subdir>/...) wins.
+        """
+        rel = norm_rel_path(value)
+        if not rel.startswith(f"{root}/"):
+            rel = f"{root}/{rel.lstrip('/')}"
+        if rel in self.paths:
+            return rel
+
+        path = PurePosixPath(rel)
+        subdir = path.parts[1] if len(path.parts) >= 3 else None
+        stem = path.stem
+        if not stem:
+            return None
+        relaxed = RANDOM_SUFFIX.sub("", stem)
+        steps = [
+            lambda: self._exact(self.by_name[root].get(path.name), root, subdir),
+            lambda: self._exact(self.by_stem[root].get(stem), root, subdir),
+            lambda: self._with_prefix(root, subdir, stem),
+        ]
+        if relaxed != stem:
+            steps += [
+                lambda: self._exact(self.by_stem[root].get(relaxed), root, subdir),
+                lambda: self._with_prefix(root, subdir, relaxed),
+            ]
+        for step in steps:
+            found = step()
+            if found:
+                return found
+        return None
+
+    def _with_prefix(self, root, subdir, prefix):
+        """First file whose stem continues `prefix` after a separator, preferring `subdir`."""
+        for key in ((root, subdir), (root, None)) if subdir else ((root, None),):
+            found = self.by_prefix[key].get(prefix)
+            if found:
+                return found
+        return None
+
+    @staticmethod
+    def _exact(candidates, root, subdir):
+        if not candidates:
+            return None
+        if subdir:
+            for rel in candidates:
+                if rel.startswith(f"{root}/{subdir}/"):
+                    return rel
+        return candidates[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Repair Product.image_catalog / image_details paths against the files under "
+        "MEDIA_ROOT/catalog/** and details/**: normalize stray 'media/' segments and "
+        "duplicated roots, and find moved or renamed files by name, stem or stem prefix. "
+        "MEDIA_ROOT is walked once and every product is resolved against in-memory "
+        "indexes; fixes are written in one batched UPDATE. Use --apply to persist changes; "
+        "default is dry-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--apply", action="store_true", help="Persist changes (default: dry-run)."
+        )
+        parser.add_argument(
+            "--limit", type=int, default=None, help="Only process the first N products."
+        )
+        parser.add_argument(
+            "--show",
+            type=int,
+            default=50,
+            help="Changed products to list (default: 50; 0 lists none).",
+        )
+
+    def handle(self, *args, **opts):
+        apply_changes = opts["apply"]
+        if opts["limit"] is not None and opts["limit"] <= 0:
+            raise CommandError("--limit must be positive.")
+
+        started = time.monotonic()
+        index = MediaIndex.scan(settings.MEDIA_ROOT)
+        scanned_at = time.monotonic()
+        self.stdout.write(
+            self.style.NOTICE(
+                f"Indexed {len(index)} image files in {scanned_at - started:.2f}s "
+                f"(apply={apply_changes})..."
+            )
+        )
+
+        qs = Product.objects.order_by("id").values_list("id", "name", *FIELD_ROOTS)
+        if opts["limit"]:
+            qs = qs[: opts["limit"]]
+
+        total = 0
+        changed = []  # (product id, {field: path})
+        unresolved = dict.fromkeys(FIELD_ROOTS, 0)
+        for product_id, name, *values in qs.iterator(chunk_size=2000):
+            total += 1
+            current = dict(zip(FIELD_ROOTS, values))
+            fixed = {}
+            for field, root in FIELD_ROOTS.items():
+                value = current[field] or ""
+                if not value and field == "image_details" and current["image_catalog"]:
+                    # No detail image yet: look for one named like the catalog image
+                    found = index.resolve(root, PurePosixPath(current["image_catalog"]).stem)
+                else:
+                    found = index.resolve(root, value) if value else None
+                if found is None and value:
+                    unresolved[field] += 1
+                    found = norm_rel_path(value)  # best effort: at least a clean path
+                if found and found != value:
+                    fixed[field] = found
+            if fixed:
+                changed.append((product_id, {**current, **fixed}))
+                if len(changed) <= opts["show"]:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"#{product_id} {name}: "
+                            + ", ".join(f"{f}='{v}'" for f, v in fixed.items())
+                        )
+                    )
+
+        if changed and apply_changes:
+            self._write(changed)
+            # The batched write skips the save signals: refresh what they would have
+            cache.delete_many([card_cache_key(product_id) for product_id, _ in changed])
+            lookup.invalidate()
+        elif not apply_changes:
+            self.stdout.write(self.style.WARNING("Dry-run complete (no DB changes were made)."))
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.MIGRATE_HEADING("Summary"))
+        self.stdout.write(f"  Image files      : {len(index)}")
+        self.stdout.write(f"  Products scanned : {total}")
+        self.stdout.write(
+            f"  Updated records  : {len(changed)}{' (saved)' if apply_changes else ' (dry-run)'}"
+        )
+        self.stdout.write(f"  Missing catalog  : {unresolved['image_catalog']}")
+        self.stdout.write(f"  Missing details  : {unresolved['image_details']}")
+        self.stdout.write(f"  Elapsed          : {elapsed:.2f}s")
+
+    @staticmethod
+    def _write(changed):
+        """
+        All fixes in one batched statement. Same effect as bulk_update, which
+        builds a CASE WHEN per row and spends ~0.5 ms/row doing so (~50 s for 100k
+        products); executemany of one parameterized UPDATE takes well under a second.
+        """
+        quote = connection.ops.quote_name
+        columns = [Product._meta.get_field(field).column for field in FIELD_ROOTS]
+        sql = "UPDATE {} SET {} WHERE {} = %s".format(
+            quote(Product._meta.db_table),
+            ", ".join(f"{quote(column)} = %s" for column in columns),
+            quote(Product._meta.pk.column),
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                sql, [[paths[field] for field in FIELD_ROOTS] + [pk] for pk, paths in changed]
+            )
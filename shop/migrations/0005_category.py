@@ -0,0 +1,116 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+# (name, slug, parent slug). "Clothes" was a near-duplicate of "Clothing" and
+# "Strength Equipment" becomes a subcategory of "Equipment".
+TAXONOMY = [
+    ("Clothing", "clothing", None),
+    ("Accessories", "accessories", None),
+    ("Equipment", "equipment", None),
+    ("Strength Equipment", "strength-equipment", "equipment"),
+]
+ALIASES = {"clothes": "clothing"}
+
+
+def create_categories(apps, schema_editor):
+    Category = apps.get_model("shop", "Category")
+    Product = apps.get_model("shop", "Product")
+
+    by_slug = {}
+
+    def add(name, slug, parent=None):
+        category = Category.objects.create(name=name, slug=slug, parent=parent)
+        category.path = f"{parent.path if parent else ''}{category.pk}/"
+        category.save(update_fields=["path"])
+        by_slug[slug] = category
+        return category
+
+    for name, slug, parent in TAXONOMY:
+        add(name, slug, by_slug.get(parent))
+
+    for name in (
+        Product.objects.exclude(category_name__isnull=True)
+        .exclude(category_name="")
+        .values_list("category_name", flat=True)
+        .distinct()
+    ):
+        slug = ALIASES.get(name.casefold(), slugify(name))
+        category = by_slug.get(slug) or add(name, slug)
+        Product.objects.filter(category_name=name).update(category=category)
+
+    for category in by_slug.values():
+        category.product_count = Product.objects.filter(
+            category__path__startswith=category.path
+        ).count()
+        category.save(update_fields=["product_count"])
+
+
+def restore_names(apps, schema_editor):
+    Product = apps.get_model("shop", "Product")
+    for product in Product.objects.filter(category__isnull=False).select_related("category"):
+        product.category_name = product.category.name
+        product.save(update_fields=["category_name"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0004_favorite"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Category",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("slug", models.SlugField(max_length=100, unique=True)),
+                (
+                    "path",
+                    models.CharField(db_index=True, default="", editable=False, max_length=255),
+                ),
+                ("product_count", models.PositiveIntegerField(default=0, editable=False)),
+                (
+                    "parent",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="children",
+                        to="shop.category",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "categories",
+                "ordering": ["path"],
+            },
+        ),
+        migrations.RenameField(
+            model_name="product",
+            old_name="category",
+            new_name="category_name",
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="category",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="products",
+                to="shop.category",
+            ),
+        ),
+        migrations.RunPython(create_categories, restore_names),
+        migrations.RemoveField(
+            model_name="product",
+            name="category_name",
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+CLOTHING_SIZES = ("XS", "S", "M", "L", "XL")
+
+
+def group_variants(apps, schema_editor):
+    """One group per product name; default SKUs per variant (sizes for clothing)."""
+    Category = apps.get_model("shop", "Category")
+    Product = apps.get_model("shop", "Product")
+    ProductGroup = apps.get_model("shop", "ProductGroup")
+    SKU = apps.get_model("shop", "SKU")
+
+    clothing = Category.objects.filter(slug="clothing").first()
+    groups = {}
+    for product in Product.objects.select_related("category").order_by("id"):
+        slug = slugify(product.name)[:255] or "product"
+        if slug not in groups:
+            groups[slug], _ = ProductGroup.objects.get_or_create(
+                slug=slug, defaults={"name": product.name}
+            )
+        product.group = groups[slug]
+        product.save(update_fields=["group"])
+        sized = clothing and product.category and product.category.path.startswith(clothing.path)
+        SKU.objects.bulk_create(
+            SKU(product=product, size=size, position=i)
+            for i, size in enumerate(CLOTHING_SIZES if sized else ("",))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0005_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.SlugField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='variants', to='shop.productgroup'),
+        ),
+        migrations.CreateModel(
+            name='SKU',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('size', models.CharField(blank=True, default='', max_length=8)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skus', to='shop.product')),
+            ],
+            options={
+                'verbose_name': 'SKU',
+                'ordering': ['product', 'position', 'id'],
+                'constraints': [models.UniqueConstraint(fields=('product', 'size'), name='uniq_sku_product_size')],
+            },
+        ),
+        migrations.RunPython(group_variants, migrations.RunPython.noop),
+    ]
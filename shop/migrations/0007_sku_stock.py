@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0006_product_groups_skus'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sku',
+            name='available',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sku',
+            name='stock',
+            field=models.IntegerField(blank=True, help_text='Units on hand; blank = untracked', null=True),
+        ),
+    ]
@@ -1,28 +1,150 @@
 from pathlib import Path
 from django.db import models
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.templatetags.static import static
-from django.db.models import Avg, Q
+from django.db.models import Avg, Count, Q, Value
+from django.db.models.functions import Concat, Substr
 from django.utils import timezone
+from django.utils.text import slugify
 
 
-class Product(models.Model):
-    # Choices matching fixtures
-    CATEGORY_CHOICES = [
-        ("Clothing", "Clothing"),
-        ("Clothes", "Clothes"),  
-        ("Accessories", "Accessories"),
-        ("Equipment", "Equipment"),
-        ("Strength Equipment", "Strength Equipment"),
-    ]
+CLOTHING_SIZES = ("XS", "S", "M", "L", "XL")
+
+
+def normalize_size(size) -> str:
+    """Cart/order size to SKU size: None, "" and "NA" all mean one-size ("")."""
+    size = str(size or "").strip()
+    return "" if size.upper() == "NA" else size
+
+
+class Category(models.Model):
+    """
+    Product taxonomy. `path` is the materialized path of ids ("1/4/"), so a
+    category's subtree is one indexed prefix match: path__startswith=self.path.
+    `product_count` includes the subtree and is kept current by receivers.py.
+    """
+
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100, unique=True)
+    parent = models.ForeignKey(
+        "self", on_delete=models.PROTECT, null=True, blank=True, related_name="children"
+    )
+    path = models.CharField(max_length=255, db_index=True, editable=False, default="")
+    product_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        verbose_name_plural = "categories"
+        ordering = ["path"]
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        if self.pk and self.parent_id and self.parent.path.startswith(self.path):
+            raise ValidationError({"parent": "A category cannot be moved below itself."})
+
+    def save(self, *args, **kwargs):
+        if self.pk is None:
+            super().save(*args, **kwargs)  # the path needs the id
+            self.path = self._parent_path() + f"{self.pk}/"
+            Category.objects.filter(pk=self.pk).update(path=self.path)
+            return
+        old_path, self.path = self.path, self._parent_path() + f"{self.pk}/"
+        if old_path and old_path != self.path:
+            # Re-root the subtree that moves with this category (before post_save counts)
+            Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(Value(self.path), Substr("path", len(old_path) + 1))
+            )
+        super().save(*args, **kwargs)
+
+    def _parent_path(self):
+        return self.parent.path if self.parent_id else ""
+
+    def subtree(self):
+        """This category and all its descendants."""
+        return Category.objects.filter(path__startswith=self.path)
+
+    @classmethod
+    def refresh_counts(cls, category_ids=None) -> None:
+        """
+        Recompute product_count (subtree totals) for every category, or, given
+        `category_ids`, only for those categories and their ancestors: the only
+        counts a product entering or leaving them changes.
+        """
+        if category_ids is not None:
+            paths = cls.objects.filter(
+                id__in=[i for i in category_ids if i is not None]
+            ).values_list("path", flat=True)
+            ancestor_ids = {int(i) for path in paths for i in path.split("/")[:-1]}
+            for category in cls.objects.filter(id__in=ancestor_ids).only("path", "product_count"):
+                total = Product.objects.filter(category__path__startswith=category.path).count()
+                if total != category.product_count:
+                    cls.objects.filter(pk=category.pk).update(product_count=total)
+            return
+        direct = dict(
+            Product.objects.filter(category__isnull=False)
+            .values("category")
+            .annotate(n=Count("id"))
+            .values_list("category", "n")
+        )
+        categories = list(cls.objects.only("id", "path", "product_count"))
+        totals = dict.fromkeys((c.id for c in categories), 0)
+        for category in categories:
+            for ancestor_id in category.path.split("/")[:-1]:
+                if int(ancestor_id) in totals:
+                    totals[int(ancestor_id)] += direct.get(category.id, 0)
+        changed = [c for c in categories if c.product_count != totals[c.id]]
+        for category in changed:
+            category.product_count = totals[category.id]
+        cls.objects.bulk_update(changed, ["product_count"])
+
+
+class ProductGroup(models.Model):
+    """
+    A product as customers see it in the catalog grid. Each color is a Product
+    row (the variant) in the group, and each size of a color is a SKU.
+    """
 
+    name = models.CharField(max_length=255)
+    slug = models.SlugField(max_length=255, unique=True)
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def slug_for(name) -> str:
+        return slugify(name)[:255] or "product"
+
+    @classmethod
+    def for_name(cls, name):
+        group, _ = cls.objects.get_or_create(slug=cls.slug_for(name), defaults={"name": name})
+        return group
+
+    @classmethod
+    def for_names(cls, names) -> dict:
+        """{name: group} for many names: one lookup, one bulk insert for new groups."""
+        slugs = {name: cls.slug_for(name) for name in names}
+        cls.objects.bulk_create(
+            (cls(name=name, slug=slug) for name, slug in slugs.items()), ignore_conflicts=True
+        )
+        groups = cls.objects.in_bulk(set(slugs.values()), field_name="slug")
+        return {name: groups[slug] for name, slug in slugs.items()}
+
+
+class Product(models.Model):
     name = models.CharField(max_length=255)
     color = models.CharField(max_length=50, blank=True, null=True)
     hex = models.CharField(max_length=7, blank=True, null=True)
     description = models.TextField()
     price = models.DecimalField(max_digits=6, decimal_places=2)
-    category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, blank=True, null=True)
+    category = models.ForeignKey(
+        Category, on_delete=models.SET_NULL, null=True, blank=True, related_name="products"
+    )
+    group = models.ForeignKey(
+        ProductGroup, on_delete=models.PROTECT, null=True, blank=True, related_name="variants"
+    )
 
     image_catalog = models.ImageField(upload_to="catalog/", blank=True, null=True)
     image_details = models.ImageField(upload_to="details/", blank=True, null=True)
@@ -30,6 +152,40 @@ class Product(models.Model):
     def __str__(self):
         return f"{self.name} ({self.color})" if self.color else self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The category as stored, so receivers.py can recount the one it left
+        instance._loaded_category_id = instance.__dict__.get("category_id")
+        return instance
+
+    def save(self, *args, **kwargs):
+        creating = self.pk is None
+        if self.group_id is None:
+            self.group = ProductGroup.for_name(self.name)
+        super().save(*args, **kwargs)
+        self._loaded_category_id = self.category_id
+        if creating:
+            self.create_default_skus()
+
+    def create_default_skus(self):
+        SKU.objects.bulk_create(Product.default_skus([self]), ignore_conflicts=True)
+
+    @staticmethod
+    def default_skus(products) -> list:
+        """
+        Unsaved default SKUs for saved products: clothing (and its subcategories)
+        gets the standard sizes, everything else a single one-size SKU.
+        """
+        clothing = Category.objects.filter(slug="clothing").first()
+        skus = []
+        for product in products:
+            category = product.category
+            sized = clothing and category and category.path.startswith(clothing.path)
+            sizes = CLOTHING_SIZES if sized else ("",)
+            skus += [SKU(product=product, size=size, position=i) for i, size in enumerate(sizes)]
+        return skus
+
     def is_favorited_by(self, user):
         return user.is_authenticated and self.favorited_by.filter(user=user).exists()
 
@@ -83,22 +239,19 @@ class Product(models.Model):
             return False
         try:
 
-            from checkout.models import OrderItem, OrderStatus
+            from checkout.models import Order, OrderItem, OrderStatus
 
             paid_status = getattr(OrderStatus, "PAID", "paid")
         except Exception:
-            from checkout.models import OrderItem
+            from checkout.models import Order, OrderItem
 
             paid_status = "paid"
 
-        return (
-            OrderItem.objects.filter(
-                product=self,
-                order__status=paid_status,
-            )
-            .filter(Q(order__user=user) | Q(order__email=user.email))
-            .exists()
-        )
+        paid_lines = OrderItem.objects.filter(product=self, order__status=paid_status)
+        # Two index-friendly EXISTS instead of an OR across user and email
+        if paid_lines.filter(order__user=user).exists():
+            return True
+        return paid_lines.filter(order__in=Order.objects.for_email(user.email)).exists()
 
     def has_user_reviewed(self, user) -> bool:
         """ True if the user has already submitted a review for this product."""
@@ -126,6 +279,79 @@ class Product(models.Model):
         ]
 
 
+class SKU(models.Model):
+    """
+    One purchasable size of a color variant; size "" is one-size.
+
+    `stock` is units on hand and `available` is stock minus units reserved by
+    unpaid orders. Both are None for SKUs whose stock is not tracked. Only
+    checkout.stock changes `available`, always with a conditional UPDATE;
+    editing `stock` here shifts `available` by the same delta.
+    """
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="skus")
+    size = models.CharField(max_length=8, blank=True, default="")
+    position = models.PositiveSmallIntegerField(default=0)
+    # Signed so a stock correction below what is reserved never fails a payment
+    stock = models.IntegerField(null=True, blank=True, help_text="Units on hand; blank = untracked")
+    available = models.IntegerField(null=True, blank=True, editable=False)
+
+    class Meta:
+        verbose_name = "SKU"
+        ordering = ["product", "position", "id"]
+        constraints = [
+            models.UniqueConstraint(fields=["product", "size"], name="uniq_sku_product_size")
+        ]
+
+    def __str__(self):
+        return f"{self.product} – {self.size}" if self.size else str(self.product)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "stock" in instance.__dict__:
+            instance._loaded_stock = instance.stock
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            if self.available is None:
+                self.available = self.stock
+            return super().save(*args, **kwargs)
+        # Never write `available` from memory: a reservation may have landed since
+        # this row was read. Apply the stock delta to it in SQL instead.
+        update_fields = kwargs.pop("update_fields", None)
+        fields = [
+            f.name
+            for f in self._meta.concrete_fields
+            if not f.primary_key and f.name != "available"
+        ]
+        if update_fields is not None:
+            fields = [name for name in fields if name in update_fields]
+        super().save(*args, update_fields=fields, **kwargs)
+        loaded = getattr(self, "_loaded_stock", self.stock)
+        if "stock" in fields and self.stock != loaded:
+            if self.stock is None or loaded is None:
+                available = self.stock  # tracking switched off, or on
+            else:
+                available = models.F("available") + (self.stock - loaded)
+            SKU.objects.filter(pk=self.pk).update(available=available)
+            self.refresh_from_db(fields=["available"])
+        if "stock" in fields:
+            self._loaded_stock = self.stock
+
+    @classmethod
+    def ids_for(cls, lines) -> dict:
+        """{(product_id, size): sku_id} for (product_id, size) pairs, in one query."""
+        lines = {(product_id, normalize_size(size)) for product_id, size in lines}
+        found = cls.objects.filter(product_id__in={product_id for product_id, _ in lines})
+        return {
+            (product_id, size): sku_id
+            for sku_id, product_id, size in found.values_list("id", "product_id", "size")
+            if (product_id, size) in lines
+        }
+
+
 class Review(models.Model):
     product = models.ForeignKey(Product, related_name="reviews", on_delete=models.CASCADE)
     user = models.ForeignKey(
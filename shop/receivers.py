@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import lookup
+from .models import Category, Product, ProductGroup
+
+
+@receiver(post_save, sender=Product, dispatch_uid="shop.product_saved")
+def product_saved(sender, instance, created, **kwargs):
+    # Only the categories the product entered or left (and their ancestors) change
+    moved_from = getattr(instance, "_loaded_category_id", None)
+    if created or moved_from != instance.category_id:
+        Category.refresh_counts({instance.category_id, moved_from})
+    lookup.invalidate()
+
+
+@receiver(post_delete, sender=Product, dispatch_uid="shop.product_deleted")
+def product_deleted(sender, instance, **kwargs):
+    Category.refresh_counts({instance.category_id})
+    lookup.invalidate()
+
+
+@receiver(post_save, sender=Category, dispatch_uid="shop.category_saved")
+@receiver(post_delete, sender=Category, dispatch_uid="shop.category_deleted")
+def categories_changed(sender, instance, **kwargs):
+    # A moved or deleted category reshapes subtrees: recount them all (rare)
+    Category.refresh_counts()
+    lookup.invalidate()
+
+
+@receiver(post_save, sender=Product, dispatch_uid="shop.product_loaded")
+def complete_loaded_product(sender, instance, raw=False, **kwargs):
+    """Fixture rows skip Product.save(): give them a group and their default SKUs."""
+    if raw and instance.group_id is None:
+        instance.group = ProductGroup.for_name(instance.name)
+        Product.objects.filter(pk=instance.pk).update(group=instance.group)
+        instance.create_default_skus()
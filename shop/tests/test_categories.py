@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from shop.models import Category, Product
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class CategoryTests(TestCase):
+    """
+    Categories form a tree with materialized id paths and precomputed subtree
+    product counts; /shop/c/<slug>/ lists a whole subtree.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.equipment = Category.objects.get(slug="equipment")  # created by the migration
+        self.strength = Category.objects.get(slug="strength-equipment")
+        self.weights = Category.objects.create(name="Weights", slug="weights", parent=self.strength)
+        self.mat = Product.objects.create(
+            name="Mat", description="-", price=30, category=self.equipment
+        )
+        self.kettlebell = Product.objects.create(
+            name="Kettlebell", description="-", price=50, category=self.weights
+        )
+        Product.objects.create(
+            name="Tee", description="-", price=20, category=Category.objects.get(slug="clothing")
+        )
+
+    def _refresh(self, *categories):
+        for category in categories:
+            category.refresh_from_db()
+
+    def test_paths_and_subtree_counts(self):
+        self._refresh(self.equipment, self.strength)
+
+        self.assertEqual(
+            self.weights.path, f"{self.equipment.pk}/{self.strength.pk}/{self.weights.pk}/"
+        )
+        subtree = {self.equipment, self.strength, self.weights}
+        self.assertEqual(set(self.equipment.subtree()), subtree)
+        self.assertEqual((self.equipment.product_count, self.strength.product_count), (2, 1))
+
+    def test_product_saves_recount_only_the_categories_they_touch(self):
+        with self.assertNumQueries(1):  # no category moved: nothing to recount
+            self.mat.save(update_fields=["price"])
+
+        self.mat = Product.objects.get(pk=self.mat.pk)
+        self.mat.category = self.weights
+        self.mat.save()
+        self._refresh(self.equipment, self.strength, self.weights)
+
+        self.assertEqual((self.equipment.product_count, self.strength.product_count), (2, 2))
+        self.assertEqual(self.weights.product_count, 2)
+
+        self.kettlebell.delete()
+        self._refresh(self.weights)
+        self.assertEqual(self.weights.product_count, 1)
+
+    def test_moving_a_category_reroots_its_subtree(self):
+        self.strength.parent = None
+        self.strength.save()
+        self._refresh(self.weights, self.equipment)
+
+        self.assertEqual(self.weights.path, f"{self.strength.pk}/{self.weights.pk}/")
+        self.assertEqual(self.equipment.product_count, 1)
+
+        self.equipment.parent = self.weights
+        self.equipment.full_clean()  # allowed: not its own descendant
+        self.strength.parent = self.weights
+        with self.assertRaises(ValidationError):
+            self.strength.full_clean()
+
+    def test_category_url_lists_the_subtree(self):
+        resp = self.client.get(reverse("category_products", args=["equipment"]))
+
+        self.assertEqual([p.name for p in resp.context["page_obj"]], ["Kettlebell", "Mat"])
+        self.assertContains(resp, "Strength Equipment (1)")
+        self.assertEqual(
+            [f["value"] for f in resp.context["facets"]["category"]],
+            ["equipment", "strength-equipment", "weights"],
+        )
+        self.assertEqual(
+            self.client.get(reverse("category_products", args=["nope"])).status_code, 404
+        )
+
+    def test_category_filter_is_an_integer_match(self):
+        resp = self.client.get(reverse("product_list"), {"category": "strength-equipment"})
+
+        self.assertEqual([p.name for p in resp.context["page_obj"]], ["Kettlebell"])
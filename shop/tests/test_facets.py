@@ -0,0 +1,158 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from shop.facets import FacetIndex, get_index, parse_cents
+from shop.models import Category, Product
+
+CATEGORIES = [
+    # id, name, slug, path
+    (1, "Clothing", "clothing", "1/"),
+    (2, "Accessories", "accessories", "2/"),
+    (3, "Equipment", "equipment", "3/"),
+    (4, "Bands", "bands", "3/4/"),
+]
+ROWS = [
+    # id, name, category id, color, price, group id
+    (1, "Tee", 1, "Black", Decimal("19.99"), 1),
+    (2, "bra", 1, "Pink", Decimal("40.00"), 2),
+    (3, "Cap", 2, "black", Decimal("15.00"), 3),
+    (4, "Mat", 3, None, Decimal("30.00"), 4),
+    (5, "Band", 4, "Pink", Decimal("9.50"), 5),
+]
+
+
+class FacetIndexTests(SimpleTestCase):
+    """Facet masks, price ranges and precomputed orders answer any filter mix."""
+
+    def setUp(self):
+        self.index = FacetIndex(ROWS, CATEGORIES)
+
+    def _counts(self, result, facet):
+        return {row["label"]: row["count"] for row in result.counts[facet]}
+
+    def test_no_filters_lists_everything_by_name(self):
+        result = self.index.search()
+
+        self.assertEqual(result.ids, [5, 2, 3, 4, 1])
+        self.assertEqual(
+            self._counts(result, "category"),
+            {"Accessories": 1, "Clothing": 2, "Equipment": 2, "Bands": 1},
+        )
+        self.assertEqual(self._counts(result, "color"), {"Black": 2, "Pink": 2})
+        self.assertEqual(result.price_range, (950, 4000))
+
+    def test_multi_select_and_price_range(self):
+        result = self.index.search(
+            {"category": ["Clothing", "accessories"], "color": ["BLACK"]},
+            max_cents=2000,
+            sort="price_desc",
+        )
+
+        self.assertEqual(result.ids, [1, 3])
+        # A facet's counts ignore its own selection but apply the others
+        self.assertEqual(
+            self._counts(result, "category"),
+            {"Accessories": 1, "Clothing": 1, "Equipment": 0, "Bands": 0},
+        )
+        self.assertEqual(self._counts(result, "color"), {"Black": 2, "Pink": 0})
+        self.assertEqual(
+            [row["label"] for row in result.counts["color"] if row["selected"]], ["Black"]
+        )
+
+    def test_parent_category_includes_its_subtree(self):
+        self.assertEqual(self.index.search({"category": ["equipment"]}).ids, [5, 4])
+        scoped = self.index.search({"color": ["pink"]}, scope="equipment")
+        self.assertEqual(scoped.ids, [5])
+        self.assertEqual(self._counts(scoped, "color"), {"Black": 0, "Pink": 1})
+
+    def test_one_result_per_group_and_group_counts(self):
+        index = FacetIndex(
+            ROWS + [(6, "Tee", 1, "Pink", Decimal("18.00"), 1), (7, "Tee", 1, "White", 1, 1)],
+            CATEGORIES,
+        )
+
+        result = index.search({"color": ["pink"]}, sort="price_asc")
+
+        self.assertEqual(result.ids, [5, 6, 2])
+        self.assertEqual(result.variant_ids, [5, 6, 2])
+        self.assertEqual(index.search(sort="price_asc").ids, [7, 5, 3, 4, 2])
+        # Three Tee variants are one Clothing group
+        self.assertEqual(self._counts(index.search(), "category")["Clothing"], 2)
+        self.assertEqual(index.collapse([6, 2, 1, 7]), [6, 2])
+
+    def test_unknown_value_and_id_restriction(self):
+        self.assertEqual(self.index.search({"color": ["Teal"]}).ids, [])
+        self.assertEqual(self.index.search(only_ids=[4, 1, 99], sort="newest").ids, [4, 1])
+
+    def test_parse_cents(self):
+        self.assertEqual(
+            [parse_cents(v) for v in ("49", "49,90", "", "-1", "x")],
+            [4900, 4990, None, None, None],
+        )
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class ProductListFacetTests(TestCase):
+    """product_list filters through the worker's index, rebuilt when products change."""
+
+    def setUp(self):
+        cache.clear()
+        categories = {}
+        for pk, name, slug, path in CATEGORIES:
+            parent = categories.get(int(path.split("/")[0])) if path.count("/") > 1 else None
+            # The root categories already exist; the migration creates them
+            categories[pk], _ = Category.objects.update_or_create(
+                slug=slug, defaults={"name": name, "parent": parent}
+            )
+        for _, name, category, color, price, _ in ROWS:
+            Product.objects.create(
+                name=name,
+                description="-",
+                category=categories[category],
+                color=color,
+                price=price,
+            )
+
+    def _names(self, params):
+        resp = self.client.get(reverse("product_list"), params)
+        return [p.name for p in resp.context["page_obj"]], resp
+
+    def test_multi_select_filters_and_counts(self):
+        names, resp = self._names(
+            {"category": ["clothing", "bands"], "color": "Pink", "min_price": "10"}
+        )
+
+        self.assertEqual(names, ["bra"])
+        colors = {row["label"]: row["count"] for row in resp.context["facets"]["color"]}
+        self.assertEqual(colors, {"Black": 1, "Pink": 1})
+        self.assertContains(resp, 'value="equipment"')
+        self.assertIn("color=Pink", resp.context["querystring"])
+
+    def test_search_and_rebuild_on_product_change(self):
+        self.assertEqual(self._names({"q": "tee"})[0], ["Tee"])
+        index = get_index()
+
+        Product.objects.filter(name="Cap").get().delete()
+
+        self.assertIsNot(get_index(), index)
+        self.assertEqual(self._names({"color": "black"})[0], ["Tee"])
+
+    def test_pages_are_ordered_id_slices(self):
+        for i in range(12):
+            Product.objects.create(name=f"Zip {i:02}", description="-", price=1)
+
+        first, _ = self._names({"sort": "price_asc"})
+        second, resp = self._names({"sort": "price_asc", "page": 2})
+
+        self.assertEqual(first, [f"Zip {i:02}" for i in range(12)])
+        self.assertEqual(second, ["Band", "Cap", "Tee", "Mat", "bra"])
+        self.assertEqual(resp.context["page_obj"].paginator.count, 17)
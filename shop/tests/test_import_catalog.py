@@ -0,0 +1,123 @@
+import io
+import json
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase
+
+from shop import lookup
+from shop.catalog_import import CatalogImporter, iter_json_array
+from shop.models import CLOTHING_SIZES, SKU, Category, Product
+
+CSV = """name,color,price,category,description
+Tee,Black,19.90,clothing,Soft tee
+Tee,Pink,19.90,clothing,Soft tee
+Mat,,30,equipment,Grippy
+tee,black,25,clothing,Duplicate of the first row
+Broken,,abc,clothing,
+Broken,,NaN,clothing,
+"""
+
+
+class JsonArrayStreamTests(SimpleTestCase):
+    def test_elements_survive_chunk_boundaries(self):
+        items = [{"name": f"Item {i}", "tags": ["a", "b"], "note": "x, ]"} for i in range(20)]
+        text = json.dumps(items, indent=2)
+
+        self.assertEqual(list(iter_json_array(io.StringIO(text), chunk_size=7)), items)
+        self.assertEqual(list(iter_json_array(io.StringIO("[]"))), [])
+
+
+class ImportCatalogTests(TestCase):
+    """Rows are diffed by (name, color) and content hash; only changes are written."""
+
+    def setUp(self):
+        cache.clear()
+        self.tmp = Path(tempfile.mkdtemp())
+
+    def _run(self, content, name="catalog.csv", *args):
+        path = self.tmp / name
+        path.write_text(content, encoding="utf-8")
+        out = StringIO()
+        call_command("import_catalog", str(path), *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_creates_products_with_groups_and_skus(self):
+        version = lookup.catalog_version()
+
+        output = self._run(CSV)
+
+        self.assertIn("Created    : 3", output)
+        self.assertIn("Duplicates : 1", output)
+        self.assertIn("Invalid    : 2", output)
+        self.assertIn("rows/s", output)
+        black, pink = Product.objects.filter(name="Tee").order_by("color")
+        self.assertEqual(black.group_id, pink.group_id)
+        self.assertEqual(black.price, Decimal("19.90"))
+        self.assertEqual(list(black.skus.values_list("size", flat=True)), list(CLOTHING_SIZES))
+        self.assertEqual(Category.objects.get(slug="clothing").product_count, 2)
+        self.assertNotEqual(lookup.catalog_version(), version)
+
+    def test_reimport_updates_only_changed_rows(self):
+        self._run(CSV)
+        mat = Product.objects.get(name="Mat")
+        Product.objects.filter(pk=mat.pk).update(image_catalog="catalog/mat.webp")
+
+        output = self._run("name,color,price\nTee,Black,19.90\nMAT,,35\n")
+
+        self.assertIn("Updated    : 1", output)
+        self.assertIn("Unchanged  : 1", output)
+        mat.refresh_from_db()
+        self.assertEqual((mat.name, mat.price), ("MAT", Decimal("35.00")))
+        # Columns the file does not have keep their values
+        self.assertEqual((mat.description, mat.image_catalog.name), ("Grippy", "catalog/mat.webp"))
+
+    def test_dry_run_shows_diff_without_writing(self):
+        self._run(CSV)
+        rows = [
+            {"model": "shop.category", "pk": 9, "fields": {"name": "Ignored"}},
+            {"model": "shop.product", "fields": {"name": "Tee", "color": "Pink", "price": 15}},
+            {"model": "shop.product", "fields": {"name": "Cap", "price": 9}},
+        ]
+
+        output = self._run(json.dumps(rows), "catalog.json", "--dry-run")
+
+        self.assertIn("~ Tee (Pink)", output)
+        self.assertIn("price: '19.90' -> '15.00'", output)
+        self.assertIn("+ Cap", output)
+        self.assertIn("Rows read  : 2", output)
+        self.assertFalse(Product.objects.filter(name="Cap").exists())
+        self.assertEqual(Product.objects.get(color="Pink").price, Decimal("19.90"))
+
+    def test_malformed_file_still_refreshes_written_batches(self):
+        version = lookup.catalog_version()
+        rows = [json.dumps({"name": f"Band {i}", "price": 5}) for i in range(3)]
+
+        with self.assertRaises(CommandError):
+            self._run("\n".join(rows + ["{not json"]), "catalog.jsonl", "--batch-size", "2")
+
+        self.assertEqual(Product.objects.filter(name__startswith="Band").count(), 2)
+        self.assertNotEqual(lookup.catalog_version(), version)
+
+    def test_over_long_values_are_invalid_rows(self):
+        long_name = "x" * 256
+        output = self._run(f"name,color,hex,price\n{long_name},,,5\nTee,Red,#ff00001,5\nCap,,,9\n")
+
+        self.assertIn("Created    : 1", output)
+        self.assertIn("Invalid    : 2", output)
+        self.assertTrue(Product.objects.filter(name="Cap").exists())
+
+    def test_failed_batch_is_not_counted(self):
+        importer = CatalogImporter()
+        with patch.object(SKU.objects, "bulk_create", side_effect=DatabaseError("boom")):
+            with self.assertRaises(DatabaseError):
+                importer.run([{"name": "Band", "price": "5"}])
+
+        self.assertEqual(importer.stats.created, 0)
+        self.assertFalse(Product.objects.filter(name="Band").exists())
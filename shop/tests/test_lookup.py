@@ -0,0 +1,109 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from checkout.models import OrderItem
+from shop import lookup
+from shop.models import Category, Product
+
+
+def _product_queries(ctx):
+    return [q["sql"] for q in ctx.captured_queries if 'FROM "shop_product"' in q["sql"]]
+
+
+@override_settings(
+    STRIPE_USE_STUB=True,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class ProductLookupTests(TestCase):
+    """
+    Cart and checkout resolve products through a per-worker LRU of immutable
+    records, loaded in one batch and dropped when any product is saved.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.tee = Product.objects.create(
+            name="Tee",
+            description="-",
+            price=Decimal("19.99"),
+            category=Category.objects.get(slug="clothing"),
+        )
+        self.bra = Product.objects.create(name="Bra", description="-", price=40, color="Pink")
+
+    def test_get_many_loads_misses_in_one_query(self):
+        with self.assertNumQueries(1):
+            records = lookup.get_many([self.tee.pk, str(self.bra.pk), 999999, "x"])
+        with self.assertNumQueries(0):
+            again = lookup.get_many([self.tee.pk, self.bra.pk])
+
+        self.assertEqual(set(records), {self.tee.pk, self.bra.pk})
+        self.assertIs(again[self.tee.pk], records[self.tee.pk])
+        tee = records[self.tee.pk]
+        self.assertEqual((tee.price_cents, tee.price), (1999, Decimal("19.99")))
+        with self.assertRaises(AttributeError):
+            tee.name = "Changed"
+        with self.assertRaises(AttributeError):
+            tee.extra = 1  # __slots__: no per-record __dict__
+
+    def test_saving_a_product_invalidates(self):
+        lookup.get_many([self.tee.pk])
+        self.tee.name = "Organic Tee"
+        self.tee.save()
+
+        self.assertEqual(lookup.get(self.tee.pk).name, "Organic Tee")
+
+        lookup.invalidate()  # e.g. after a queryset .update()
+        with self.assertNumQueries(1):
+            lookup.get(self.tee.pk)
+
+    def test_cart_requests_read_products_once(self):
+        self.client.post(reverse("add_to_cart", args=[self.tee.pk]), {"quantity": 2, "size": "M"})
+        self.client.post(reverse("add_to_cart", args=[self.bra.pk]), {"quantity": 1})
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("cart_detail"))
+            self.client.post(reverse("cart_remove"), {"product_id": self.bra.pk, "size": ""})
+
+        self.assertContains(resp, "Tee")
+        self.assertEqual(resp.context["cart_total"], Decimal("79.98"))
+        self.assertEqual(_product_queries(ctx), [])
+        self.assertEqual(list(self.client.session["cart"]), [f"{self.tee.pk}:M"])
+
+    def test_address_snapshots_lines_from_records(self):
+        session = self.client.session
+        session["cart"] = {
+            f"{self.tee.pk}:M": {"product_id": self.tee.pk, "quantity": 2, "size": "M"},
+            str(self.bra.pk): 1,
+            "999999": 3,  # deleted product: skipped
+        }
+        session.save()
+        lookup.get_many([self.tee.pk, self.bra.pk, 999999])  # warm, as the cart page would
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(
+                reverse("checkout_address"),
+                {
+                    "full_name": "Anna Andersson",
+                    "email": "anna@example.com",
+                    "address1": "Test Street 1",
+                    "postal_code": "12345",
+                    "city": "Stockholm",
+                    "country": "SE",
+                    "shipping_method": "standard",
+                    "billing_same_as_shipping": True,
+                },
+            )
+
+        self.assertEqual(_product_queries(ctx), [])
+        self.assertEqual(
+            sorted(OrderItem.objects.values_list("product_name", "unit_price", "quantity")),
+            [("Bra", 4000, 1), ("Tee", 1999, 2)],
+        )
@@ -0,0 +1,99 @@
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import override_settings
+
+from shop.management.commands.repair_product_media import MediaIndex, norm_rel_path
+from shop.models import Product
+
+FILES = [
+    "catalog/clothes/tee_catalog.webp",
+    "catalog/clothes/tee_pink_2.webp",
+    "catalog/accessories/cap_catalog.webp",
+    "catalog/accessories/tee_catalog.webp",
+    "details/clothes/tee_detail.webp",
+    "details/accessories/cap_detail_a1b2c.webp",
+    "catalog/notes.txt",
+]
+
+
+class MediaIndexTests(SimpleTestCase):
+    """Stored values resolve against the in-memory indexes, never the disk."""
+
+    def setUp(self):
+        self.index = MediaIndex(FILES)
+
+    def test_resolution_order(self):
+        resolve = self.index.resolve
+        self.assertEqual(resolve("catalog", "catalog/clothes/tee_catalog.webp"), FILES[0])
+        # Same basename, own subdirectory preferred
+        self.assertEqual(resolve("catalog", "catalog/accessories/x/tee_catalog.webp"), FILES[3])
+        self.assertEqual(resolve("catalog", "/media/catalog/catalog/cap_catalog.jpg"), FILES[2])
+        # Stem prefixes stop at separators
+        self.assertEqual(resolve("catalog", "tee_pink"), FILES[1])
+        self.assertIsNone(resolve("catalog", "te"))
+        # Storage suffix dropped, then prefix
+        self.assertEqual(resolve("details", "cap_catalog"), FILES[5])
+        self.assertIsNone(resolve("catalog", "notes"))
+        self.assertEqual(len(self.index), 6)
+
+    def test_norm_rel_path(self):
+        self.assertEqual(
+            norm_rel_path("media\\catalog//media/catalog/catalog/tee.webp"), "catalog/tee.webp"
+        )
+
+
+class RepairProductMediaTests(TestCase):
+    """The command repairs stored paths against MEDIA_ROOT in one batched write."""
+
+    def setUp(self):
+        self.media = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.media)
+        for rel in FILES:
+            (self.media / rel).parent.mkdir(parents=True, exist_ok=True)
+            (self.media / rel).touch()
+        self.tee = Product.objects.create(
+            name="Tee",
+            description="-",
+            price=20,
+            image_catalog="media/catalog/clothes/tee_catalog",
+        )
+        self.cap = Product.objects.create(
+            name="Cap",
+            description="-",
+            price=10,
+            image_catalog="catalog/accessories/cap_catalog.webp",
+            image_details="/media/details/gone.webp",
+        )
+
+    def _run(self, *args):
+        out = StringIO()
+        with override_settings(MEDIA_ROOT=str(self.media)):
+            call_command("repair_product_media", *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_reports_without_writing(self):
+        output = self._run()
+
+        self.assertIn("image_catalog='catalog/clothes/tee_catalog.webp'", output)
+        self.assertIn("Missing details  : 1", output)
+        self.tee.refresh_from_db()
+        self.assertEqual(self.tee.image_catalog.name, "media/catalog/clothes/tee_catalog")
+
+    def test_apply_writes_fixes(self):
+        output = self._run("--apply")
+
+        self.assertIn("Updated records  : 2 (saved)", output)
+        self.tee.refresh_from_db()
+        self.cap.refresh_from_db()
+        # Extension-less value found by stem in its own subdirectory
+        self.assertEqual(self.tee.image_catalog.name, "catalog/clothes/tee_catalog.webp")
+        # Missing detail image found by the catalog image's name
+        self.assertEqual(self.tee.image_details.name, "details/clothes/tee_detail.webp")
+        # Unresolvable values are only normalized
+        self.assertEqual(self.cap.image_details.name, "details/gone.webp")
+        self.assertIn("Updated records  : 0", self._run())
@@ -0,0 +1,89 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from checkout.models import OrderItem
+from shop.models import CLOTHING_SIZES, SKU, Category, Product
+
+
+@override_settings(
+    STRIPE_USE_STUB=True,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class ProductVariantTests(TestCase):
+    """
+    Colors of a product share a ProductGroup (one catalog card with swatches),
+    each color has one SKU per size, and order lines reference the SKU.
+    """
+
+    def setUp(self):
+        cache.clear()
+        clothing = Category.objects.get(slug="clothing")
+        self.black, self.pink = (
+            Product.objects.create(
+                name="Tights", description="-", price=50, color=color, hex=hex, category=clothing
+            )
+            for color, hex in (("Black", "#000000"), ("Pink", "#ffc0cb"))
+        )
+        self.mat = Product.objects.create(
+            name="Mat", description="-", price=30, category=Category.objects.get(slug="equipment")
+        )
+
+    def test_saving_groups_colors_and_creates_default_skus(self):
+        self.assertEqual(self.black.group_id, self.pink.group_id)
+        self.assertNotEqual(self.black.group_id, self.mat.group_id)
+        self.assertEqual(
+            list(self.pink.skus.values_list("size", flat=True)), list(CLOTHING_SIZES)
+        )
+        self.assertEqual(list(self.mat.skus.values_list("size", flat=True)), [""])
+
+    def test_catalog_shows_one_card_per_group(self):
+        resp = self.client.get(reverse("product_list"))
+
+        cards = list(resp.context["page_obj"])
+        self.assertEqual([p.name for p in cards], ["Mat", "Tights"])
+        self.assertEqual([v.hex for v in cards[1].swatches], ["#000000", "#ffc0cb"])
+        self.assertContains(resp, "2 colors")
+        # A color filter picks the matching variant as the card
+        resp = self.client.get(reverse("product_list"), {"color": "pink"})
+        self.assertEqual([p.pk for p in resp.context["page_obj"]], [self.pink.pk])
+
+    def test_detail_loads_variants_and_sizes(self):
+        url = reverse("product_detail", args=[self.pink.pk])
+        resp = self.client.get(url)
+
+        self.assertEqual(resp.context["variants"], [self.black, self.pink])
+        self.assertEqual(resp.context["sizes"], list(CLOTHING_SIZES))
+        self.assertContains(resp, reverse("product_detail", args=[self.black.pk]))
+        mat = self.client.get(reverse("product_detail", args=[self.mat.pk]))
+        self.assertContains(mat, 'value="NA"')
+
+    def test_order_lines_reference_skus(self):
+        self.client.post(reverse("add_to_cart", args=[self.pink.pk]), {"size": "M"})
+        self.client.post(reverse("add_to_cart", args=[self.mat.pk]), {"size": "NA"})
+
+        self.client.post(
+            reverse("checkout_address"),
+            {
+                "full_name": "Anna Andersson",
+                "email": "anna@example.com",
+                "address1": "Test Street 1",
+                "postal_code": "12345",
+                "city": "Stockholm",
+                "country": "SE",
+                "shipping_method": "standard",
+                "billing_same_as_shipping": True,
+            },
+        )
+
+        self.assertEqual(
+            set(OrderItem.objects.values_list("sku_id", flat=True)),
+            {
+                SKU.objects.get(product=self.pink, size="M").id,
+                SKU.objects.get(product=self.mat, size="").id,
+            },
+        )
@@ -5,6 +5,7 @@ urlpatterns = [
     # Products
     path("", views.product_list, name="shop"),
     path("products/", views.product_list, name="product_list"),
+    path("c/<slug:slug>/", views.product_list, name="category_products"),
     path("products/<int:pk>/", views.product_detail, name="product_detail"),
     # Reviews (create uses product pk; edit/delete uses review pk)
     path("products/<int:pk>/reviews/new/", views.ReviewCreateView.as_view(), name="review_create"),
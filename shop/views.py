@@ -12,15 +12,19 @@ from django.views.generic import CreateView, UpdateView, ListView
 
 from django.conf import settings
 
-from .models import Product, Review, Favorite
+from .models import SKU, Category, Product, Review, Favorite, normalize_size
 from .forms import ReviewForm
+from . import lookup
 from .cart import Cart
+from .facets import FACETS, get_index, parse_cents
+from recommendations.cards import recommended_cards
+from reports.rankings import RankedIds
 
 # Import OrderItem to verify exact variant purchases
 try:
-    from checkout.models import OrderItem
+    from checkout.models import Order, OrderItem, normalize_email
 except Exception:
-    OrderItem = None  
+    Order = OrderItem = normalize_email = None  
 
 
 # Purchase verification helpers
@@ -54,7 +58,7 @@ def has_purchased_exact_variant(user, product) -> bool:
         # Fallback by email for guest checkout matched to this user's email
         if user.email:
             if OrderItem.objects.filter(
-                order__email__iexact=user.email,
+                order__in=Order.objects.for_email(user.email),
                 product=product,
                 order__status__in=statuses,
             ).exists():
@@ -72,6 +76,12 @@ def _norm_size(val):
     return None if s == "" or s.upper() == "NA" else s
 
 
+def _size_is_offered(product, size) -> bool:
+    """True if `size` is one of the product's SKUs (products without SKUs take any)."""
+    sizes = set(SKU.objects.filter(product_id=product.id).values_list("size", flat=True))
+    return not sizes or normalize_size(size) in sizes
+
+
 def _delete_matching_lines_in_session(session, product_id, size):
     """
     Remove ALL lines in the session cart that match the same product+size,
@@ -126,67 +136,83 @@ def _delete_matching_lines_in_session(session, product_id, size):
 
 
 # Products
-def product_list(request):
+def product_list(request, slug=None):
     """
-    Product list with search, filter, sort, pagination.
+    Product list with search, multi-select facets, price range, sort, pagination.
+    Filtering, facet counts and ordering come from the in-memory index in
+    shop.facets; only the text search and the products on the page hit the DB.
+    With a category slug (/shop/c/<slug>/) the list is limited to that subtree.
     """
-    qs = Product.objects.all()
-
+    category = get_object_or_404(Category, slug=slug) if slug else None
     q = request.GET.get("q", "").strip()
-    cat = request.GET.get("category", "").strip()
-    color = request.GET.get("color", "").strip()
+    selected = {
+        name: [v.strip() for v in request.GET.getlist(name) if v.strip()] for name in FACETS
+    }
+    min_price = request.GET.get("min_price", "").strip()
+    max_price = request.GET.get("max_price", "").strip()
     sort = request.GET.get("sort", "name_asc")
 
+    only_ids = None
     if q:
-        qs = qs.filter(Q(name__icontains=q) | Q(description__icontains=q))
-    if cat:
-        qs = qs.filter(category__iexact=cat)
-    if color:
-        qs = qs.filter(color__iexact=color)
-
-    sort_map = {
-        "name_asc": "name",
-        "name_desc": "-name",
-        "price_asc": "price",
-        "price_desc": "-price",
-        "newest": "-id",
-    }
-    qs = qs.order_by(sort_map.get(sort, "name"))
-
-    paginator = Paginator(qs, 12)
-    page_obj = paginator.get_page(request.GET.get("page"))
-
-    categories = (
-        Product.objects.exclude(category__isnull=True)
-        .exclude(category__exact="")
-        .values_list("category", flat=True)
-        .distinct()
-        .order_by("category")
-    )
-    colors = (
-        Product.objects.exclude(color__isnull=True)
-        .exclude(color__exact="")
-        .values_list("color", flat=True)
-        .distinct()
-        .order_by("color")
+        only_ids = Product.objects.filter(
+            Q(name__icontains=q) | Q(description__icontains=q)
+        ).values_list("id", flat=True)
+    index = get_index()
+    result = index.search(
+        selected,
+        min_cents=parse_cents(min_price),
+        max_cents=parse_cents(max_price),
+        only_ids=only_ids,
+        sort=sort,
+        scope=category.slug if category else None,
     )
+    filtered = bool(q or min_price or max_price or any(selected.values()))
+    ids = result.ids
+    if sort in ("bestsellers", "trending"):
+        # Rankings change with every paid order, so they are read per request:
+        # ordered by score and sliced to the requested page in SQL
+        variant_ids = result.variant_ids if filtered or category else None
+        ids = RankedIds(result.ids, sort, index.group_of, variant_ids)
+
+    # One card per product group; its colors are shown as swatches
+    paginator = Paginator(ids, 12)
+    page_obj = paginator.get_page(request.GET.get("page"))
+    products = Product.objects.in_bulk(page_obj.object_list)
+    page_obj.object_list = [products[pk] for pk in page_obj.object_list if pk in products]
+    swatches = {}
+    for variant in Product.objects.filter(
+        group_id__in={p.group_id for p in page_obj.object_list}
+    ).only("id", "group_id", "color", "hex").order_by("id"):
+        swatches.setdefault(variant.group_id, []).append(variant)
+    for product in page_obj.object_list:
+        product.swatches = swatches.get(product.group_id, [])
 
     favorite_ids = set()
     if request.user.is_authenticated:
         favorite_ids = set(
-            Favorite.objects.filter(user=request.user, product__in=qs).values_list(
+            Favorite.objects.filter(user=request.user, product_id__in=products).values_list(
                 "product_id", flat=True
             )
         )
 
+    facets = result.counts
+    if category:
+        # Categories outside the subtree can only ever count zero here
+        facets["category"] = [f for f in facets["category"] if f["count"] or f["selected"]]
+
+    querystring = request.GET.copy()
+    querystring.pop("page", None)
     ctx = {
+        "category": category,
+        "subcategories": Category.objects.filter(parent=category, product_count__gt=0),
         "page_obj": page_obj,
         "q": q,
-        "cat": cat,
-        "color": color,
+        "min_price": min_price,
+        "max_price": max_price,
         "sort": sort,
-        "categories": categories,
-        "colors": colors,
+        "facets": facets,
+        "filtered": filtered,
+        "querystring": querystring.urlencode(),
         "favorite_ids": favorite_ids,
     }
     return render(request, "shop/product_list.html", ctx)
@@ -198,7 +224,20 @@ def product_detail(request, pk):
     Shows review form only for logged-in verified buyers who haven't reviewed yet.
     Verified-buyer badges are computed from OrderItem for THIS exact product.
     """
-    product = get_object_or_404(Product, pk=pk)
+    product = get_object_or_404(Product.objects.select_related("category"), pk=pk)
+
+    # Every color of the group in one query; sizes come from this color's SKUs
+    variants = [product]
+    if product.group_id:
+        variants = list(
+            Product.objects.filter(group_id=product.group_id)
+            .only("id", "name", "color", "hex")
+            .order_by("id")
+        )
+    skus = list(product.skus.all())
+    sizes = [sku.size for sku in skus if sku.size]
+    # Untracked SKUs (available is None) never sell out
+    sold_out = {sku.size for sku in skus if sku.available is not None and sku.available <= 0}
 
     # Favorite state for current user (sync heart on detail page)
     is_favorite = False
@@ -226,17 +265,19 @@ def product_detail(request, pk):
         rows = OrderItem.objects.filter(
             product=product,
             order__status__in=statuses,
-        ).values_list("order__user_id", "order__email")
+        ).values_list("order__user_id", "order__email_normalized")
     else:
         rows = []
 
     paid_user_ids = {uid for uid, email in rows if uid}
     paid_emails = {email for uid, email in rows if email}
 
-    # Attach r.is_verified for the template
+    # Attach r.is_verified for the template; emails compare normalized, as in for_email()
     for r in reviews:
         user_email = getattr(r.user, "email", None)
-        r.is_verified = (r.user_id in paid_user_ids) or (user_email in paid_emails)
+        r.is_verified = (r.user_id in paid_user_ids) or (
+            bool(user_email) and normalize_email(user_email) in paid_emails
+        )
 
     return render(
         request,
@@ -249,6 +290,11 @@ def product_detail(request, pk):
             "can_review": can_review,
             "has_reviewed": has_reviewed,
             "is_favorite": is_favorite,
+            "variants": variants,
+            "sizes": sizes,
+            "sold_out": sold_out,
+            "all_sold_out": bool(skus) and len(sold_out) == len(skus),
+            "recommended_cards": recommended_cards(product.id),
         },
     )
 
@@ -405,7 +451,7 @@ def cart_add(request, product_id):
     OrderItems pointing to the exact color/variant purchased.
     """
     cart = Cart(request)
-    product = get_object_or_404(Product, pk=product_id)
+    product = lookup.get_or_404(product_id)
     try:
         qty = int(request.POST.get("quantity", 1))
     except (TypeError, ValueError):
@@ -413,6 +459,9 @@ def cart_add(request, product_id):
     qty = max(qty, 1)
 
     size = _norm_size(request.POST.get("size"))
+    if not _size_is_offered(product, size):
+        messages.error(request, "Please choose one of the available sizes.")
+        return redirect("product_detail", pk=product.id)
     cart.add(product, quantity=qty, size=size)
     messages.success(request, "Added to cart.")
     return redirect("cart_detail")
@@ -426,7 +475,7 @@ def cart_update(request, product_id):
     for the same product+size from the raw session, then add with override=True.
     """
     cart = Cart(request)
-    product = get_object_or_404(Product, pk=product_id)
+    product = lookup.get_or_404(product_id)
     try:
         qty = int(request.POST.get("quantity", 1))
     except (TypeError, ValueError):
@@ -441,6 +490,8 @@ def cart_update(request, product_id):
     if qty <= 0:
         cart.remove(product, size=size)
         messages.info(request, "Item removed.")
+    elif not _size_is_offered(product, size):
+        messages.error(request, "Please choose one of the available sizes.")
     else:
         cart.add(product, quantity=qty, size=size, override=True)
         messages.info(request, "Cart updated.")
@@ -467,7 +518,7 @@ def cart_remove(request):
     try:
         cart = Cart(request)
         before_keys = [str(k) for (k, _item) in cart]
-        product = get_object_or_404(Product, pk=product_id)
+        product = lookup.get_or_404(product_id)
         cart.remove(product, size=size)
         after_keys = [str(k) for (k, _item) in cart]
         if set(before_keys) != set(after_keys):